@@ -1,26 +1,36 @@
 """
 This file contains all Monster classes for the text-based tower defense game.
+Monster stats come from the shared rule table (see rules.py).
 """
 
+from entities.rules import MONSTER_RULES, GOBLIN, OGRE
+
 class Monster:
 
     """
     Base class for all monsters in the game.
 
     Attributes:
+        type_id: Index of the monster's entry in MONSTER_RULES.
         name: The monster's name.
         symbol: Character symbol for display.
         hp: Hit points.
+        max_hp: Hit points when spawned.
         speed: Cells moved per turn.
         position: Current column position on the lane.
+        uid: Id unique on the board, set when the monster is added to it.
     """
 
-    def __init__(self, name, symbol, hp, speed):
-        self.name = name
-        self.symbol = symbol
-        self.hp = hp
-        self.speed = speed
+    def __init__(self, type_id):
+        rule = MONSTER_RULES[type_id]
+        self.type_id = type_id
+        self.name = rule.name
+        self.symbol = rule.symbol
+        self.hp = rule.hp
+        self.max_hp = rule.hp
+        self.speed = rule.speed
         self.position = 0
+        self.uid = None
 
     def move(self):
         # Move the monster forward based on speed.
@@ -37,9 +47,12 @@ class Monster:
 class Goblin(Monster):
     # A fast, weak monster that inherits the Monster constructor.
     def __init__(self):
-        super().__init__("Goblin", "G", hp = 20, speed = 2)
+        super().__init__(GOBLIN)
 
 class Ogre(Monster):
     # A strong, slow monster that inherits the Monster constructor.
     def __init__(self):
-        super().__init__("Ogre", "O", hp = 40, speed = 1)
+        super().__init__(OGRE)
+
+# Monster classes indexed by type id.
+MONSTER_CLASSES = (Goblin, Ogre)
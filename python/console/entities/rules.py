@@ -0,0 +1,18 @@
+"""
+This file makes the tower and monster rule table shared by the console and GUI
+games (python/rules.py, loading python/rules.json) importable as entities.rules.
+The console game uses the stats it supports and ignores targeting and splash.
+"""
+
+import os
+import sys
+
+# The shared loader sits two directories up, outside this game's import path.
+SHARED_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+if SHARED_DIR not in sys.path:
+    sys.path.append(SHARED_DIR)
+
+from rules import (  # noqa: E402
+    RULES_PATH, TowerRule, MonsterRule, RulesError, load_rules, TARGETING,
+    TOWER_RULES, MONSTER_RULES, ARROW, CANNON, GOBLIN, OGRE,
+)
@@ -2,6 +2,12 @@
 This file handles the board state and display for the text-based tower defense game.
 """
 
+from entities.rules import TOWER_RULES, MONSTER_RULES
+
+# ASCII symbols indexed by type id.
+TOWER_SYMBOLS = tuple(rule.symbol for rule in TOWER_RULES)
+MONSTER_SYMBOLS = tuple(rule.symbol for rule in MONSTER_RULES)
+
 class Board:
 
     """
@@ -12,6 +18,7 @@ class Board:
         width: Lane width on the game board.
         towers: Maps (lane, col) to Tower.
         monsters: List of tuples (Monster, lane).
+        next_uid: Id given to the next monster added to the board.
     """
 
     def __init__(self, lanes=3, width=6):
@@ -19,34 +26,30 @@ class Board:
         self.width = width
         self.towers = {}
         self.monsters = []
+        self.next_uid = 0
 
     def add_tower(self, lane, col, tower):
         # Place a tower on the board.
         self.towers[(lane, col)] = tower
 
     def add_monster(self, monster, lane):
-        # Add a monster to a specific lane.
+        # Add a monster to a specific lane, giving it an id unique on this board.
+        monster.uid = self.next_uid
+        self.next_uid += 1
         self.monsters.append((monster, lane))
 
     def display(self):
         # Print the board state in ASCII format.
+        # Each cell shows its first living monster; towers take priority.
+        cells = {}
+        for monster, lane in self.monsters:
+            if monster.is_alive():
+                cells.setdefault((lane, monster.position), MONSTER_SYMBOLS[monster.type_id])
+        for (lane, col), tower in self.towers.items():
+            cells[(lane, col)] = TOWER_SYMBOLS[tower.type_id]
+
         print("\n" + "=" * 40)
         for lane in range(self.lanes):
-            row = []
-            for col in range(self.width):
-                # Tower takes priority in display
-                if (lane, col) in self.towers:
-                    row.append(self.towers[(lane, col)].symbol)
-                else:
-                    symbol = ">"
-                    for monster, m_lane in self.monsters:
-                        if (
-                            m_lane == lane
-                            and monster.position == col
-                            and monster.is_alive()
-                        ):
-                            symbol = monster.symbol
-                            break
-                    row.append(symbol)
+            row = [cells.get((lane, col), ">") for col in range(self.width)]
             print(f"Lane {lane + 1} | " + " ".join(row) + " |")
         print("=" * 40)
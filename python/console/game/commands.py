@@ -0,0 +1,65 @@
+"""
+This file parses the command language used to script the console game.
+A script is a list of commands separated by semicolons or new lines, with
+# starting a comment, for example:
+
+    place arrow 2 4; place cannon 1 3; end
+    end      # end another turn without placing anything
+
+Commands:
+    place <arrow|cannon> <lane> <column>   Place a tower (lane and column start at 1).
+    end                                    Finish placing towers and resolve the turn.
+    undo                                   Undo the previous turn.
+    exit                                   Quit the game.
+
+The whole script is parsed up front, so a typo is reported before any turn is
+played, and the game then reads commands without prompting.
+"""
+
+from entities.rules import TOWER_RULES
+from entities.towers import TOWER_CLASSES
+
+TOWERS = {rule.key: TOWER_CLASSES[rule.id] for rule in TOWER_RULES}
+
+
+class ScriptError(Exception):
+    # Raised when a script contains a command that cannot be parsed.
+    pass
+
+
+def parse_command(words, line):
+    # Turn the words of one command into a tuple such as ("place", ArrowTower, 1, 3).
+    name = words[0].lower()
+    if name == "place":
+        if len(words) != 4:
+            raise ScriptError(f"Line {line}: expected 'place <tower> <lane> <column>'.")
+        tower = TOWERS.get(words[1].lower())
+        if tower is None:
+            raise ScriptError(f"Line {line}: unknown tower '{words[1]}', expected one of {', '.join(TOWERS)}.")
+        try:
+            lane, col = int(words[2]) - 1, int(words[3]) - 1
+        except ValueError:
+            raise ScriptError(f"Line {line}: lane and column must be numbers.")
+        return ("place", tower, lane, col)
+
+    if name in ("end", "undo", "exit"):
+        if len(words) != 1:
+            raise ScriptError(f"Line {line}: '{name}' takes no arguments.")
+        return (name,)
+
+    raise ScriptError(f"Line {line}: unknown command '{words[0]}'.")
+
+
+def parse_script(text, first_line=1):
+    """
+    Parse a whole script into a list of command tuples. Errors number the
+    lines from first_line.
+    """
+    commands = []
+    for line, content in enumerate(text.splitlines(), start=first_line):
+        content = content.split("#", 1)[0]
+        for command in content.split(";"):
+            words = command.split()
+            if words:
+                commands.append(parse_command(words, line))
+    return commands
@@ -3,15 +3,23 @@ This file handles the main game loop, waves, turns, tower placement, monster mov
 Additionally, there is a QuitGame exception class used for
 """
 
+import os
 import random
 from game.board import Board
 from entities.monsters import Goblin, Ogre
+from entities.rules import TOWER_RULES, ARROW, CANNON
 from entities.towers import ArrowTower, CannonTower
+from game.history import TurnHistory
+from game.savefile import save
 
 class QuitGame(Exception):
     # Raised when the player chooses to exit the game.
     pass
 
+class UndoTurn(Exception):
+    # Raised when the player asks to take back the previous turn.
+    pass
+
 class Game:
     """
     Base class for game.
@@ -23,31 +31,49 @@ class Game:
         turn: Starting turn of the game.
         wave: Starting wave of the game.
         max_waves: Total waves in the game.
+        monsters_killed: Monsters defeated so far.
+        monsters_escaped: Monsters that reached the end of their lane so far.
+        rng: Random number generator for wave composition; pass a seed to
+            replay the same game. Its state is saved and recorded in the
+            history, so resumed and undone games spawn the same waves.
+        history: TurnHistory of the board before each resolved turn.
+        commands: Iterator of parsed script commands (see game/commands.py),
+            or None to prompt the player.
     """
 
-    def __init__(self):
+    def __init__(self, seed=None):
         self.board = Board()
         self.gold = 150
         self.lives = 10
         self.turn = 1
         self.wave = 1
         self.max_waves = 5
+        self.monsters_killed = 0
+        self.monsters_escaped = 0
+        self.rng = random.Random(seed)
+        self.history = TurnHistory()
+        self.commands = None
 
     def spawn_wave(self):
         # Create a new wave of monsters in all lanes.
         print(f"\n  WAVE {self.wave} INCOMING ")
         for lane in range(self.board.lanes):
-            monster = random.choice([Goblin, Ogre])()
+            monster = self.rng.choice([Goblin, Ogre])()
             self.board.add_monster(monster, lane)
 
     def place_tower(self):
         # Prompt player to place a tower or be finished with their turn.
+        if self.commands is not None:
+            self.run_commands()
+            return
+
         while True:
             print(f"\nGold: {self.gold}")
-            print("[1] Arrow Tower (50 gold)")
-            print("[2] Cannon Tower (80 gold)")
+            print(f"[1] {TOWER_RULES[ARROW].name} ({TOWER_RULES[ARROW].cost} gold)")
+            print(f"[2] {TOWER_RULES[CANNON].name} ({TOWER_RULES[CANNON].cost} gold)")
             print("[0] Done placing towers")
-            print("[exit] Forfeit the game")
+            print("[u] Undo the previous turn")
+            print("[exit] Save and quit the game")
 
             choice = input("Choose tower: ")
 
@@ -57,6 +83,9 @@ class Game:
             if choice == "0":
                 return
 
+            if choice == "u":
+                raise UndoTurn()
+
             tower_map = {"1": ArrowTower, "2": CannonTower}
             if choice not in tower_map:
                 print("Invalid choice. Try again.")
@@ -74,18 +103,47 @@ class Game:
                 print("Invalid number input.")
                 continue
 
-            if not (0 <= lane < self.board.lanes and 0 <= col < self.board.width):
-                print("Out of bounds.")
-                continue
+            self.place_tower_at(tower, lane, col)
 
-            if (lane, col) in self.board.towers:
-                print("Tower already there.")
-                continue
+    def run_commands(self):
+        # Apply scripted commands until one ends the turn. Running out of
+        # commands quits the game.
+        for command in self.commands:
+            name = command[0]
+            if name == "end":
+                return
+            if name == "undo":
+                raise UndoTurn()
+            if name == "exit":
+                raise QuitGame()
 
-            # Valid placement
-            self.board.add_tower(lane, col, tower)
-            self.gold -= tower.cost
-            print(f"{tower.name} placed.")
+            self.buy_tower(*command[1:])
+        raise QuitGame()
+
+    def buy_tower(self, tower_class, lane, col):
+        # Place a tower of the given class if the player can afford it.
+        # Returns whether it was placed.
+        tower = tower_class()
+        if self.gold < tower.cost:
+            print("Not enough gold.")
+            return False
+        return self.place_tower_at(tower, lane, col)
+
+    def place_tower_at(self, tower, lane, col):
+        # Place an affordable tower on a free cell. Returns whether it was placed.
+        if not (0 <= lane < self.board.lanes and 0 <= col < self.board.width):
+            print("Out of bounds.")
+            return False
+
+        if (lane, col) in self.board.towers:
+            print("Tower already there.")
+            return False
+
+        # Valid placement
+        self.board.add_tower(lane, col, tower)
+        self.gold -= tower.cost
+        print(f"{tower.name} placed.")
+        return True
 
     def towers_attack(self):
         # Have each tower attack the first monster in range.
@@ -116,38 +174,72 @@ class Game:
         for monster, lane in self.board.monsters:
             if monster.position >= self.board.width:
                 self.lives -= 1
+                self.monsters_escaped += 1
                 print(f" {monster.name} escaped! Lives -1")
             elif monster.is_alive():
                 remaining.append((monster, lane))
             else:
                 self.gold += 10
+                self.monsters_killed += 1
                 print(f" {monster.name} defeated! +10 gold")
         self.board.monsters = remaining
 
-    def run(self):
+    def resolve_turn(self):
+        # Resolve the turn once the player is done placing towers. The wave
+        # ends when its monsters are gone or the last life is lost.
+        self.history.record(self)
+        self.towers_attack()
+        self.move_monsters()
+        self.cleanup_monsters()
+        self.turn += 1
+        if not self.board.monsters or self.lives <= 0:
+            self.wave += 1
+
+    def is_over(self):
+        # The game ends when the player runs out of lives or beats the last wave.
+        return self.lives <= 0 or self.wave > self.max_waves
+
+    def show_turn(self):
+        # Print the turn header and the board.
+        print(f"\nTURN {self.turn} | Lives: {self.lives}")
+        self.board.display()
+
+    def show_result(self):
+        if self.lives > 0:
+            print("\n YOU WIN! All waves defeated.")
+        else:
+            print("\n GAME OVER. The monsters broke through.")
+
+    def run(self, save_path=None):
         # Main game loop that continues until the player wins or loses.
+        # Quitting saves the game to save_path, if one is given.
         print("\n TEXT-BASED TOWER DEFENSE ")
 
         try:
-            while self.lives > 0 and self.wave <= self.max_waves:
-                self.spawn_wave()
+            while not self.is_over():
+                # A resumed game already has its current wave on the board.
+                if not self.board.monsters:
+                    self.spawn_wave()
 
-                while self.board.monsters and self.lives > 0:
-                    print(f"\nTURN {self.turn} | Lives: {self.lives}")
-                    self.board.display()
+                self.show_turn()
+                try:
                     self.place_tower()
-                    self.towers_attack()
-                    self.move_monsters()
-                    self.cleanup_monsters()
-                    self.turn += 1
+                except UndoTurn:
+                    if not self.history.undo(self):
+                        print("Nothing to undo.")
+                    continue
 
-                self.wave += 1
+                self.resolve_turn()
 
         except QuitGame:
-            print("Forfeiting the game. Thanks for playing!")
+            if save_path:
+                save(self, save_path)
+                print("Game saved. Run the game again to resume it.")
+            print("Thanks for playing!")
             return
 
-        if self.lives > 0:
-            print("\n YOU WIN! All waves defeated.")
-        else:
-            print("\n GAME OVER. The monsters broke through.")
+        # A finished game cannot be resumed.
+        if save_path and os.path.exists(save_path):
+            os.remove(save_path)
+
+        self.show_result()
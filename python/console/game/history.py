@@ -0,0 +1,236 @@
+"""
+This file records the turn history of a game for undo and rewind.
+Every few recorded turns a keyframe (a full copy of the game state) is stored,
+and the turns in between only keep a delta against the turn before them:
+counters such as gold and lives, the random generator state when it moved,
+tower changes, monster hp/position changes, spawns and removals. The oldest
+turns are dropped once the history grows past its memory ceiling.
+"""
+
+from array import array
+from bisect import bisect_left
+
+# Game attributes saved with every turn.
+SCALARS = ("gold", "lives", "turn", "wave", "monsters_killed", "monsters_escaped")
+
+# Rough memory use of a history entry and of each tower or monster record in it, in bytes.
+ENTRY_BYTES = 256
+RECORD_BYTES = 128
+# Memory use of a random generator state, its 625 words packed into bytes.
+RNG_BYTES = 2560
+
+
+def pack_rng(rng):
+    """Return the state of a random.Random as (version, packed words, gauss_next)."""
+    version, words, gauss = rng.getstate()
+    return version, array("I", words).tobytes(), gauss
+
+
+def unpack_rng(rng, state):
+    """Set a random.Random to a state returned by pack_rng."""
+    version, words, gauss = state
+    packed = array("I")
+    packed.frombytes(words)
+    rng.setstate((version, tuple(packed), gauss))
+
+
+def capture(game):
+    """
+    Return the game state as (scalars, rng state, towers, monsters).
+    Towers map (lane, col) to their class and monsters map uid to
+    (class, lane, position, hp, speed).
+    """
+    return (
+        tuple(getattr(game, name) for name in SCALARS),
+        pack_rng(game.rng),
+        {cell: type(tower) for cell, tower in game.board.towers.items()},
+        {
+            monster.uid: (type(monster), lane, monster.position, monster.hp, monster.speed)
+            for monster, lane in game.board.monsters
+        },
+    )
+
+
+def diff(old, new):
+    """Return the delta that turns state old into state new."""
+    old_towers, new_towers = old[2], new[2]
+    old_monsters, new_monsters = old[3], new[3]
+
+    changed = {}
+    spawned = {}
+    for uid, record in new_monsters.items():
+        previous = old_monsters.get(uid)
+        if previous is None:
+            spawned[uid] = record
+        elif previous != record:
+            changed[uid] = record[2:]
+
+    return (
+        new[0],
+        # The generator only moves when a wave spawns; most deltas leave it out.
+        new[1] if new[1] != old[1] else None,
+        {cell: cls for cell, cls in new_towers.items() if old_towers.get(cell) is not cls},
+        tuple(cell for cell in old_towers if cell not in new_towers),
+        changed,
+        spawned,
+        tuple(uid for uid in old_monsters if uid not in new_monsters),
+    )
+
+
+def apply(state, delta):
+    """Return the state reached by applying delta to state."""
+    scalars, rng_state, placed, demolished, changed, spawned, removed = delta
+
+    towers = dict(state[2])
+    for cell in demolished:
+        del towers[cell]
+    towers.update(placed)
+
+    monsters = dict(state[3])
+    for uid in removed:
+        del monsters[uid]
+    for uid, (position, hp, speed) in changed.items():
+        cls, lane = monsters[uid][:2]
+        monsters[uid] = (cls, lane, position, hp, speed)
+    monsters.update(spawned)
+
+    return scalars, rng_state or state[1], towers, monsters
+
+
+def restore(game, state):
+    """Replace the state of game with a captured state."""
+    scalars, rng_state, towers, monsters = state
+    for name, value in zip(SCALARS, scalars):
+        setattr(game, name, value)
+    unpack_rng(game.rng, rng_state)
+
+    game.board.towers = {cell: cls() for cell, cls in towers.items()}
+    game.board.monsters = []
+    # Monster ids grow in spawn order, which is also the board's list order.
+    for uid, (cls, lane, position, hp, speed) in sorted(monsters.items(), key=lambda item: item[0]):
+        monster = cls()
+        monster.uid = uid
+        monster.position = position
+        monster.hp = hp
+        monster.speed = speed
+        game.board.monsters.append((monster, lane))
+
+
+def state_bytes(state):
+    return ENTRY_BYTES + RNG_BYTES + RECORD_BYTES * (len(state[2]) + len(state[3]))
+
+
+def delta_bytes(delta):
+    rng_bytes = RNG_BYTES if delta[1] is not None else 0
+    return ENTRY_BYTES + rng_bytes + RECORD_BYTES * sum(len(part) for part in delta[2:])
+
+
+class TurnHistory:
+
+    """
+    Keyframe and delta encoded history of the recorded turns of a game.
+
+    Attributes:
+        keyframe_interval: A keyframe is stored every keyframe_interval turns,
+            bounding the deltas replayed to reach any turn.
+        max_bytes: Memory ceiling; the oldest turns are dropped beyond it.
+        entries: List of [turn, is_keyframe, state or delta, bytes], oldest first.
+        bytes: Estimated memory used by the entries.
+    """
+
+    def __init__(self, keyframe_interval=10, max_bytes=16 * 1024 * 1024):
+        self.keyframe_interval = keyframe_interval
+        self.max_bytes = max_bytes
+        self.entries = []
+        self.bytes = 0
+        self.last = None  # Full state of the newest entry, for the next delta.
+
+    def __len__(self):
+        return len(self.entries)
+
+    def turns(self):
+        """Return the recorded turn numbers, oldest first."""
+        return [entry[0] for entry in self.entries]
+
+    def record(self, game):
+        """
+        Record the current state of game under its turn number.
+        Recording a turn that is not newer than the last one first discards
+        that turn and everything after it.
+        """
+        if self.entries and self.entries[-1][0] >= game.turn:
+            self._truncate(self._first_from(game.turn))
+
+        state = capture(game)
+        since_keyframe = 0
+        for entry in reversed(self.entries):
+            if entry[1]:
+                break
+            since_keyframe += 1
+
+        if self.last is None or since_keyframe + 1 >= self.keyframe_interval:
+            entry = [game.turn, True, state, state_bytes(state)]
+        else:
+            delta = diff(self.last, state)
+            entry = [game.turn, False, delta, delta_bytes(delta)]
+
+        self.entries.append(entry)
+        self.bytes += entry[3]
+        self.last = state
+        self._enforce_ceiling()
+
+    def state_at(self, turn):
+        """Return the captured state of a recorded turn."""
+        return self._materialize(self._index(turn))
+
+    def rewind(self, game, turn):
+        """
+        Restore game to a recorded turn. That turn and all later ones are
+        discarded, since they are replayed from there.
+        """
+        index = self._index(turn)
+        restore(game, self._materialize(index))
+        self._truncate(index)
+
+    def undo(self, game):
+        """Restore game to the newest recorded turn. Returns False if there is none."""
+        if not self.entries:
+            return False
+        self.rewind(game, self.entries[-1][0])
+        return True
+
+    def _first_from(self, turn):
+        # Index of the first entry recorded at or after turn; turns only increase.
+        return bisect_left(self.entries, turn, key=lambda entry: entry[0])
+
+    def _index(self, turn):
+        index = self._first_from(turn)
+        if index == len(self.entries) or self.entries[index][0] != turn:
+            raise KeyError(f"Turn {turn} is not in the history.")
+        return index
+
+    def _materialize(self, index):
+        start = index
+        while not self.entries[start][1]:
+            start -= 1
+        state = self.entries[start][2]
+        for entry in self.entries[start + 1:index + 1]:
+            state = apply(state, entry[2])
+        return state
+
+    def _truncate(self, index):
+        for entry in self.entries[index:]:
+            self.bytes -= entry[3]
+        del self.entries[index:]
+        self.last = self._materialize(index - 1) if self.entries else None
+
+    def _enforce_ceiling(self):
+        # Drop the oldest turns, turning the next one into a keyframe when needed.
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            oldest, following = self.entries[0], self.entries[1]
+            if not following[1]:
+                state = apply(oldest[2], following[2])
+                self.bytes += state_bytes(state) - following[3]
+                self.entries[1] = [following[0], True, state, state_bytes(state)]
+            self.bytes -= oldest[3]
+            del self.entries[0]
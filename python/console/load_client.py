@@ -0,0 +1,123 @@
+"""
+load_client.py
+
+This module is a local load generator for server.py. It opens many concurrent
+connections, each playing its own game: it places a few random towers and then
+ends turns until the game is over, pausing between commands like a player
+would. Once every game has finished or failed it reports how many sessions were
+open at once, commands per second, and p50 / p99 reply latency.
+
+Run with: python load_client.py --port 8023 --sessions 2000 --think 0.5
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from server import PROMPT
+
+PROMPT_BYTES = PROMPT.encode()
+
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an already sorted list, or 0.0 if it is empty."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LoadStats:
+
+    """
+    Results gathered from every client.
+
+    Attributes:
+        latencies: Seconds between sending a line and receiving its whole reply.
+        open: Connections open right now.
+        peak: Most connections open at once.
+        finished: Games played until the server ended them.
+        failed: Connections that could not be opened or broke off.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.open = 0
+        self.peak = 0
+        self.finished = 0
+        self.failed = 0
+
+
+async def play(host, port, stats, rng, think, towers, start):
+    # Play one game over one connection.
+    await start.wait()
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.failed += 1
+        return
+
+    stats.open += 1
+    stats.peak = max(stats.peak, stats.open)
+    commands = [
+        f"place {rng.choice(('arrow', 'cannon'))} {rng.randint(1, 3)} {rng.randint(1, 6)}"
+        for _ in range(towers)
+    ]
+    try:
+        await reader.readuntil(PROMPT_BYTES)
+        while True:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+            line = commands.pop() if commands else "end"
+            sent = time.perf_counter()
+            writer.write(line.encode() + b"\n")
+            try:
+                await reader.readuntil(PROMPT_BYTES)
+            except asyncio.IncompleteReadError:
+                # The server closes the connection once the game is over.
+                stats.latencies.append(time.perf_counter() - sent)
+                stats.finished += 1
+                return
+            stats.latencies.append(time.perf_counter() - sent)
+    except (OSError, asyncio.LimitOverrunError):
+        stats.failed += 1
+    finally:
+        stats.open -= 1
+        writer.close()
+
+
+async def run_load(host, port, sessions, think, towers, seed):
+    """Play sessions games at once and return the LoadStats and the seconds taken."""
+    stats = LoadStats()
+    rng = random.Random(seed)
+    start = asyncio.Event()
+    clients = [
+        asyncio.create_task(play(host, port, stats, random.Random(rng.getrandbits(32)), think, towers, start))
+        for _ in range(sessions)
+    ]
+    started = time.perf_counter()
+    start.set()
+    await asyncio.gather(*clients)
+    return stats, time.perf_counter() - started
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the console game server.")
+    parser.add_argument("--host", default="127.0.0.1", help="Server address (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8023, help="Server port (default: 8023).")
+    parser.add_argument("--sessions", type=int, default=1000, help="Concurrent games (default: 1000).")
+    parser.add_argument("--think", type=float, default=0.5,
+                        help="Average seconds between a player's commands (default: 0.5).")
+    parser.add_argument("--towers", type=int, default=3, help="Towers each player tries to place (default: 3).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    stats, elapsed = asyncio.run(run_load(args.host, args.port, args.sessions, args.think, args.towers, args.seed))
+    latencies = sorted(stats.latencies)
+    print(f"{args.sessions} sessions, {stats.peak} open at once, {stats.finished} games finished, "
+          f"{stats.failed} failed in {elapsed:.1f} s")
+    print(f"{len(latencies)} commands, {len(latencies) / elapsed:.0f} per second, "
+          f"p50 {percentile(latencies, 0.50) * 1000:.2f} ms, p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
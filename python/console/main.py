@@ -1,4 +1,57 @@
+import argparse
+import contextlib
+import os
+import sys
+
+from game.commands import ScriptError, parse_script
 from game.game import Game
+from game.savefile import SaveFormatError, load
+
+# Where a quit game is saved and resumed from.
+SAVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "savegame.tds")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Text-based tower defense.")
+    parser.add_argument("--script", metavar="FILE",
+                        help="Play the commands in FILE ('-' for stdin) instead of prompting.")
+    parser.add_argument("--quiet", action="store_true", help="Print only the final result.")
+    parser.add_argument("--seed", type=int, help="Seed the monster waves for reproducible runs.")
+    return parser.parse_args()
+
+
+def play_script(args):
+    # Scripted games never prompt and never touch the interactive save.
+    if args.script == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.script) as script:
+            text = script.read()
+    try:
+        commands = parse_script(text)
+    except ScriptError as exc:
+        sys.exit(f"Script error: {exc}")
+
+    game = Game(args.seed)
+    game.commands = iter(commands)
+    if args.quiet:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            game.run()
+    else:
+        game.run()
+    print(f"Turn {game.turn}, wave {min(game.wave, game.max_waves)}, lives {game.lives}, gold {game.gold}")
+
 
 if __name__ == "__main__":
-    Game().run()
+    args = parse_args()
+
+    if args.script:
+        play_script(args)
+    else:
+        game = None
+        if os.path.exists(SAVE_PATH) and input("Resume the saved game? (y/n): ").strip().lower() == "y":
+            try:
+                game = load(SAVE_PATH)
+            except (OSError, SaveFormatError) as exc:
+                print(f"Could not resume the saved game: {exc}")
+        (game or Game(args.seed)).run(SAVE_PATH)
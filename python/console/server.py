@@ -0,0 +1,219 @@
+"""
+server.py
+
+Hosts many console tower defense games over TCP in a single asyncio event loop,
+one game per connection. Connect with telnet or netcat and type the script
+commands (see game/commands.py), several per line if separated by semicolons:
+
+    place arrow 2 4; place cannon 1 3; end
+
+Games never block: every line is applied to the session's Game in one go and
+whatever the game prints is buffered and sent back as a single write, followed
+by the prompt. Connections that stay quiet for too long are closed.
+
+Run with: python server.py --port 8023
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from game.commands import ScriptError, parse_script
+from game.game import Game
+
+# Sent after every reply; clients wait for it before sending the next line.
+PROMPT = "\ntd> "
+
+# Longest accepted input line, in bytes.
+MAX_LINE = 1024
+
+HELP = """Commands, several per line if separated by ';':
+  place <arrow|cannon> <lane> <column>   Place a tower (lane and column start at 1).
+  end                                    Finish placing towers and resolve the turn.
+  undo                                   Undo the previous turn.
+  board                                  Show the board again.
+  help                                   Show this help.
+  exit                                   Leave the game."""
+
+
+class Session:
+
+    """
+    One connected player and their game.
+
+    Attributes:
+        game: The player's Game.
+        writer: asyncio StreamWriter of the connection.
+        last_active: time.monotonic() of the last line received.
+        lines: Lines received so far, for error messages.
+    """
+
+    def __init__(self, writer):
+        self.game = Game()
+        self.writer = writer
+        self.last_active = time.monotonic()
+        self.lines = 0
+
+    def start(self):
+        # Spawn the first wave and return the opening screen.
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            print("\n TEXT-BASED TOWER DEFENSE ")
+            print("Type 'help' for the commands.")
+            self.game.spawn_wave()
+            self.game.show_turn()
+            print(f"Gold: {self.game.gold}")
+        return out.getvalue()
+
+    def handle(self, line):
+        # Apply one line of commands. Returns the text to send back and whether
+        # the session goes on.
+        self.lines += 1
+        # The game prints as it goes; nothing awaits in here, so redirecting
+        # stdout cannot leak into another session's output.
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            keep = self.apply(line)
+        return out.getvalue(), keep
+
+    def apply(self, line):
+        game = self.game
+        words = line.split("#", 1)[0].split()
+        if words == ["help"]:
+            print(HELP)
+            return True
+        if words == ["board"]:
+            game.show_turn()
+            print(f"Gold: {game.gold}")
+            return True
+
+        try:
+            commands = parse_script(line, first_line=self.lines)
+        except ScriptError as exc:
+            print(exc)
+            return True
+
+        for command in commands:
+            name = command[0]
+            if name == "exit":
+                print("Thanks for playing!")
+                return False
+            if name == "undo":
+                if not game.history.undo(game):
+                    print("Nothing to undo.")
+                game.show_turn()
+            elif name == "end":
+                game.resolve_turn()
+                if game.is_over():
+                    game.show_result()
+                    return False
+                if not game.board.monsters:
+                    game.spawn_wave()
+                game.show_turn()
+            else:
+                game.buy_tower(*command[1:])
+        print(f"Gold: {game.gold}")
+        return True
+
+
+class GameServer:
+
+    """
+    Accepts connections and runs a Session for each.
+
+    Attributes:
+        idle_timeout: Seconds a connection may stay quiet before it is closed.
+        max_sessions: Most sessions at once; further connections are turned away.
+        sessions: The connected sessions.
+        served: Sessions accepted since the server started.
+    """
+
+    def __init__(self, idle_timeout=300.0, max_sessions=10000):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sessions = set()
+        self.served = 0
+
+    async def send(self, writer, text):
+        writer.write(text.encode())
+        # Wait for slow readers instead of buffering without bound.
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b"Server full, try again later.\n")
+            writer.close()
+            return
+
+        session = Session(writer)
+        self.sessions.add(session)
+        self.served += 1
+        try:
+            await self.send(writer, session.start() + PROMPT)
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                session.last_active = time.monotonic()
+                text, keep = session.handle(line.decode(errors="replace"))
+                await self.send(writer, text + PROMPT if keep else text)
+                if not keep:
+                    break
+        except (ConnectionError, ValueError):
+            # Dropped connection, or a line longer than MAX_LINE.
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+    async def reap_idle(self):
+        # Close quiet connections; their handlers then see end of file and clean up.
+        while True:
+            await asyncio.sleep(min(self.idle_timeout / 4, 5.0))
+            cutoff = time.monotonic() - self.idle_timeout
+            for session in [s for s in self.sessions if s.last_active < cutoff]:
+                session.writer.write(b"\nIdle timeout, goodbye.\n")
+                session.writer.close()
+
+    async def report(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            print(f"{len(self.sessions)} sessions, {self.served} served")
+
+    async def serve(self, host, port, report=0.0):
+        server = await asyncio.start_server(
+            self.handle_connection, host, port, limit=MAX_LINE, backlog=4096
+        )
+        tasks = [asyncio.create_task(self.reap_idle())]
+        if report:
+            tasks.append(asyncio.create_task(self.report(report)))
+        names = ", ".join(str(sock.getsockname()[:2]) for sock in server.sockets)
+        print(f"Serving tower defense on {names}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Host console tower defense games over TCP.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8023, help="Port to listen on (default: 8023).")
+    parser.add_argument("--idle-timeout", type=float, default=300.0,
+                        help="Close connections quiet for this many seconds (default: 300).")
+    parser.add_argument("--max-sessions", type=int, default=10000,
+                        help="Most concurrent sessions (default: 10000).")
+    parser.add_argument("--report", type=float, default=0.0, metavar="SECONDS",
+                        help="Print the session count every SECONDS (default: off).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = GameServer(args.idle_timeout, args.max_sessions)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.report))
+    except KeyboardInterrupt:
+        pass
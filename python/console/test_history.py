@@ -0,0 +1,59 @@
+"""
+test_history.py
+
+Checks that undoing a turn and playing it again reproduces the same turn,
+including the wave spawned after it, which depends on the game's random
+generator.
+
+Run with: python -m pytest test_history.py
+"""
+
+import pytest
+
+from entities.towers import ArrowTower
+from game.game import Game
+
+
+def step(game):
+    """Resolve a turn and spawn the next wave if the board was cleared, as Game.run does."""
+    game.resolve_turn()
+    if not game.is_over() and not game.board.monsters:
+        game.spawn_wave()
+
+
+def snapshot(game):
+    """Return everything a turn can change."""
+    return (
+        game.gold, game.lives, game.turn, game.wave,
+        game.monsters_killed, game.monsters_escaped, game.rng.getstate(),
+        [(type(monster), lane, monster.position, monster.hp) for monster, lane in game.board.monsters],
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_undo_then_replay_reproduces_turn(seed):
+    game = Game(seed)
+    game.spawn_wave()
+    for lane in range(game.board.lanes):
+        game.place_tower_at(ArrowTower(), lane, 1)
+
+    waves = set()
+    while not game.is_over():
+        step(game)
+        expected = snapshot(game)
+        assert game.history.undo(game)
+        step(game)
+        assert snapshot(game) == expected
+        waves.add(game.wave)
+    # Several waves were spawned after an undo.
+    assert len(waves) > 2
+
+
+def test_undo_restores_generator():
+    game = Game(1)
+    game.spawn_wave()
+    state = game.rng.getstate()
+    game.resolve_turn()
+    game.rng.random()
+    game.history.undo(game)
+    assert game.rng.getstate() == state
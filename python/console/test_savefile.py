@@ -0,0 +1,66 @@
+"""
+test_savefile.py
+
+Checks that a saved and resumed game is the game that was saved: counters,
+random generator, tower stats and monsters, including fractional speeds.
+
+Run with: python -m pytest test_savefile.py
+"""
+
+from entities.towers import ArrowTower, CannonTower
+from game.game import Game
+from game.savefile import MAGIC, load, save
+
+
+def snapshot(game):
+    """Return the state a save must keep."""
+    return (
+        game.board.lanes, game.board.width, game.gold, game.lives, game.turn, game.wave,
+        game.max_waves, game.monsters_killed, game.monsters_escaped, game.board.next_uid,
+        game.rng.getstate(),
+        {cell: (type(tower), tower.targeting, tower.cost, tower.damage, tower.range, tower.splash)
+         for cell, tower in game.board.towers.items()},
+        [(monster.uid, type(monster), lane, monster.position, monster.hp, monster.max_hp, monster.speed)
+         for monster, lane in game.board.monsters],
+    )
+
+
+def test_save_and_load_round_trip(tmp_path):
+    game = Game(7)
+    game.spawn_wave()
+    game.place_tower_at(ArrowTower(), 0, 2)
+    game.place_tower_at(CannonTower(), 1, 3)
+    game.board.towers[(0, 2)].damage = 13
+    game.resolve_turn()
+
+    path = str(tmp_path / "savegame.tds")
+    save(game, path)
+    with open(path, "rb") as saved:
+        assert saved.read(4) == MAGIC
+    loaded = load(path)
+    assert snapshot(loaded) == snapshot(game)
+
+    # Both games spawn the same next wave.
+    for resumed in (game, loaded):
+        resumed.board.monsters = []
+        resumed.spawn_wave()
+    assert snapshot(loaded) == snapshot(game)
+
+
+def test_fractional_speed_round_trip(tmp_path):
+    game = Game(3)
+    game.spawn_wave()
+    monster, _ = game.board.monsters[0]
+    monster.speed = 1.5
+    monster.move()
+
+    path = str(tmp_path / "savegame.tds")
+    save(game, path)
+    loaded = load(path)
+    resumed, _ = loaded.board.monsters[0]
+    assert resumed.speed == 1.5
+    assert resumed.position == 1.5
+
+    resumed.move()
+    monster.move()
+    assert resumed.position == monster.position == 3
@@ -0,0 +1,230 @@
+"""
+api.py
+
+This module defines a Flask web API that hosts many server-side Tower Defense games
+at once. Every game runs on the same engine as the Tkinter GUI (game/game.py) and
+lives in an actor inside a GamePool, which serializes the commands of each game,
+caps the memory a game may use, and snapshots idle games to disk.
+"""
+
+import os
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+from entities.rules import TOWER_RULES
+from entities.towers import TOWER_CLASSES
+from game.actors import GamePool, GameLimitError, UnknownGameError
+
+# Create the Flask application instance
+app = Flask(__name__)
+
+# Tower types that can be placed through the API.
+TOWER_TYPES = {rule.key: TOWER_CLASSES[rule.id] for rule in TOWER_RULES}
+
+# Largest board a client may request.
+MAX_LANES = 20
+MAX_WIDTH = 40
+
+# Seconds between sweeps that snapshot idle games.
+EVICTION_INTERVAL = 30
+
+pool = GamePool(
+    os.environ.get("TD_SNAPSHOT_DIR", os.path.join(app.root_path, "snapshots")),
+    max_resident=int(os.environ.get("TD_MAX_RESIDENT", 10000)),
+    idle_timeout=float(os.environ.get("TD_IDLE_TIMEOUT", 300))
+)
+
+
+def run_evictions():
+    """
+    Periodically snapshot games that have been idle for too long.
+    """
+    while True:
+        time.sleep(EVICTION_INTERVAL)
+        pool.evict_idle()
+
+
+threading.Thread(target=run_evictions, daemon=True).start()
+
+
+def game_state(game):
+    """
+    Build the JSON-ready state of a game.
+
+    :param game: Game instance.
+    :return: Dictionary describing the board and the player's resources.
+    """
+    return {
+        "status": game.status(),
+        "gold": game.gold,
+        "lives": game.lives,
+        "wave": game.wave,
+        "max_waves": game.max_waves,
+        "turn": game.turn,
+        "lanes": game.board.lanes,
+        "width": game.board.width,
+        "towers": [
+            {"lane": lane, "col": col, "name": tower.name, "targeting": tower.targeting}
+            for (lane, col), tower in game.board.towers.items()
+        ],
+        "monsters": [
+            {"lane": lane, "position": monster.position, "name": monster.name, "hp": monster.hp}
+            for monster, lane in game.board.monsters
+        ],
+    }
+
+
+def error(message, status):
+    """
+    Build a JSON error response.
+    """
+    return jsonify({"error": message}), status
+
+
+@app.errorhandler(UnknownGameError)
+def unknown_game(exc):
+    """
+    Answer requests for games that do not exist.
+    """
+    return error("Unknown game.", 404)
+
+
+@app.errorhandler(GameLimitError)
+def game_too_large(exc):
+    """
+    Answer requests whose game went over the per-game memory cap.
+    """
+    return error(str(exc), 413)
+
+
+@app.route("/games", methods=["POST"])
+def create_game():
+    """
+    Start a new game. Optional JSON body: {"lanes": int, "width": int}.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        lanes = int(data.get("lanes", 3))
+        width = int(data.get("width", 6))
+    except (TypeError, ValueError):
+        return error("Lanes and width must be integers.", 400)
+
+    if not (1 <= lanes <= MAX_LANES and 1 <= width <= MAX_WIDTH):
+        return error(f"Boards are limited to {MAX_LANES} lanes and width {MAX_WIDTH}.", 400)
+
+    actor = pool.create(lanes, width)
+    state = pool.run(actor.game_id, game_state)
+    return jsonify(dict(state, id=actor.game_id)), 201
+
+
+@app.route("/games/<game_id>", methods=["GET"])
+def get_game(game_id):
+    """
+    Return the current state of a game.
+    """
+    return jsonify(pool.run(game_id, game_state))
+
+
+@app.route("/games/<game_id>", methods=["DELETE"])
+def delete_game(game_id):
+    """
+    Remove a game from the server.
+    """
+    pool.remove(game_id)
+    return "", 204
+
+
+@app.route("/games/<game_id>/towers", methods=["POST"])
+def place_tower(game_id):
+    """
+    Place a tower. JSON body: {"type": "arrow" | "cannon", "lane": int, "col": int}
+    and optionally "targeting", one of the tower's strategies. Lanes and columns are zero-based.
+    """
+    data = request.get_json(silent=True) or {}
+    tower_class = TOWER_TYPES.get(data.get("type"))
+    if tower_class is None:
+        return error("Unknown tower type.", 400)
+
+    try:
+        lane = int(data["lane"])
+        col = int(data["col"])
+    except (KeyError, TypeError, ValueError):
+        return error("Lane and col must be integers.", 400)
+
+    tower = tower_class()
+    targeting = data.get("targeting", tower.targeting)
+    if targeting not in tower.strategies():
+        return error(f"Targeting must be one of: {', '.join(tower.strategies())}.", 400)
+    tower.targeting = targeting
+
+    def place(game):
+        if game.status() != "playing":
+            return None
+        if not game.place_tower_at(tower, lane, col):
+            return None
+        return game_state(game)
+
+    state = pool.run(game_id, place)
+    if state is None:
+        return error("Tower cannot be placed there.", 409)
+    return jsonify(state)
+
+
+@app.route("/games/<game_id>/towers", methods=["PATCH"])
+def retarget_tower(game_id):
+    """
+    Change the targeting strategy of a placed tower.
+    JSON body: {"lane": int, "col": int, "targeting": str}.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        cell = (int(data["lane"]), int(data["col"]))
+    except (KeyError, TypeError, ValueError):
+        return error("Lane and col must be integers.", 400)
+    targeting = data.get("targeting")
+
+    def retarget(game):
+        tower = game.board.towers.get(cell)
+        if tower is None:
+            return "No tower there.", 404
+        if targeting not in tower.strategies():
+            return f"Targeting must be one of: {', '.join(tower.strategies())}.", 400
+        game.board.set_targeting(*cell, targeting)
+        return game_state(game), 200
+
+    result, status = pool.run(game_id, retarget)
+    if status != 200:
+        return error(result, status)
+    return jsonify(result)
+
+
+@app.route("/games/<game_id>/end-turn", methods=["POST"])
+def end_turn(game_id):
+    """
+    Resolve one turn and return the new state.
+    """
+    def advance(game):
+        if game.status() != "playing":
+            return None
+        game.end_turn()
+        return game_state(game)
+
+    state = pool.run(game_id, advance)
+    if state is None:
+        return error("Game is already finished.", 409)
+    return jsonify(state)
+
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    """
+    Return how many games are resident in memory and snapshotted.
+    """
+    return jsonify(pool.stats())
+
+
+# Run the Flask development server
+if __name__ == "__main__":
+    app.run(threaded=True)
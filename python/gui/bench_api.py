@@ -0,0 +1,116 @@
+"""
+bench_api.py
+
+This module benchmarks the Tower Defense web API (api.py) in a single process.
+Worker threads each play a share of the games through Flask's test client,
+placing towers and ending turns until every game finishes, and the script
+reports request throughput, latency percentiles and the memory used per
+resident game, which gives the number of concurrent games one process can hold.
+
+Run with: python bench_api.py --games 2000 --threads 8
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+import tracemalloc
+
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def play_games(client, count, max_turns, rng, latencies):
+    """Create and play a number of games, recording the latency of every request."""
+    def timed(method, url, **kwargs):
+        started = time.perf_counter()
+        response = method(url, **kwargs)
+        latencies.append(time.perf_counter() - started)
+        return response
+
+    game_ids = [timed(client.post, "/games").get_json()["id"] for _ in range(count)]
+
+    # Interleave the games so many are active at the same time.
+    active = list(game_ids)
+    for _ in range(max_turns):
+        if not active:
+            break
+        still_active = []
+        for game_id in active:
+            timed(client.post, f"/games/{game_id}/towers", json={
+                "type": rng.choice(["arrow", "cannon"]),
+                "lane": rng.randrange(3),
+                "col": rng.randrange(6),
+            })
+            state = timed(client.post, f"/games/{game_id}/end-turn").get_json()
+            if state.get("status") == "playing":
+                still_active.append(game_id)
+        active = still_active
+
+
+def measure_game_memory(pool, count):
+    """Return the traced memory per resident game after creating count games."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    actors = [pool.create() for _ in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    for actor in actors:
+        pool.remove(actor.game_id)
+    return used / count
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Tower Defense web API.")
+    parser.add_argument("--games", type=int, default=1000, help="Total games to play (default: 1000).")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent client threads (default: 8).")
+    parser.add_argument("--turns", type=int, default=200, help="Turn limit per game (default: 200).")
+    parser.add_argument("--memory-budget", type=int, default=1024,
+                        help="Memory budget in MB used to estimate games per process (default: 1024).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    # Keep benchmark snapshots out of the real snapshot directory.
+    os.environ.setdefault("TD_SNAPSHOT_DIR", tempfile.mkdtemp(prefix="td-bench-"))
+    from api import app, pool
+
+    per_game = measure_game_memory(pool, 1000)
+
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(index, count):
+        local = []
+        play_games(app.test_client(), count, args.turns, random.Random(index), local)
+        with lock:
+            latencies.extend(local)
+
+    shares = [args.games // args.threads + (1 if i < args.games % args.threads else 0)
+              for i in range(args.threads)]
+    threads = [threading.Thread(target=worker, args=(i, share)) for i, share in enumerate(shares)]
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"games played:         {args.games} on {args.threads} threads")
+    print(f"requests:             {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} req/s)")
+    print(f"latency p50 / p99:    {percentile(latencies, 0.5) * 1000:.3f} / "
+          f"{percentile(latencies, 0.99) * 1000:.3f} ms")
+    print(f"memory per game:      {per_game:.0f} bytes")
+    print(f"games per {args.memory_budget} MB:     {int(args.memory_budget * 1024 * 1024 / per_game)}")
+    print(f"pool:                 {pool.stats()}")
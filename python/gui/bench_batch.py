@@ -0,0 +1,130 @@
+"""
+bench_batch.py
+
+This module benchmarks the lockstep batch simulator (game/batch.py) against
+stepping Game objects one by one. Every game follows a random placement plan
+(an attempted tower placement on some turns), played to the end. The script
+reports games per hour for both, and replays the Game runs in a batch that
+draws its waves from the same per-game generators to check that every game
+ends in exactly the same state.
+
+Run with: python bench_batch.py --games 2000 --batch 200000
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from entities.rules import GOBLIN, OGRE
+from entities.towers import TOWER_CLASSES
+from game.batch import BatchGame, LOST, PLAYING, WON
+from game.game import Game, OGRE_WAVE
+
+STATUS = {"playing": PLAYING, "won": WON, "lost": LOST}
+
+# Turns covered by a placement plan; later turns place nothing.
+PLAN_TURNS = 40
+
+
+class MatchedBatch(BatchGame):
+
+    """BatchGame drawing each game's waves from the generator Game(seed=seed) would use."""
+
+    def __init__(self, seeds, lanes=3, width=6):
+        self.rngs = [random.Random(seed) for seed in seeds]
+        super().__init__(len(seeds), lanes, width)
+
+    def wave_types(self, games):
+        kinds = np.full((len(games), self.lanes), GOBLIN, dtype=np.int64)
+        for row, game in enumerate(games):
+            if self.wave[game] >= OGRE_WAVE:
+                kinds[row] = [self.rngs[game].choice((GOBLIN, OGRE)) for _ in range(self.lanes)]
+        return kinds
+
+
+def make_plan(games, lanes, width, seed):
+    """Return (attempt, type_ids, lanes, cols) arrays of shape (games, PLAN_TURNS)."""
+    rng = np.random.default_rng(seed)
+    shape = (games, PLAN_TURNS)
+    return (
+        rng.random(shape) < 0.3,
+        rng.integers(0, len(TOWER_CLASSES), shape),
+        rng.integers(0, lanes, shape),
+        rng.integers(0, width, shape),
+    )
+
+
+def play_games(seeds, plan, lanes, width):
+    """Play one Game per seed following the plan. Returns their final states."""
+    attempt, type_ids, tower_lanes, cols = plan
+    results = []
+    for index, seed in enumerate(seeds):
+        game = Game(lanes, width, seed=seed, log=None)
+        status = "playing"
+        while status == "playing":
+            turn = game.turn - 1
+            if turn < PLAN_TURNS and attempt[index, turn]:
+                tower = TOWER_CLASSES[type_ids[index, turn]]()
+                game.place_tower_at(tower, int(tower_lanes[index, turn]), int(cols[index, turn]))
+            status = game.end_turn()
+        results.append((STATUS[status], game.gold, game.lives, game.wave, game.turn,
+                        game.monsters_killed, game.monsters_escaped))
+    return results
+
+
+def play_batch(batch, plan):
+    """Play a BatchGame to the end following the plan."""
+    attempt, type_ids, tower_lanes, cols = plan
+    turn = 0
+    while batch.playing().any():
+        if turn < PLAN_TURNS:
+            games = np.flatnonzero(batch.playing() & attempt[:, turn])
+            batch.place(games, type_ids[games, turn], tower_lanes[games, turn], cols[games, turn])
+        batch.end_turn()
+        turn += 1
+
+
+def batch_results(batch):
+    return list(zip(
+        batch.status.tolist(), batch.gold.tolist(), batch.lives.tolist(), batch.wave.tolist(),
+        batch.turn.tolist(), batch.monsters_killed.tolist(), batch.monsters_escaped.tolist()
+    ))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the lockstep batch simulator.")
+    parser.add_argument("--games", type=int, default=2000, help="Games played with Game objects (default: 2000).")
+    parser.add_argument("--batch", type=int, default=200000, help="Games in the timed batch (default: 200000).")
+    parser.add_argument("--lanes", type=int, default=3, help="Board lanes (default: 3).")
+    parser.add_argument("--width", type=int, default=6, help="Board width (default: 6).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    seeds = [args.seed * 1000003 + index for index in range(args.games)]
+
+    plan = make_plan(args.games, args.lanes, args.width, args.seed)
+    started = time.perf_counter()
+    expected = play_games(seeds, plan, args.lanes, args.width)
+    serial = time.perf_counter() - started
+
+    matched = MatchedBatch(seeds, args.lanes, args.width)
+    play_batch(matched, plan)
+    mismatches = sum(a != b for a, b in zip(expected, batch_results(matched)))
+
+    batch = BatchGame(args.batch, args.lanes, args.width, seed=args.seed)
+    big_plan = make_plan(args.batch, args.lanes, args.width, args.seed + 1)
+    started = time.perf_counter()
+    play_batch(batch, big_plan)
+    batched = time.perf_counter() - started
+
+    print(f"Game objects: {args.games} games in {serial:.2f} s, {args.games / serial * 3600:,.0f} games per hour")
+    print(f"BatchGame:    {args.batch} games in {batched:.2f} s, {args.batch / batched * 3600:,.0f} games per hour "
+          f"({serial / args.games / (batched / args.batch):.0f}x)")
+    print(f"won {np.mean(batch.status == WON):.1%}, lost {np.mean(batch.status == LOST):.1%}, "
+          f"{int(batch.turn.max()) - 1} turns for the longest game")
+    print(f"mismatches against Game: {mismatches} of {args.games} games")
@@ -0,0 +1,66 @@
+"""
+bench_pool.py
+
+This module measures monster allocations in a long simulation. A wide board is
+played for many waves with towers on every lane, and the script reports how many
+monsters the pool had to create versus reuse per turn, and how often the garbage
+collector ran, once the game reaches a steady state.
+
+Run with: python bench_pool.py --lanes 2000 --turns 300
+Add --telemetry run.tdt to stream per-turn telemetry of the run to a file.
+"""
+
+import argparse
+import gc
+import time
+
+from entities.towers import ArrowTower, CannonTower
+from game.game import Game
+from game.telemetry import TelemetryWriter
+
+
+def collections():
+    """Return the total number of garbage collections run so far."""
+    return sum(generation["collections"] for generation in gc.get_stats())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure monster allocations per turn.")
+    parser.add_argument("--lanes", type=int, default=2000, help="Board lanes (default: 2000).")
+    parser.add_argument("--width", type=int, default=8, help="Board width (default: 8).")
+    parser.add_argument("--turns", type=int, default=300, help="Turns to play (default: 300).")
+    parser.add_argument("--warmup", type=int, default=20, help="Turns before measuring (default: 20).")
+    parser.add_argument("--telemetry", metavar="PATH", help="Write per-turn telemetry to PATH.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    game = Game(args.lanes, args.width, log=None)
+    game.max_waves = args.turns * 2
+    for lane in range(args.lanes):
+        game.board.add_tower(lane, 1, ArrowTower())
+        game.board.add_tower(lane, args.width - 2, CannonTower())
+    if args.telemetry:
+        game.telemetry = TelemetryWriter(args.telemetry, args.lanes)
+
+    for _ in range(args.warmup):
+        game.end_turn()
+
+    pool = game.board.pool
+    created, reused, collected = pool.created, pool.reused, collections()
+    started = time.perf_counter()
+    for _ in range(args.turns):
+        game.end_turn()
+    elapsed = time.perf_counter() - started
+    if game.telemetry is not None:
+        game.telemetry.close()
+
+    turns = args.turns
+    print(f"{args.lanes} lanes, {turns} turns after {args.warmup} warmup turns, wave {game.wave}")
+    print(f"monsters created per turn: {(pool.created - created) / turns:.2f}")
+    print(f"monsters reused per turn:  {(pool.reused - reused) / turns:.2f}")
+    print(f"gc collections per turn:   {(collections() - collected) / turns:.2f}")
+    print(f"time per turn:             {elapsed / turns * 1000:.2f} ms")
+    print(f"pool:                      {pool.stats()}")
@@ -0,0 +1,117 @@
+"""
+bench_shard.py
+
+This module benchmarks lane-sharded turn resolution (game/shard.py) on a wide board.
+The same seeded game is played serially and with each requested number of worker
+processes, and the script reports the time per turn, the speedup over the serial
+run, and whether every run ended in the same state. For the sharded runs it also
+reports how much of a turn the parent spent outside the workers (merging their
+results, spawning and bookkeeping), which bounds the speedup, and the time
+the workers spent resolving lanes, summed over the workers.
+
+Run with: python bench_shard.py --lanes 4000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import random
+import time
+
+from entities.monsters import Goblin, Ogre
+from entities.towers import ArrowTower, CannonTower
+from game.shard import LaneShards, ShardedGame
+
+
+def build_game(lanes, width, monsters_per_lane, seed, shards=None):
+    """Build a wide board with towers and monsters spread over every lane."""
+    rng = random.Random(seed)
+    game = ShardedGame(lanes, width, shards, seed=seed, log=None)
+    board = game.board
+
+    # Replace the constructor's wave, taking it off the movement schedule too.
+    for monster, _ in board.monsters:
+        board.remove_monster(monster)
+    del board.monsters[:]
+
+    for lane in range(lanes):
+        for col in range(2, width, 5):
+            board.add_tower(lane, col, rng.choice([ArrowTower, CannonTower])())
+        for _ in range(monsters_per_lane):
+            monster = rng.choice([Goblin, Ogre])()
+            monster.hp *= 10
+            monster.position = rng.randrange(width // 2)
+            board.add_monster(monster, lane)
+    return game
+
+
+def play(game, turns):
+    """
+    Play a number of turns with end_turn. Returns the elapsed time, the part of
+    it spent waiting for the workers and the time the workers spent in lanes, in
+    seconds (both 0 for a serial game).
+    """
+    shards = game.shards
+    waiting = working = 0.0
+    if shards is not None:
+        resolve = shards.turn
+
+        def timed_turn(*args):
+            nonlocal waiting, working
+            started = time.perf_counter()
+            result = resolve(*args)
+            waiting += time.perf_counter() - started
+            working += sum(result[-1]) / 1e9
+            return result
+
+        shards.turn = timed_turn
+    started = time.perf_counter()
+    for _ in range(turns):
+        game.end_turn()
+    elapsed = time.perf_counter() - started
+    if shards is not None:
+        del shards.turn
+    return elapsed, waiting, working
+
+
+def summary(game):
+    return (game.turn, game.wave, game.gold, game.lives, game.monsters_killed,
+            game.monsters_escaped, len(game.board.monsters), game.state_hash())
+
+
+def report(label, elapsed, turns):
+    print(f"{label}: {elapsed / turns * 1000:8.1f} ms/turn", end="")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark lane-sharded turn resolution.")
+    parser.add_argument("--lanes", type=int, default=4000, help="Board lanes (default: 4000).")
+    parser.add_argument("--width", type=int, default=60, help="Board width (default: 60).")
+    parser.add_argument("--monsters", type=int, default=10, help="Monsters per lane (default: 10).")
+    parser.add_argument("--turns", type=int, default=10, help="Turns to resolve (default: 10).")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1],
+                        help="Worker process counts to measure.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    serial = build_game(args.lanes, args.width, args.monsters, seed=0)
+    baseline, _, _ = play(serial, args.turns)
+    expected = summary(serial)
+    print(f"{args.lanes} lanes x {args.width} cells, {args.monsters} monsters per lane, "
+          f"{args.turns} turns, {os.cpu_count()} CPUs")
+    report("serial    ", baseline, args.turns)
+    print()
+
+    for workers in args.workers:
+        with LaneShards(workers, min_lanes=1) as shards:
+            game = build_game(args.lanes, args.width, args.monsters, seed=0, shards=shards)
+            # Start the worker processes before timing.
+            shards.turn(build_game(1, args.width, 0, seed=0))
+            elapsed, waiting, working = play(game, args.turns)
+            matches = "yes" if summary(game) == expected else "NO"
+        report(f"{workers:2d} workers", elapsed, args.turns)
+        print(f" (parent {(elapsed - waiting) / args.turns * 1000:6.1f} ms, "
+              f"in lanes {working / args.turns * 1000:6.1f} ms), "
+              f"speedup {baseline / elapsed:5.2f}x, matches serial: {matches}")
@@ -0,0 +1,132 @@
+"""
+bench_zobrist.py
+
+This module benchmarks the incremental state hash kept by Board and Game.
+It reports how much keeping the hash up to date adds to a turn, compares that
+with hashing the whole board from scratch, checks that the incremental hash
+always equals the from-scratch one, and counts collisions among many distinct
+states, both on the full 64 bits and on truncated keys where the number of
+collisions expected from the birthday bound is large enough to compare with.
+
+Run with: python bench_zobrist.py --lanes 2000 --turns 100 --states 200000
+"""
+
+import argparse
+import random
+import time
+
+from entities.towers import ArrowTower, CannonTower
+from game.board import Board
+from game.game import Game
+from game.zobrist import board_hash
+
+
+def build_game(lanes, width, seed):
+    game = Game(lanes, width, seed=seed, log=None)
+    game.max_waves = 10 ** 6
+    for lane in range(lanes):
+        game.board.add_tower(lane, 1, ArrowTower())
+        game.board.add_tower(lane, width - 2, CannonTower())
+    return game
+
+
+def time_turns(lanes, width, turns, seed, check):
+    """Return seconds per turn, and the number of turns whose hash disagreed with board_hash."""
+    game = build_game(lanes, width, seed)
+    mismatches = 0
+    elapsed = 0.0
+    for _ in range(turns):
+        started = time.perf_counter()
+        game.end_turn()
+        elapsed += time.perf_counter() - started
+        if check and game.board.hash != board_hash(game.board):
+            mismatches += 1
+    return elapsed / turns, mismatches, game
+
+
+def distinct_states(count, seed):
+    """
+    Yield (state, hash) for count random small games: their canonical state
+    tuple and their Game.state_hash. Random tower placements and turn counts
+    make most of the states differ.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        game = Game(3, 6, seed=rng.getrandbits(32), log=None)
+        for _ in range(rng.randint(0, 4)):
+            tower = rng.choice([ArrowTower, CannonTower])()
+            tower.targeting = rng.choice(tower.strategies())
+            game.place_tower_at(tower, rng.randrange(3), rng.randrange(6))
+        for _ in range(rng.randint(0, 6)):
+            game.end_turn()
+
+        board = game.board
+        state = (
+            game.gold, game.lives, game.wave, game.turn,
+            tuple(sorted((cell, tower.type_id, tower.targeting) for cell, tower in board.towers.items())),
+            tuple(sorted(
+                (lane, monster.position, monster.type_id, monster.hp, monster.speed, monster.next_move)
+                for monster, lane in board.monsters
+            )),
+        )
+        yield state, game.state_hash()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the incremental state hash.")
+    parser.add_argument("--lanes", type=int, default=2000, help="Board lanes for the overhead run (default: 2000).")
+    parser.add_argument("--width", type=int, default=8, help="Board width (default: 8).")
+    parser.add_argument("--turns", type=int, default=100, help="Turns timed (default: 100).")
+    parser.add_argument("--states", type=int, default=200000, help="Random states hashed for collisions (default: 200000).")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    hashed, mismatches, game = time_turns(args.lanes, args.width, args.turns, args.seed, check=True)
+
+    # Same turns with the per-monster updates switched off, for the overhead.
+    update_monster, update_monsters = Board.update_monster, Board.update_monsters
+    Board.update_monster = lambda board, monster: None
+    Board.update_monsters = lambda board, monsters: None
+    try:
+        plain, _, _ = time_turns(args.lanes, args.width, args.turns, args.seed, check=False)
+    finally:
+        Board.update_monster, Board.update_monsters = update_monster, update_monsters
+
+    started = time.perf_counter()
+    repeats = 10
+    for _ in range(repeats):
+        board_hash(game.board)
+    full = (time.perf_counter() - started) / repeats
+
+    seen = {}
+    collisions = 0
+    for state, key in distinct_states(args.states, args.seed):
+        other = seen.setdefault(key, state)
+        if other != state:
+            collisions += 1
+    keys = list(seen)
+
+    print(f"{args.lanes} lanes, {len(game.board.monsters)} monsters, {len(game.board.towers)} towers on the final board")
+    print(f"turn without hash updates:  {plain * 1000:.2f} ms")
+    print(f"turn with hash updates:     {hashed * 1000:.2f} ms ({(hashed - plain) / plain * 100:+.1f}%)")
+    print(f"hashing the board from scratch: {full * 1000:.2f} ms")
+    print(f"incremental hash mismatches: {mismatches} of {args.turns} turns")
+    print()
+    print(f"{len(keys)} distinct keys from {args.states} random states, 64-bit collisions: {collisions}")
+    print(f"{'bits':>5} {'collisions':>11} {'expected':>9}")
+    for bits in (16, 20, 24, 28, 32):
+        buckets = set()
+        truncated = 0
+        for key in keys:
+            low = key & ((1 << bits) - 1)
+            if low in buckets:
+                truncated += 1
+            buckets.add(low)
+        # Expected duplicates when n random keys fall into 2**bits buckets.
+        n, size = len(keys), 2 ** bits
+        expected = n - size * (1 - (1 - 1 / size) ** n)
+        print(f"{bits:>5} {truncated:>11} {expected:>9.1f}")
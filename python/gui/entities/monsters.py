@@ -1,30 +1,51 @@
 """
 This file contains all Monster classes for the text-based tower defense game.
+Monster stats come from the shared rule table (see rules.py).
 """
 
+from entities.rules import MONSTER_RULES, GOBLIN, OGRE
+
 class Monster:
 
     """
     Base class for all monsters in the game.
 
     Attributes:
+        type_id: Index of the monster's entry in MONSTER_RULES.
         name: The monster's name.
         symbol: Character symbol for display.
         hp: Hit points.
-        speed: Cells moved per turn.
+        max_hp: Hit points when spawned.
+        speed: Cells moved per turn, possibly fractional (e.g. 1.5).
+        base_speed: Speed when spawned.
         position: Current column position on the lane.
+        uid: Id unique on the board, set when the monster is added to it.
+        next_move: Turn in which the monster enters its next cell.
+        moved_from: (time, cell) at which the monster started moving at its
+            current speed. Both are maintained by the board's MovementScheduler.
+        lane: Lane the monster was added to.
+        key: The monster's share of the board hash.
     """
 
-    def __init__(self, name, symbol, hp, speed):
-        self.name = name
-        self.symbol = symbol
-        self.hp = hp
-        self.speed = speed
-        self.position = 0
+    def __init__(self, type_id):
+        rule = MONSTER_RULES[type_id]
+        self.type_id = type_id
+        self.name = rule.name
+        self.symbol = rule.symbol
+        self.max_hp = rule.hp
+        self.base_speed = rule.speed
+        self.reset()
 
-    def move(self):
-        # Move the monster forward based on speed.
-        self.position += self.speed
+    def reset(self):
+        # Return the monster to its freshly spawned state so it can be reused.
+        self.hp = self.max_hp
+        self.speed = self.base_speed
+        self.position = 0
+        self.uid = None
+        self.next_move = None
+        self.moved_from = None
+        self.lane = None
+        self.key = 0
 
     def take_damage(self, damage):
         # Reduce monster health by tower damage.
@@ -37,9 +58,12 @@ class Monster:
 class Goblin(Monster):
     # A fast, weak monster that inherits the Monster constructor.
     def __init__(self):
-        super().__init__("Goblin", "G", hp = 20, speed = 2)
+        super().__init__(GOBLIN)
 
 class Ogre(Monster):
     # A strong, slow monster that inherits the Monster constructor.
     def __init__(self):
-        super().__init__("Ogre", "O", hp = 40, speed = 1)
+        super().__init__(OGRE)
+
+# Monster classes indexed by type id.
+MONSTER_CLASSES = (Goblin, Ogre)
@@ -1,37 +1,61 @@
 """
 This file contains all Tower classes for the text-based tower defense game.
+Tower stats come from the shared rule table (see rules.py).
 """
 
+from entities.rules import TOWER_RULES, TARGETING, ARROW, CANNON
+
 class Tower:
 
     """
     Base class for all towers in the game.
 
     Attributes:
+        type_id: Index of the tower's entry in TOWER_RULES.
         name: Tower name.
         symbol: Symbol for display.
         cost: Gold cost to build.
         damage: Damage dealt to a monster.
         shot_range: Attack range in cells.
+        targeting: Strategy used to pick a target, one of TARGETING.
+        splash: Cells around the target that an area attack also hits.
     """
 
-    def __init__(self, name, symbol, cost, damage, shot_range):
-        self.name = name
-        self.symbol = symbol
-        self.cost = cost
-        self.damage = damage
-        self.range = shot_range
+    def __init__(self, type_id):
+        rule = TOWER_RULES[type_id]
+        self.type_id = type_id
+        self.name = rule.name
+        self.symbol = rule.symbol
+        self.cost = rule.cost
+        self.damage = rule.damage
+        self.range = rule.range
+        self.targeting = rule.targeting
+        self.splash = rule.splash
 
     def in_range(self, tower_col, monster_col):
         # Check if a monster is within range of the tower.
         return abs(tower_col - monster_col) <= self.range
 
+    def strategies(self):
+        # Targeting strategies this tower can use.
+        return [name for name in TARGETING if name != "splash" or self.splash > 0]
+
+    def cycle_targeting(self):
+        # Switch to the next available targeting strategy and return it.
+        strategies = self.strategies()
+        index = strategies.index(self.targeting) if self.targeting in strategies else -1
+        self.targeting = strategies[(index + 1) % len(strategies)]
+        return self.targeting
+
 class ArrowTower(Tower):
     # A basic, inexpensive tower with moderate range and damage.
     def __init__(self):
-        super().__init__("Arrow Tower", "T", cost = 50, damage = 10, shot_range = 2)
+        super().__init__(ARROW)
 
 class CannonTower(Tower):
-    # A strong, expensive tower with higher damage and same range as ArrowTower.
+    # A strong, expensive tower whose shells also hit monsters next to the target.
     def __init__(self):
-        super().__init__("Cannon Tower", "C", cost = 80, damage = 20, shot_range = 2)
+        super().__init__(CANNON)
+
+# Tower classes indexed by type id.
+TOWER_CLASSES = (ArrowTower, CannonTower)
@@ -0,0 +1,253 @@
+"""
+This file hosts many tower defense games in one process for the HTTP API.
+Each game lives in an actor that runs its commands one at a time, and a pool
+keeps the most recently used actors in memory while idle games are written to
+snapshot files and restored on their next request.
+"""
+
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from game.game import Game
+
+# Rough memory use of a game, its towers and its monsters, in bytes.
+BASE_GAME_BYTES = 1024
+TOWER_BYTES = 256
+MONSTER_BYTES = 256
+
+# Extension of snapshot files, named after their game id.
+SNAPSHOT_EXTENSION = ".pickle"
+
+
+class GameLimitError(Exception):
+    # Raised when a game grows beyond the pool's per-game memory cap.
+    pass
+
+class UnknownGameError(KeyError):
+    # Raised when a game id is neither in memory nor snapshotted.
+    pass
+
+class ActorClosed(Exception):
+    # Raised when a command reaches an actor whose game was snapshotted or removed.
+    pass
+
+
+def estimate_bytes(game):
+    """Estimate how much memory a game uses from its tower and monster counts."""
+    return (
+        BASE_GAME_BYTES
+        + TOWER_BYTES * len(game.board.towers)
+        + MONSTER_BYTES * len(game.board.monsters)
+    )
+
+
+class GameActor:
+
+    """
+    Owner of a single game. Commands sent to the actor are run one at a time.
+
+    Attributes:
+        game_id: Unique id of the game.
+        game: The Game being hosted.
+        last_used: Monotonic time of the last command.
+        closed: True once the game was snapshotted or removed from the pool.
+    """
+
+    def __init__(self, game_id, game):
+        self.game_id = game_id
+        self.game = game
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.closed = False
+
+    def call(self, command, *args):
+        """Run command(game, *args) with exclusive access to the game and return its result."""
+        with self.lock:
+            if self.closed:
+                raise ActorClosed(self.game_id)
+            self.last_used = time.monotonic()
+            return command(self.game, *args)
+
+    def close(self):
+        """Stop accepting commands, waiting for a running one to finish."""
+        with self.lock:
+            self.closed = True
+
+
+class GamePool:
+
+    """
+    In-memory pool of game actors with snapshotting of idle games.
+
+    Snapshot files are read and written outside the pool lock, so disk I/O for
+    one game never holds up the others. A game whose snapshot is being written
+    or read back is marked pending, and requests for it wait for that to finish.
+    Snapshots left in snapshot_dir by an earlier process are picked up again.
+
+    Attributes:
+        snapshot_dir: Directory holding snapshots of evicted games.
+        max_resident: Number of games kept in memory before the least recently
+            used ones are snapshotted.
+        idle_timeout: Seconds without a command before a game is snapshotted.
+        max_game_bytes: Estimated memory a single game may use.
+    """
+
+    def __init__(self, snapshot_dir, max_resident=10000, idle_timeout=300.0,
+                 max_game_bytes=256 * 1024):
+        self.snapshot_dir = snapshot_dir
+        self.max_resident = max_resident
+        self.idle_timeout = idle_timeout
+        self.max_game_bytes = max_game_bytes
+        self.lock = threading.Lock()
+        self.actors = OrderedDict()
+        # Game ids with a snapshot on disk, and ids whose snapshot is being
+        # written or read back, each with an event set once that is done.
+        self.evicted = set()
+        self.pending = {}
+        os.makedirs(snapshot_dir, exist_ok=True)
+        for name in os.listdir(snapshot_dir):
+            game_id, extension = os.path.splitext(name)
+            if extension == SNAPSHOT_EXTENSION:
+                self.evicted.add(game_id)
+
+    def snapshot_path(self, game_id):
+        return os.path.join(self.snapshot_dir, game_id + SNAPSHOT_EXTENSION)
+
+    def create(self, lanes=3, width=6):
+        """Start a new game and return its actor."""
+        # Hosted games have no terminal to log their hits to.
+        game = Game(lanes, width, log=None)
+        if estimate_bytes(game) > self.max_game_bytes:
+            raise GameLimitError("Board too large for the per-game memory cap.")
+
+        actor = GameActor(uuid.uuid4().hex, game)
+        with self.lock:
+            self.actors[actor.game_id] = actor
+            overflow = self._take_overflow()
+        self._write_snapshots(overflow)
+        return actor
+
+    def get(self, game_id):
+        """Return the actor for a game, restoring it from its snapshot if needed."""
+        while True:
+            with self.lock:
+                actor = self.actors.get(game_id)
+                if actor is not None:
+                    self.actors.move_to_end(game_id)
+                    return actor
+
+                done = self.pending.get(game_id)
+                if done is None:
+                    if game_id not in self.evicted:
+                        raise UnknownGameError(game_id)
+                    self.evicted.discard(game_id)
+                    done = self.pending[game_id] = threading.Event()
+                    break
+
+            # Another request is writing or restoring this game; look again after.
+            done.wait()
+
+        try:
+            path = self.snapshot_path(game_id)
+            with open(path, "rb") as snapshot:
+                game = pickle.load(snapshot)
+            os.remove(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # A missing or unreadable snapshot leaves nothing to restore.
+            with self.lock:
+                del self.pending[game_id]
+            done.set()
+            raise UnknownGameError(game_id)
+
+        actor = GameActor(game_id, game)
+        with self.lock:
+            self.actors[game_id] = actor
+            del self.pending[game_id]
+            overflow = self._take_overflow()
+        done.set()
+        self._write_snapshots(overflow)
+        return actor
+
+    def run(self, game_id, command, *args):
+        """
+        Run a command on a game and enforce the memory cap afterwards.
+        A game over the cap is removed from the pool.
+        """
+        while True:
+            actor = self.get(game_id)
+            try:
+                result = actor.call(command, *args)
+                break
+            except ActorClosed:
+                # The game was snapshotted between lookup and call; load it again.
+                continue
+
+        if estimate_bytes(actor.game) > self.max_game_bytes:
+            self.remove(game_id)
+            raise GameLimitError("Game exceeded the per-game memory cap.")
+        return result
+
+    def remove(self, game_id):
+        """Delete a game, whether it is in memory or snapshotted."""
+        while True:
+            with self.lock:
+                actor = self.actors.pop(game_id, None)
+                if actor is not None:
+                    break
+                done = self.pending.get(game_id)
+                if done is None:
+                    if game_id not in self.evicted:
+                        raise UnknownGameError(game_id)
+                    self.evicted.discard(game_id)
+                    break
+            done.wait()
+
+        if actor is not None:
+            actor.close()
+        else:
+            os.remove(self.snapshot_path(game_id))
+
+    def evict_idle(self):
+        """Snapshot every game that has been idle longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        idle = []
+        with self.lock:
+            # Actors are kept in least recently used order, so stop at the first busy one.
+            while self.actors:
+                game_id, actor = next(iter(self.actors.items()))
+                if actor.last_used > cutoff:
+                    break
+                idle.append(self._take(game_id))
+        self._write_snapshots(idle)
+
+    def _take(self, game_id):
+        # Move a resident game to pending. Called with the pool lock held.
+        done = self.pending[game_id] = threading.Event()
+        return game_id, self.actors.pop(game_id), done
+
+    def _take_overflow(self):
+        taken = []
+        while len(self.actors) > self.max_resident:
+            taken.append(self._take(next(iter(self.actors))))
+        return taken
+
+    def _write_snapshots(self, taken):
+        # Write out games taken from the pool. Called without the pool lock.
+        for game_id, actor, done in taken:
+            # Wait for a running command to finish before writing the game out.
+            actor.close()
+            with open(self.snapshot_path(game_id), "wb") as snapshot:
+                pickle.dump(actor.game, snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+            with self.lock:
+                self.evicted.add(game_id)
+                del self.pending[game_id]
+            done.set()
+
+    def stats(self):
+        """Return counts of resident and snapshotted games."""
+        with self.lock:
+            return {"resident": len(self.actors), "snapshotted": len(self.evicted)}
@@ -0,0 +1,202 @@
+"""
+This file advances many independent games in lockstep for Monte Carlo runs and
+training, where stepping thousands of Game objects one by one in Python is the
+bottleneck. Game state lives in NumPy arrays with a leading game axis, and each
+turn phase (attack, move, cleanup, next wave) is applied to every unfinished
+game at once, with per-game masks for games that are won or lost.
+
+The batch follows the default wave rules of Game: a wave is only spawned on an
+empty board and sends one monster down every lane, so a lane never holds more
+than one monster. Every targeting strategy then picks that same monster, and a
+monster simply takes the damage of every tower of its lane in range of its cell.
+That damage is kept per cell and updated when a tower is placed, so attacking is
+one lookup per lane. Games with a wave director are not modelled.
+"""
+
+from fractions import Fraction
+
+import numpy as np
+
+from entities.rules import MONSTER_RULES, TOWER_RULES, GOBLIN, OGRE
+from game.game import GOLD_PER_KILL, OGRE_WAVE
+from game.movement import MAX_SPEED_DENOMINATOR
+
+# Values of BatchGame.status.
+PLAYING = 0
+WON = 1
+LOST = 2
+
+# Tower stats indexed by type id.
+TOWER_COST = np.array([rule.cost for rule in TOWER_RULES], dtype=np.int64)
+TOWER_DAMAGE = np.array([rule.damage for rule in TOWER_RULES], dtype=np.int64)
+TOWER_RANGE = tuple(rule.range for rule in TOWER_RULES)
+
+# Monster hit points and speeds as exact (cells, turns) ratios, indexed by type id.
+MONSTER_HP = np.array([rule.hp for rule in MONSTER_RULES], dtype=np.int64)
+_speeds = [Fraction(rule.speed).limit_denominator(MAX_SPEED_DENOMINATOR) for rule in MONSTER_RULES]
+MONSTER_CELLS = np.array([speed.numerator for speed in _speeds], dtype=np.int64)
+MONSTER_TURNS = np.array([speed.denominator for speed in _speeds], dtype=np.int64)
+
+
+class BatchGame:
+
+    """
+    A batch of independent games that all start like Game(lanes, width).
+
+    Per-game arrays have the game index as their first axis.
+
+    Attributes:
+        games, lanes, width: Batch size and board size of every game.
+        rng: NumPy Generator drawing the wave compositions.
+        gold, lives, turn, wave: Per-game counters, as on Game.
+        max_waves: Waves to beat.
+        monsters_killed, monsters_escaped: Per-game totals.
+        status: Per-game PLAYING, WON or LOST.
+        towers: Tower type id per (game, lane, col), or -1 for an empty cell.
+        damage: Damage a monster takes per turn on each (game, lane, col).
+        present: Whether each (game, lane) holds a monster.
+        kind, hp, age: Type id, hit points and turns on the board of each lane's
+            monster. Position is derived from age and the type's speed.
+        position: Cell of each lane's monster.
+    """
+
+    def __init__(self, games, lanes=3, width=6, seed=None):
+        self.games = games
+        self.lanes = lanes
+        self.width = width
+        self.rng = np.random.default_rng(seed)
+
+        self.gold = np.full(games, 150, dtype=np.int64)
+        self.lives = np.full(games, 10, dtype=np.int64)
+        self.turn = np.ones(games, dtype=np.int64)
+        self.wave = np.ones(games, dtype=np.int64)
+        self.max_waves = 10
+        self.monsters_killed = np.zeros(games, dtype=np.int64)
+        self.monsters_escaped = np.zeros(games, dtype=np.int64)
+        self.status = np.full(games, PLAYING, dtype=np.int8)
+
+        self.towers = np.full((games, lanes, width), -1, dtype=np.int8)
+        self.damage = np.zeros((games, lanes, width), dtype=np.int64)
+
+        self.present = np.zeros((games, lanes), dtype=bool)
+        self.kind = np.zeros((games, lanes), dtype=np.int64)
+        self.hp = np.zeros((games, lanes), dtype=np.int64)
+        self.age = np.zeros((games, lanes), dtype=np.int64)
+        self.position = np.zeros((games, lanes), dtype=np.int64)
+
+        self.spawn_wave(np.arange(games))
+
+    def wave_types(self, games):
+        """
+        Return the monster type ids of the next wave of the given games, one
+        row per game and one column per lane. Goblins only until OGRE_WAVE,
+        then Goblins or Ogres at random, like Game.spawn_wave.
+        """
+        kinds = np.where(self.rng.random((len(games), self.lanes)) < 0.5, GOBLIN, OGRE)
+        early = self.wave[games] < OGRE_WAVE
+        kinds[early] = GOBLIN
+        return kinds
+
+    def spawn_wave(self, games):
+        """Put a fresh monster in every lane of the given games."""
+        kinds = self.wave_types(games)
+        self.present[games] = True
+        self.kind[games] = kinds
+        self.hp[games] = MONSTER_HP[kinds]
+        self.age[games] = 0
+        self.position[games] = 0
+
+    def place(self, games, type_ids, lanes, cols):
+        """
+        Place one tower in each of the given games, each listed at most once,
+        where the game is still playing, the player can afford it and the cell
+        is free and on the board. Returns a mask of the placements made.
+        """
+        games, type_ids, lanes, cols = (np.asarray(values, dtype=np.int64) for values in (games, type_ids, lanes, cols))
+        placed = (
+            (self.status[games] == PLAYING)
+            & (self.gold[games] >= TOWER_COST[type_ids])
+            & (lanes >= 0) & (lanes < self.lanes) & (cols >= 0) & (cols < self.width)
+        )
+        placed[placed] = self.towers[games[placed], lanes[placed], cols[placed]] < 0
+
+        games, type_ids, lanes, cols = games[placed], type_ids[placed], lanes[placed], cols[placed]
+        self.towers[games, lanes, cols] = type_ids
+        self.gold[games] -= TOWER_COST[type_ids]
+
+        # Spread each new tower's damage over the cells it reaches.
+        for type_id, shot_range in enumerate(TOWER_RANGE):
+            chosen = type_ids == type_id
+            for offset in range(-shot_range, shot_range + 1):
+                cells = cols + offset
+                reach = chosen & (cells >= 0) & (cells < self.width)
+                self.damage[games[reach], lanes[reach], cells[reach]] += TOWER_DAMAGE[type_id]
+        return placed
+
+    def end_turn(self):
+        """
+        Resolve one turn of every game still playing, as Game.end_turn does:
+        towers attack, monsters move, the board is cleaned up and the next wave
+        is spawned once the current one is cleared. Returns status.
+        """
+        active = np.flatnonzero(self.status == PLAYING)
+        if not len(active):
+            return self.status
+
+        present = self.present[active]
+        kind = self.kind[active]
+        hp = self.hp[active]
+        age = self.age[active]
+        position = self.position[active]
+
+        # Attack: each monster takes the damage covering its cell.
+        hit = self.damage[active[:, None], np.arange(self.lanes), np.minimum(position, self.width - 1)]
+        hp = np.where(present, hp - hit, hp)
+
+        # Move: survivors advance by their speed since they spawned.
+        moving = present & (hp > 0)
+        age = age + moving
+        position = np.where(moving, age * MONSTER_CELLS[kind] // MONSTER_TURNS[kind], position)
+
+        # Cleanup: escaped monsters cost a life, killed ones give gold.
+        escaped = present & (position >= self.width)
+        killed = present & ~escaped & (hp <= 0)
+        escaped_count = escaped.sum(axis=1)
+        killed_count = killed.sum(axis=1)
+        self.lives[active] -= escaped_count
+        self.monsters_escaped[active] += escaped_count
+        self.gold[active] += GOLD_PER_KILL * killed_count
+        self.monsters_killed[active] += killed_count
+
+        present &= ~(escaped | killed)
+        self.present[active] = present
+        self.hp[active] = hp
+        self.age[active] = age
+        self.position[active] = position
+        self.turn[active] += 1
+
+        # Next wave for games that cleared theirs.
+        cleared = ~present.any(axis=1)
+        alive = self.lives[active] > 0
+        last_wave = self.wave[active] >= self.max_waves
+        advance = active[alive & cleared & ~last_wave]
+        self.wave[advance] += 1
+        self.spawn_wave(advance)
+
+        lost = ~alive
+        won = alive & cleared & last_wave
+        self.status[active[lost]] = LOST
+        self.status[active[won]] = WON
+        return self.status
+
+    def playing(self):
+        """Return a mask of the games still playing."""
+        return self.status == PLAYING
+
+    def run(self, max_turns=1000):
+        """Resolve turns until every game is won or lost (or max_turns). Returns status."""
+        for _ in range(max_turns):
+            if not self.playing().any():
+                break
+            self.end_turn()
+        return self.status
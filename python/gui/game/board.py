@@ -2,6 +2,15 @@
 This file handles the board state and display for the text-based tower defense game.
 """
 
+from entities.rules import TOWER_RULES, MONSTER_RULES
+from game.monster_pool import MonsterPool
+from game.movement import MovementScheduler
+from game.zobrist import board_hash, monster_key, occurrence_key, tower_key
+
+# ASCII symbols indexed by type id.
+TOWER_SYMBOLS = tuple(rule.symbol for rule in TOWER_RULES)
+MONSTER_SYMBOLS = tuple(rule.symbol for rule in MONSTER_RULES)
+
 class Board:
 
     """
@@ -12,6 +21,15 @@ class Board:
         width: Lane width on the game board.
         towers: Maps (lane, col) to Tower.
         monsters: List of tuples (Monster, lane).
+        next_uid: Id given to the next monster added to the board.
+        movement: MovementScheduler of the monsters on the board.
+        pool: MonsterPool that monsters leaving the board are returned to.
+        hash: 64-bit Zobrist key of the towers and monsters (see zobrist.py),
+            kept up to date as they change. Code that changes a monster outside
+            the board's methods calls update_monster, and code that replaces the
+            towers or monsters wholesale calls rehash.
+        key_counts: Maps a monster key to the number of monsters with that key,
+            so identical monsters do not cancel out in the hash.
     """
 
     def __init__(self, lanes=3, width=6):
@@ -19,34 +37,104 @@ class Board:
         self.width = width
         self.towers = {}
         self.monsters = []
+        self.next_uid = 0
+        self.movement = MovementScheduler()
+        self.pool = MonsterPool()
+        self.hash = 0
+        self.key_counts = {}
 
     def add_tower(self, lane, col, tower):
         # Place a tower on the board.
+        old = self.towers.get((lane, col))
+        if old is not None:
+            self.hash ^= tower_key(lane, col, old)
         self.towers[(lane, col)] = tower
+        self.hash ^= tower_key(lane, col, tower)
+
+    def set_targeting(self, lane, col, targeting=None):
+        # Change the targeting strategy of a placed tower, or cycle to the next
+        # one if targeting is None. Returns the new strategy.
+        tower = self.towers[(lane, col)]
+        self.hash ^= tower_key(lane, col, tower)
+        if targeting is None:
+            tower.cycle_targeting()
+        else:
+            tower.targeting = targeting
+        self.hash ^= tower_key(lane, col, tower)
+        return tower.targeting
 
     def add_monster(self, monster, lane):
-        # Add a monster to a specific lane.
+        # Add a monster to a specific lane, giving it an id unique on this board.
+        monster.uid = self.next_uid
+        self.next_uid += 1
         self.monsters.append((monster, lane))
+        self.movement.schedule(monster)
+        monster.lane = lane
+        monster.key = monster_key(monster, lane)
+        self.hash ^= self.enter_key(monster.key)
+
+    def enter_key(self, key):
+        # Count one more monster with this key and return its share of the hash.
+        count = self.key_counts.get(key, 0)
+        self.key_counts[key] = count + 1
+        return occurrence_key(key, count)
+
+    def leave_key(self, key):
+        # Count one monster fewer with this key and return the share it had.
+        count = self.key_counts[key] - 1
+        if count:
+            self.key_counts[key] = count
+        else:
+            del self.key_counts[key]
+        return occurrence_key(key, count)
+
+    def update_monster(self, monster):
+        # Refresh the key of a monster whose hp, position or movement changed.
+        self.update_monsters((monster,))
+
+    def update_monsters(self, monsters):
+        # update_monster for many monsters at once, each listed once.
+        total = self.hash
+        for monster in monsters:
+            key = monster_key(monster, monster.lane)
+            if key != monster.key:
+                total ^= self.leave_key(monster.key) ^ self.enter_key(key)
+                monster.key = key
+        self.hash = total
+
+    def set_speed(self, monster, speed):
+        # Change a monster's speed, keeping its progress towards the next cell.
+        self.movement.set_speed(monster, speed)
+        self.update_monster(monster)
+
+    def remove_monster(self, monster):
+        # Stop scheduling a monster that died or escaped and return it to the pool.
+        # The caller drops it from monsters.
+        self.hash ^= self.leave_key(monster.key)
+        self.movement.discard(monster)
+        self.pool.release(monster)
+
+    def rehash(self):
+        # Recompute the hash after the towers or monsters were replaced wholesale.
+        self.key_counts = {}
+        for monster, lane in self.monsters:
+            monster.lane = lane
+            monster.key = monster_key(monster, lane)
+            self.key_counts[monster.key] = self.key_counts.get(monster.key, 0) + 1
+        self.hash = board_hash(self)
 
     def display(self):
         # Print the board state in ASCII format.
+        # Each cell shows its first living monster; towers take priority.
+        cells = {}
+        for monster, lane in self.monsters:
+            if monster.is_alive():
+                cells.setdefault((lane, monster.position), MONSTER_SYMBOLS[monster.type_id])
+        for (lane, col), tower in self.towers.items():
+            cells[(lane, col)] = TOWER_SYMBOLS[tower.type_id]
+
         print("\n" + "=" * 40)
         for lane in range(self.lanes):
-            row = []
-            for col in range(self.width):
-                # Tower takes priority in display
-                if (lane, col) in self.towers:
-                    row.append(self.towers[(lane, col)].symbol)
-                else:
-                    symbol = ">"
-                    for monster, m_lane in self.monsters:
-                        if (
-                            m_lane == lane
-                            and monster.position == col
-                            and monster.is_alive()
-                        ):
-                            symbol = monster.symbol
-                            break
-                    row.append(symbol)
+            row = [cells.get((lane, col), ">") for col in range(self.width)]
             print(f"Lane {lane + 1} | " + " ".join(row) + " |")
         print("=" * 40)
@@ -0,0 +1,228 @@
+"""
+This file adapts waves to how well the player is doing. Before each wave the
+WaveDirector generates candidate wave compositions, plays each one out headless
+against the player's current towers, and spawns the candidate whose share of
+escaping monsters is closest to a target difficulty.
+
+Lanes never interact, so a rollout plays a single lane: the towers of that lane
+against the monsters a candidate sends down it. Rollouts are deterministic and
+cached by (width, lane towers, lane wave), so lanes with the same towers and
+candidates that repeat lane waves cost nothing, and later waves reuse earlier
+results. Uncached rollouts run on an optional process pool, and the whole
+decision is cut off at a per-wave time budget: candidates that were not fully
+played out by then are skipped, and the default wave is used if none were.
+"""
+
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from entities.monsters import MONSTER_CLASSES
+from entities.towers import TARGETING
+from game.movement import MovementScheduler
+from game.shard import PackedTower
+from game.targeting import attack_lane
+
+# Safety limit on the length of a rollout.
+MAX_ROLLOUT_TURNS = 200
+
+
+def rollout_lane(width, towers, wave):
+    """
+    Play one lane until its wave is gone and return how many monsters escaped.
+    Follows Game.resolve_turn: towers attack, monsters move, then cleanup.
+
+    towers: (col, damage, range, targeting index, splash) in firing order.
+    wave: Type ids of the monsters spawned in the lane.
+    """
+    lane_towers = [
+        (col, PackedTower(damage, shot_range, TARGETING[targeting], splash))
+        for col, damage, shot_range, targeting, splash in towers
+    ]
+    scheduler = MovementScheduler()
+    monsters = []
+    for uid, type_id in enumerate(wave):
+        monster = MONSTER_CLASSES[type_id]()
+        monster.uid = uid
+        scheduler.schedule(monster)
+        monsters.append(monster)
+
+    escaped = 0
+    turn = 1
+    while monsters and turn <= MAX_ROLLOUT_TURNS:
+        if lane_towers:
+            attack_lane(lane_towers, monsters)
+        scheduler.advance(turn)
+
+        kept = []
+        for monster in monsters:
+            if monster.position >= width:
+                escaped += 1
+                scheduler.discard(monster)
+            elif monster.is_alive():
+                kept.append(monster)
+            else:
+                scheduler.discard(monster)
+        monsters = kept
+        turn += 1
+    return escaped
+
+
+def rollout_lanes(jobs):
+    """Run rollout_lane for a batch of (width, towers, wave) jobs. Runs in a worker process."""
+    return [rollout_lane(*job) for job in jobs]
+
+
+class WaveDirector:
+
+    """
+    Picks the composition of each wave by simulating candidates.
+
+    Attributes:
+        target: Share of a wave's monsters that should escape (0 to 1).
+        budget: Seconds a decision may take.
+        candidates: Candidate waves considered per decision.
+        max_per_lane: Most monsters a candidate sends down one lane.
+        workers: Worker processes for rollouts, or 0 to run them in this process.
+        max_cached: Rollout results kept, least recently used dropped first.
+        last: Summary of the latest decision (candidates scored, difficulty, time).
+    """
+
+    def __init__(self, target=0.2, budget=0.05, candidates=32, max_per_lane=3,
+                 workers=0, max_cached=100000):
+        self.target = target
+        self.budget = budget
+        self.candidates = candidates
+        self.max_per_lane = max_per_lane
+        self.workers = workers
+        self.max_cached = max_cached
+        self.cache = OrderedDict()
+        self.executor = ProcessPoolExecutor(workers) if workers else None
+        # Batches submitted to the workers and not stored yet, by future.
+        self.pending = {}
+        self.last = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the worker processes."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _store(self, job, escaped):
+        self.cache[job] = escaped
+        if len(self.cache) > self.max_cached:
+            self.cache.popitem(last=False)
+
+    def _lookup(self, job):
+        escaped = self.cache.get(job)
+        if escaped is not None:
+            self.cache.move_to_end(job)
+        return escaped
+
+    def _harvest(self):
+        # Store every finished batch, including ones that missed an earlier deadline.
+        for future in [future for future in self.pending if future.done()]:
+            jobs = self.pending.pop(future)
+            if not future.cancelled() and future.exception() is None:
+                for job, escaped in zip(jobs, future.result()):
+                    self._store(job, escaped)
+
+    def _run(self, jobs, deadline):
+        # Fill the cache with as many of the jobs as finish before the deadline.
+        if self.executor is None:
+            for job in jobs:
+                if time.perf_counter() >= deadline:
+                    return
+                self._store(job, rollout_lane(*job))
+            return
+
+        running = {job for batch in self.pending.values() for job in batch}
+        jobs = [job for job in jobs if job not in running]
+        step = max(1, -(-len(jobs) // (self.workers * 4)))
+        for start in range(0, len(jobs), step):
+            batch = jobs[start:start + step]
+            self.pending[self.executor.submit(rollout_lanes, batch)] = batch
+        wait(list(self.pending), timeout=max(0.0, deadline - time.perf_counter()))
+        self._harvest()
+
+    def lane_towers(self, game):
+        """Return each lane's towers as rollout records, in firing order."""
+        towers = [[] for _ in range(game.board.lanes)]
+        for (lane, col), tower in game.board.towers.items():
+            towers[lane].append((col, tower.damage, tower.range,
+                                 TARGETING.index(tower.targeting), tower.splash))
+        return [tuple(lane) for lane in towers]
+
+    def default_wave(self, game, types):
+        """Return the wave spawn_wave would send without a director: one monster per lane."""
+        return tuple((game.rng.choice(types),) for _ in range(game.board.lanes))
+
+    def candidate_waves(self, game, types):
+        """Return the default wave followed by random candidates of up to max_per_lane monsters per lane."""
+        waves = [self.default_wave(game, types)]
+        for _ in range(self.candidates - 1):
+            size = game.rng.randint(1, self.max_per_lane)
+            waves.append(tuple(
+                # Sorted so equal lane waves share cached rollouts.
+                tuple(sorted(game.rng.choice(types) for _ in range(game.rng.randint(1, size))))
+                for _ in range(game.board.lanes)
+            ))
+        return waves
+
+    def choose(self, game, types):
+        """
+        Return the wave to spawn next, as a tuple per lane of monster type ids,
+        choosing among candidates within the time budget.
+        """
+        started = time.perf_counter()
+        deadline = started + self.budget
+        self._harvest()
+        width = game.board.width
+        towers = self.lane_towers(game)
+        if not any(towers):
+            # Without towers every candidate escapes entirely (the first wave is
+            # chosen before any tower is placed), so rollouts cannot tell them apart.
+            self.last = {"candidates": 1, "scored": 0, "difficulty": None,
+                         "seconds": time.perf_counter() - started}
+            return self.default_wave(game, types)
+        waves = self.candidate_waves(game, types)
+
+        needed = OrderedDict()
+        for wave in waves:
+            for lane_towers, lane_wave in zip(towers, wave):
+                job = (width, lane_towers, lane_wave)
+                if job not in self.cache:
+                    needed[job] = None
+        self._run(list(needed), deadline)
+
+        best, best_key, scored, difficulty = waves[0], None, 0, None
+        for wave in waves:
+            escaped = 0
+            for lane_towers, lane_wave in zip(towers, wave):
+                result = self._lookup((width, lane_towers, lane_wave))
+                if result is None:
+                    break
+                escaped += result
+            else:
+                scored += 1
+                spawned = sum(len(lane_wave) for lane_wave in wave)
+                share = escaped / spawned
+                # Closest to the target first, then the larger wave.
+                key = (abs(share - self.target), -spawned)
+                if best_key is None or key < best_key:
+                    best, best_key, difficulty = wave, key, share
+
+        self.last = {
+            "candidates": len(waves),
+            "scored": scored,
+            "difficulty": difficulty,
+            "seconds": time.perf_counter() - started,
+        }
+        return best
+
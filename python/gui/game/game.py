@@ -5,28 +5,51 @@ Additionally, there is a QuitGame exception class used for
 
 import random
 from game.board import Board
-from entities.monsters import Goblin, Ogre
+from game.targeting import attack_lane
+from game.zobrist import counters_key
+from entities.monsters import Goblin, Ogre, MONSTER_CLASSES
+from entities.rules import TOWER_RULES, ARROW, CANNON, GOBLIN, OGRE
 from entities.towers import ArrowTower, CannonTower
 
+# Gold awarded for every monster killed.
+GOLD_PER_KILL = 10
+
+# First wave in which Ogres can appear.
+OGRE_WAVE = 3
+
 class QuitGame(Exception):
     # Raised when the player chooses to exit the game.
     pass
 
 class Game:
     """
-    Base class for game.
+    Base class for game. Subclasses can set board_class to play on a
+    different Board.
 
     Attributes:
-        board: Game board of type Board.
+        board: Game board of type Board (lanes x width cells).
         gold: Starting gold amount.
         lives: Total user lives.
         turn: Starting turn of the game.
         wave: Starting wave of the game.
         max_waves: Total waves in the game.
+        rng: Random number generator for wave composition; pass a seed to
+            replay the same game.
+        telemetry: TelemetryWriter recording every resolved turn, or None.
+        director: WaveDirector choosing the composition of each wave, or None
+            for one random monster per lane. Pass it to the constructor to
+            have it choose the first wave too.
+        log: Callable given a line for every tower hit during a turn (print by
+            default), or None to resolve turns silently.
     """
 
-    def __init__(self):
-        self.board = Board()
+    board_class = Board
+
+    def __init__(self, lanes=3, width=6, seed=None, log=print, director=None):
+        self.director = director
+        self.log = log
+        self.rng = random.Random(seed)
+        self.board = self.board_class(lanes, width)
         self.gold = 150
         self.lives = 10
         self.turn = 1
@@ -36,16 +59,24 @@ class Game:
         self.max_waves = 10
         self.monsters_killed = 0
         self.monsters_escaped = 0
+        self.telemetry = None
 
     def spawn_wave(self):
-        """Spawn a new wave of monsters."""
+        """Spawn a new wave of monsters, chosen by the wave director if there is one."""
+        if self.director is not None:
+            types = (GOBLIN,) if self.wave < OGRE_WAVE else (GOBLIN, OGRE)
+            for lane, lane_wave in enumerate(self.director.choose(self, types)):
+                for type_id in lane_wave:
+                    self.board.add_monster(self.board.pool.acquire(MONSTER_CLASSES[type_id]), lane)
+            return
+
         for lane in range(self.board.lanes):
-            if self.wave < 3:
-                monster = Goblin()
+            if self.wave < OGRE_WAVE:
+                monster_class = Goblin
             else:
-                monster = random.choice([Goblin(), Ogre()])
+                monster_class = self.rng.choice([Goblin, Ogre])
 
-            self.board.add_monster(monster, lane)
+            self.board.add_monster(self.board.pool.acquire(monster_class), lane)
 
     def wave_cleared(self):
         """Return True if no monsters remain on the board."""
@@ -55,8 +86,8 @@ class Game:
         """Prompt player to place a tower or be finished with their turn."""
         while True:
             print(f"\nGold: {self.gold}")
-            print("[1] Arrow Tower (50 gold)")
-            print("[2] Cannon Tower (80 gold)")
+            print(f"[1] {TOWER_RULES[ARROW].name} ({TOWER_RULES[ARROW].cost} gold)")
+            print(f"[2] {TOWER_RULES[CANNON].name} ({TOWER_RULES[CANNON].cost} gold)")
             print("[0] Done placing towers")
             print("[exit] Forfeit the game")
 
@@ -117,43 +148,100 @@ class Game:
         return True
 
     def towers_attack(self):
-        # Have each tower attack the first monster in range.
-        print("\nTOWERS ATTACK")
+        # Have each tower attack a monster in range chosen by its targeting strategy.
+        # Returns the damage dealt by each tower that hit, keyed by (lane, col).
+        lane_towers = {}
         for (lane, col), tower in self.board.towers.items():
-            for monster, m_lane in self.board.monsters:
-                if (
-                    m_lane == lane
-                    and monster.is_alive()
-                    and tower.in_range(col, monster.position)
-                ):
-                    monster.take_damage(tower.damage)
-                    print(
-                        f"{tower.name} hits {monster.name} "
-                        f"for {tower.damage} damage"
-                    )
-                    break
+            lane_towers.setdefault(lane, []).append((col, tower))
+        lane_monsters = {}
+        for monster, lane in self.board.monsters:
+            lane_monsters.setdefault(lane, []).append(monster)
+
+        damage = {}
+        # Monsters hit this turn, in order, to rekey once each.
+        hit = {}
+        log = self.log
+        for lane, towers in lane_towers.items():
+            if lane not in lane_monsters:
+                continue
+            cells = {id(tower): (lane, col) for col, tower in towers}
+            for tower, monster in attack_lane(towers, lane_monsters[lane]):
+                cell = cells[id(tower)]
+                damage[cell] = damage.get(cell, 0) + tower.damage
+                hit[monster] = None
+                if log is not None:
+                    log(f"{tower.name} hits {monster.name} for {tower.damage} damage")
+        self.board.update_monsters(hit)
+        return damage
 
     def move_monsters(self):
-        # Move all monsters forward according to their speed.
-        for monster, _ in self.board.monsters:
-            if monster.is_alive():
-                monster.move()
+        # Move forward the monsters that reach a new cell during this turn.
+        # Returns the monsters that moved.
+        moved = self.board.movement.advance(self.turn)
+        self.board.update_monsters(moved)
+        return moved
 
     def cleanup_monsters(self):
         """Remove dead or escaped monsters and adjust gold/lives."""
-        remaining = []
+        # Survivors are compacted to the front of the list in place.
+        monsters = self.board.monsters
+        kept = 0
 
-        for monster, lane in self.board.monsters:
+        for entry in monsters:
+            monster = entry[0]
             if monster.position >= self.board.width:
                 self.lives -= 1
                 self.monsters_escaped += 1
+                self.board.remove_monster(monster)
             elif monster.is_alive():
-                remaining.append((monster, lane))
+                monsters[kept] = entry
+                kept += 1
             else:
-                self.gold += 10
+                self.gold += GOLD_PER_KILL
                 self.monsters_killed += 1
+                self.board.remove_monster(monster)
 
-        self.board.monsters = remaining
+        del monsters[kept:]
+
+    def resolve_turn(self):
+        """Run the combat phases of a turn: attack, move and cleanup."""
+        if self.telemetry is not None:
+            self.telemetry.resolve(self)
+            return
+        self.towers_attack()
+        self.move_monsters()
+        self.cleanup_monsters()
+
+    def end_turn(self):
+        """
+        Resolve one turn: towers attack, monsters move and the board is cleaned up.
+        Spawns the next wave once the current one is cleared.
+
+        Returns the game status after the turn ("playing", "won" or "lost").
+        """
+        self.resolve_turn()
+        self.turn += 1
+
+        if not self.is_game_over() and self.wave_cleared() and self.wave < self.max_waves:
+            self.wave += 1
+            self.spawn_wave()
+
+        return self.status()
+
+    def state_hash(self):
+        """
+        Return a 64-bit key of the game state: the board hash combined with
+        gold, lives, wave and turn. Equal states always have equal keys.
+        """
+        return self.board.hash ^ counters_key(self.gold, self.lives, self.wave, self.turn)
+
+    def status(self):
+        """Return "lost", "won" or "playing" for the current game state."""
+        if self.is_game_over():
+            return "lost"
+        if self.wave >= self.max_waves and self.wave_cleared():
+            return "won"
+        return "playing"
 
     def is_game_won(self):
         return self.wave > self.max_waves and not self.board.monsters
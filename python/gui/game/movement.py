@@ -0,0 +1,115 @@
+"""
+This file schedules monster movement as events. Instead of stepping every monster
+every turn, the scheduler keeps a heap keyed on the turn in which each monster
+next enters a new cell, and a turn only touches the monsters whose next cell
+change is due. A monster's position is computed exactly from the time and cell
+it started moving at its current speed, so speeds such as 1.5 cells per turn and
+slowed monsters never drift because of rounding.
+"""
+
+import heapq
+from fractions import Fraction
+
+# Largest denominator kept when a speed is turned into an exact fraction.
+MAX_SPEED_DENOMINATOR = 1000
+
+
+class MovementScheduler:
+
+    """
+    Event queue of upcoming cell changes for the monsters on a board.
+
+    Each scheduled monster carries moved_from, the (time, cell) at which it
+    started moving at its current speed, and next_move, the turn in which it
+    next enters a new cell.
+
+    Attributes:
+        now: Turn up to which movement has been resolved.
+        heap: Entries (next_move, uid, monster); an entry is stale once the
+            monster was rescheduled or removed.
+        active: Maps uid to each scheduled monster.
+    """
+
+    def __init__(self, now=0):
+        self.now = now
+        self.heap = []
+        self.active = {}
+        self.ratios = {}
+
+    def ratio(self, speed):
+        # Speed as (cells, turns) integers, cached since boards use few distinct speeds.
+        ratio = self.ratios.get(speed)
+        if ratio is None:
+            exact = Fraction(speed).limit_denominator(MAX_SPEED_DENOMINATOR)
+            if exact <= 0:
+                raise ValueError("Speed must be positive.")
+            ratio = self.ratios[speed] = (exact.numerator, exact.denominator)
+        return ratio
+
+    def due(self, monster):
+        # First turn by whose end the monster has entered the cell after its current one.
+        time, cell = monster.moved_from
+        cells, turns = self.ratio(monster.speed)
+        reached = monster.position - cell + 1
+        return -(-(time * cells + reached * turns) // cells)
+
+    def push(self, monster):
+        monster.next_move = self.due(monster)
+        heapq.heappush(self.heap, (monster.next_move, monster.uid, monster))
+
+    def schedule(self, monster):
+        """Start moving a monster that is entering the board now."""
+        monster.moved_from = (self.now, monster.position)
+        self.active[monster.uid] = monster
+        self.push(monster)
+
+    def discard(self, monster):
+        """Stop moving a monster that left the board."""
+        self.active.pop(monster.uid, None)
+
+    def set_speed(self, monster, speed):
+        """
+        Change a monster's speed (for example to slow it down), keeping the
+        progress it already made towards its next cell.
+        """
+        time, cell = monster.moved_from
+        cells, turns = self.ratio(monster.speed)
+        progress = Fraction((self.now - time) * cells, turns) - (monster.position - cell)
+
+        new_cells, new_turns = self.ratio(speed)
+        monster.speed = speed
+        monster.moved_from = (self.now - progress * new_turns / new_cells, monster.position)
+        self.push(monster)
+
+    def advance(self, now):
+        """
+        Resolve movement up to the end of turn now. Living monsters whose next
+        cell change is due move forward by every cell they reached since.
+        Returns the monsters that changed cells.
+        """
+        self.now = now
+        moved = []
+        heap = self.heap
+        while heap and heap[0][0] <= now:
+            due, uid, monster = heapq.heappop(heap)
+            if self.active.get(uid) is not monster or monster.next_move != due:
+                continue
+            if not monster.is_alive():
+                continue
+
+            time, cell = monster.moved_from
+            cells, turns = self.ratio(monster.speed)
+            monster.position = cell + (now - time) * cells // turns
+            self.push(monster)
+            moved.append(monster)
+        return moved
+
+    def rebuild(self, monsters, now):
+        """
+        Replace the queue with the given monsters, which already carry their
+        moved_from and next_move (used after a board is restored).
+        """
+        self.now = now
+        self.active = {monster.uid: monster for monster in monsters}
+        self.heap = [(monster.next_move, monster.uid, monster) for monster in monsters]
+        heapq.heapify(self.heap)
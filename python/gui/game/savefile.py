@@ -0,0 +1,222 @@
+"""
+This file saves and resumes games in a compact, versioned binary format.
+A save holds a header, the game counters, the random generator state, and then
+fixed-size tower and monster records. Because every monster record has the same
+size, a SaveView can memory-map a save and read any monster directly, so large
+simulation checkpoints can be inspected without parsing them into objects, and
+loading walks the mapped records without copying the file first.
+"""
+
+import mmap
+import os
+import struct
+from fractions import Fraction
+
+from entities.monsters import MONSTER_CLASSES
+from entities.towers import TOWER_CLASSES, TARGETING
+from game.game import Game
+from game.movement import MAX_SPEED_DENOMINATOR
+
+MAGIC = b"TDSV"
+VERSION = 1
+
+# magic, version, flags (unused)
+HEADER = struct.Struct("<4sHH")
+# lanes, width, gold, lives, turn, wave, max_waves, monsters_killed,
+# monsters_escaped, next_uid, movement time
+COUNTERS = struct.Struct("<IIqqqqqqqqq")
+# generator version, 625 state words, has gauss_next, gauss_next
+RNG = struct.Struct("<B625I?d")
+COUNT = struct.Struct("<Q")
+# lane, col, type id, targeting, cost, damage, range, splash
+TOWER = struct.Struct("<IIBBxxiiii")
+# uid, lane, type id, position, hp, max_hp, speed and base speed as fractions,
+# next_move, moved_from time as a fraction, moved_from cell
+MONSTER = struct.Struct("<qIBxxxqqqiiiiqqqq")
+
+
+class SaveFormatError(Exception):
+    # Raised when a file is not a save or was written by a newer version.
+    pass
+
+
+def fraction(value):
+    exact = Fraction(value).limit_denominator(MAX_SPEED_DENOMINATOR)
+    return exact.numerator, exact.denominator
+
+
+def number(numerator, denominator):
+    # Whole numbers come back as ints, everything else as an exact fraction.
+    return numerator if denominator == 1 else Fraction(numerator, denominator)
+
+
+def save(game, path):
+    """Write game to path."""
+    board = game.board
+    version, words, gauss = game.rng.getstate()
+
+    parts = [
+        HEADER.pack(MAGIC, VERSION, 0),
+        COUNTERS.pack(
+            board.lanes, board.width, game.gold, game.lives, game.turn, game.wave,
+            game.max_waves, game.monsters_killed, game.monsters_escaped,
+            board.next_uid, board.movement.now
+        ),
+        RNG.pack(version, *words, gauss is not None, gauss or 0.0),
+        COUNT.pack(len(board.towers)),
+    ]
+    for (lane, col), tower in board.towers.items():
+        parts.append(TOWER.pack(
+            lane, col, tower.type_id, TARGETING.index(tower.targeting),
+            tower.cost, tower.damage, tower.range, tower.splash
+        ))
+
+    records = bytearray(MONSTER.size * len(board.monsters))
+    for index, (monster, lane) in enumerate(board.monsters):
+        time, cell = monster.moved_from
+        time = Fraction(time)
+        MONSTER.pack_into(
+            records, index * MONSTER.size,
+            monster.uid, lane, monster.type_id,
+            monster.position, monster.hp, monster.max_hp,
+            *fraction(monster.speed), *fraction(monster.base_speed),
+            monster.next_move, time.numerator, time.denominator, cell
+        )
+    parts.append(COUNT.pack(len(board.monsters)))
+
+    # Write to a temporary file first so a crash never leaves a half-written save.
+    with open(path + ".tmp", "wb") as output:
+        for part in parts:
+            output.write(part)
+        output.write(records)
+    os.replace(path + ".tmp", path)
+
+
+class SaveView:
+
+    """
+    Read-only memory-mapped view of a save file. Counters, the generator state
+    and towers are decoded on open; monsters are decoded only when read.
+
+    Attributes:
+        version: Format version of the file.
+        counters: Tuple in COUNTERS order.
+        rng_state: State for random.Random.setstate.
+        towers: List of tower records in TOWER order.
+        monster_count: Number of monster records.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            self.file.close()
+            raise SaveFormatError("Empty save file.")
+
+        try:
+            self._parse()
+        except (SaveFormatError, struct.error) as exc:
+            self.close()
+            if isinstance(exc, struct.error):
+                raise SaveFormatError("Truncated save file.") from exc
+            raise
+
+    def _parse(self):
+        magic, self.version, _ = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise SaveFormatError("Not a tower defense save file.")
+        if self.version > VERSION:
+            raise SaveFormatError(f"Save version {self.version} is newer than supported version {VERSION}.")
+
+        offset = HEADER.size
+        self.counters = COUNTERS.unpack_from(self.map, offset)
+        offset += COUNTERS.size
+
+        rng = RNG.unpack_from(self.map, offset)
+        self.rng_state = (rng[0], rng[1:626], rng[627] if rng[626] else None)
+        offset += RNG.size
+
+        (tower_count,) = COUNT.unpack_from(self.map, offset)
+        offset += COUNT.size
+        self.towers = [TOWER.unpack_from(self.map, offset + i * TOWER.size) for i in range(tower_count)]
+        offset += tower_count * TOWER.size
+
+        (self.monster_count,) = COUNT.unpack_from(self.map, offset)
+        self.monsters_offset = offset + COUNT.size
+        if self.monsters_offset + self.monster_count * MONSTER.size > len(self.map):
+            raise SaveFormatError("Truncated save file.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def monster(self, index):
+        """Return the record of one monster, in MONSTER order."""
+        if not 0 <= index < self.monster_count:
+            raise IndexError(index)
+        return MONSTER.unpack_from(self.map, self.monsters_offset + index * MONSTER.size)
+
+    def monsters(self, start=0, stop=None):
+        """Yield monster records start..stop-1 straight from the mapped file."""
+        stop = self.monster_count if stop is None else min(stop, self.monster_count)
+        if start >= stop:
+            return
+        with memoryview(self.map) as view:
+            region = view[self.monsters_offset + start * MONSTER.size:self.monsters_offset + stop * MONSTER.size]
+            try:
+                yield from MONSTER.iter_unpack(region)
+            finally:
+                region.release()
+
+
+def load(path):
+    """Resume the game saved at path."""
+    with SaveView(path) as view:
+        (lanes, width, gold, lives, turn, wave, max_waves,
+         killed, escaped, next_uid, now) = view.counters
+
+        game = Game(lanes, width)
+        # Drop the wave the constructor spawned; the saved monsters replace it.
+        for monster, _ in game.board.monsters:
+            game.board.remove_monster(monster)
+        game.board.monsters = []
+
+        game.gold, game.lives, game.turn, game.wave = gold, lives, turn, wave
+        game.max_waves = max_waves
+        game.monsters_killed, game.monsters_escaped = killed, escaped
+        game.rng.setstate(view.rng_state)
+
+        board = game.board
+        for lane, col, kind, targeting, cost, damage, shot_range, splash in view.towers:
+            tower = TOWER_CLASSES[kind]()
+            tower.targeting = TARGETING[targeting]
+            tower.cost, tower.damage, tower.range, tower.splash = cost, damage, shot_range, splash
+            board.towers[(lane, col)] = tower
+
+        pool = board.pool
+        monsters = board.monsters
+        for (uid, lane, kind, position, hp, max_hp, speed, speed_den, base_speed, base_den,
+             next_move, time, time_den, cell) in view.monsters():
+            monster = pool.acquire(MONSTER_CLASSES[kind])
+            monster.uid = uid
+            monster.position = position
+            monster.hp = hp
+            monster.max_hp = max_hp
+            monster.speed = number(speed, speed_den)
+            monster.base_speed = number(base_speed, base_den)
+            monster.next_move = next_move
+            monster.moved_from = (number(time, time_den), cell)
+            monsters.append((monster, lane))
+
+        board.next_uid = next_uid
+        board.movement.rebuild([monster for monster, _ in monsters], now)
+        board.rehash()
+    return game
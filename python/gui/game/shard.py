@@ -0,0 +1,560 @@
+"""
+This file resolves the turns of very wide boards in parallel. Lanes never
+interact: monsters stay in their lane and towers only fire along their own lane,
+so a ShardedBoard keeps its towers and monsters lane by lane in shared memory,
+and worker processes each resolve whole turns (attack, move and cleanup) of a
+contiguous range of lanes in place. The parent only merges what each range of
+lanes reports: kills, escapes, the change of its share of the board hash and the
+monsters that left the board.
+
+The board's Tower and Monster objects are not updated while the state lives in
+shared memory. They are brought up to date the first time board.monsters or
+board.towers is read (sync), and the state is packed into shared memory again
+by the next sharded turn, so code that only ends turns and reads the counters
+or the state hash never pays for either. New waves spawn on an empty board and
+are written to shared memory directly.
+"""
+
+import os
+import time
+import weakref
+from array import array
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from multiprocessing import shared_memory
+
+from entities.towers import TARGETING
+from game.board import Board
+from game.game import Game, GOLD_PER_KILL
+from game.targeting import attack_lane
+from game.zobrist import MASK, fields_key, keys_hash, monster_key, ratio_index
+
+# Packed integers per lane: monster count, tower count, the lane's share of the
+# board hash.
+LANE_FIELDS = 3
+MONSTERS, TOWERS, HASH = range(LANE_FIELDS)
+
+# Packed integers per tower: col, damage, range, targeting index, splash.
+TOWER_FIELDS = 5
+
+# Packed integers per monster: uid, type id, position, hp, speed as (cells,
+# turns), moved_from time as a fraction, moved_from cell, next_move and key.
+MONSTER_FIELDS = 11
+UID, TYPE, POSITION, HP, CELLS, TURNS, TIME, TIME_DEN, CELL, NEXT_MOVE, KEY = range(MONSTER_FIELDS)
+
+# Bytes per packed integer (signed 64 bit).
+ITEM_BYTES = 8
+
+# Monster slots per lane are twice the most crowded lane, and at least this many.
+MIN_MONSTER_SLOTS = 4
+
+# Shared memory blocks attached in this worker process, by name, oldest first.
+# Every sharded board has its own block, so a few are kept open at once.
+_attached = OrderedDict()
+MAX_ATTACHED = 4
+
+# Tower stand-in rebuilt by the workers from a packed record.
+PackedTower = namedtuple("PackedTower", "damage range targeting splash")
+
+
+class PackedMonster:
+    # Monster stand-in rebuilt by the workers from a packed record.
+    __slots__ = ("position", "hp")
+
+    def __init__(self, position, hp):
+        self.position = position
+        self.hp = hp
+
+    def take_damage(self, damage):
+        self.hp -= damage
+
+    def is_alive(self):
+        return self.hp > 0
+
+
+def signed(key):
+    # A 64-bit key as the signed integer it is packed as.
+    return key - (1 << 64) if key >> 63 else key
+
+
+def _open_block(name):
+    # Attach without registering with the resource tracker where supported;
+    # the block belongs to the parent process, which unlinks it.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _attach(name):
+    block = _attached.get(name)
+    if block is None:
+        if len(_attached) >= MAX_ATTACHED:
+            _, oldest = _attached.popitem(last=False)
+            oldest.close()
+        block = _attached[name] = _open_block(name)
+    else:
+        _attached.move_to_end(name)
+    return block
+
+
+def _free(block):
+    block.close()
+    block.unlink()
+
+
+def resolve_lanes(name, layout, start, stop, now, width, record):
+    """
+    Resolve turn now for lanes start..stop-1 of a packed board, in place, and
+    return what the parent merges: (kills, escapes, hash change, monsters left,
+    uids of the monsters that left, tower damage, phase timings). Tower damage
+    is a list of (lane, col, damage) if record is set, else None, and timings
+    are the nanoseconds spent attacking, moving and cleaning up. Runs in a
+    worker process and follows Game.towers_attack, move_monsters and
+    cleanup_monsters.
+    """
+    lanes, tower_slots, monster_slots = layout
+    tower_stride = tower_slots * TOWER_FIELDS
+    monster_stride = monster_slots * MONSTER_FIELDS
+    towers_base = lanes * LANE_FIELDS
+    monsters_base = towers_base + lanes * tower_stride
+    header_range = slice(start * LANE_FIELDS, stop * LANE_FIELDS)
+    monster_range = slice(monsters_base + start * monster_stride, monsters_base + stop * monster_stride)
+
+    data = _attach(name).buf.cast("q")
+    try:
+        headers = data[header_range].tolist()
+        towers = data[towers_base + start * tower_stride:towers_base + stop * tower_stride].tolist()
+        monsters = data[monster_range].tolist()
+
+        kills = escapes = remaining = hash_change = 0
+        removed = []
+        damage = [] if record else None
+        attack_ns = move_ns = cleanup_ns = 0
+
+        for index in range(stop - start):
+            header = index * LANE_FIELDS
+            count = headers[header + MONSTERS]
+            if not count:
+                continue
+            lane = start + index
+            base = index * monster_stride
+            offsets = range(base, base + count * MONSTER_FIELDS, MONSTER_FIELDS)
+            changed = set()
+
+            started = time.perf_counter_ns()
+            tower_count = headers[header + TOWERS]
+            if tower_count:
+                first = index * tower_stride
+                lane_towers = [
+                    (towers[t], PackedTower(towers[t + 1], towers[t + 2], TARGETING[towers[t + 3]], towers[t + 4]))
+                    for t in range(first, first + tower_count * TOWER_FIELDS, TOWER_FIELDS)
+                ]
+                targets = [PackedMonster(monsters[m + POSITION], monsters[m + HP]) for m in offsets]
+                dealt = {}
+                cols = {id(tower): col for col, tower in lane_towers}
+                for tower, _ in attack_lane(lane_towers, targets):
+                    col = cols[id(tower)]
+                    dealt[col] = dealt.get(col, 0) + tower.damage
+                for m, target in zip(offsets, targets):
+                    if monsters[m + HP] != target.hp:
+                        monsters[m + HP] = target.hp
+                        changed.add(m)
+                if record:
+                    damage.extend((lane, col, amount) for col, amount in dealt.items())
+            attacked = time.perf_counter_ns()
+
+            # Movement as in MovementScheduler.advance, from the exact time and
+            # cell the monster started moving at its current speed.
+            for m in offsets:
+                if monsters[m + HP] > 0 and monsters[m + NEXT_MOVE] <= now:
+                    cells, turns = monsters[m + CELLS], monsters[m + TURNS]
+                    since, since_den, cell = monsters[m + TIME], monsters[m + TIME_DEN], monsters[m + CELL]
+                    position = cell + (now * since_den - since) * cells // (since_den * turns)
+                    monsters[m + POSITION] = position
+                    reached = position - cell + 1
+                    monsters[m + NEXT_MOVE] = -(-(since * cells + reached * turns * since_den) // (since_den * cells))
+                    changed.add(m)
+            moved = time.perf_counter_ns()
+
+            kept = []
+            for m in offsets:
+                if monsters[m + POSITION] >= width:
+                    escapes += 1
+                    removed.append(monsters[m + UID])
+                elif monsters[m + HP] > 0:
+                    kept.append(m)
+                else:
+                    kills += 1
+                    removed.append(monsters[m + UID])
+            for m in changed.intersection(kept):
+                monsters[m + KEY] = signed(fields_key(
+                    lane, monsters[m + POSITION], monsters[m + TYPE], monsters[m + HP],
+                    ratio_index(monsters[m + CELLS], monsters[m + TURNS]), monsters[m + NEXT_MOVE]
+                ))
+            if len(kept) < count:
+                # Survivors are compacted to the front of the lane's slots in order.
+                records = [monsters[m:m + MONSTER_FIELDS] for m in kept]
+                for slot, fields in enumerate(records):
+                    at = base + slot * MONSTER_FIELDS
+                    monsters[at:at + MONSTER_FIELDS] = fields
+                headers[header + MONSTERS] = len(kept)
+            if changed or len(kept) < count:
+                old = headers[header + HASH] & MASK
+                new = keys_hash(monsters[base + slot * MONSTER_FIELDS + KEY] & MASK for slot in range(len(kept)))
+                headers[header + HASH] = signed(new)
+                hash_change ^= old ^ new
+            remaining += len(kept)
+            cleaned = time.perf_counter_ns()
+
+            attack_ns += attacked - started
+            move_ns += moved - attacked
+            cleanup_ns += cleaned - moved
+
+        data[header_range] = array("q", headers)
+        data[monster_range] = array("q", monsters)
+    finally:
+        data.release()
+    return kills, escapes, hash_change, remaining, removed, damage, (attack_ns, move_ns, cleanup_ns)
+
+
+class ShardedBoard(Board):
+
+    """
+    Board whose towers and monsters can live in shared memory between turns.
+
+    While they do (resident is True), the Tower and Monster objects are out of
+    date: reading monsters or towers, or changing a monster through the board,
+    first syncs them, which ends residency until the next sharded turn.
+    Spawning a monster writes it to shared memory instead.
+
+    Attributes:
+        resident: Whether the state lives in shared memory.
+        block: SharedMemory holding the packed lanes, kept across residencies.
+        layout: (lanes, tower slots per lane, monster slots per lane) of the block.
+        residents: Maps uid to each monster on the board while resident.
+        resident_count: Monsters on the board while resident.
+    """
+
+    def __init__(self, lanes=3, width=6):
+        self.resident = False
+        self.block = None
+        self.layout = None
+        self.residents = {}
+        self.resident_count = 0
+        super().__init__(lanes, width)
+
+    def __getstate__(self):
+        # Shared memory is not saved with a snapshotted game; the objects are.
+        if self.resident:
+            self.sync()
+        state = self.__dict__.copy()
+        state["block"] = state["layout"] = None
+        state.pop("_finalizer", None)
+        return state
+
+    @property
+    def monsters(self):
+        if self.resident:
+            self.sync()
+        return self._monsters
+
+    @monsters.setter
+    def monsters(self, monsters):
+        if self.resident:
+            self.sync()
+        self._monsters = monsters
+
+    @property
+    def towers(self):
+        if self.resident:
+            self.sync()
+        return self._towers
+
+    @towers.setter
+    def towers(self, towers):
+        if self.resident:
+            self.sync()
+        self._towers = towers
+
+    def monster_count(self):
+        """Return the number of monsters on the board without syncing it."""
+        return self.resident_count if self.resident else len(self._monsters)
+
+    def lane_counts(self):
+        """Return the number of monsters in each lane without syncing the board."""
+        if not self.resident:
+            counts = [0] * self.lanes
+            for _, lane in self._monsters:
+                counts[lane] += 1
+            return counts
+        data = self.block.buf.cast("q")
+        try:
+            return data[MONSTERS:self.lanes * LANE_FIELDS:LANE_FIELDS].tolist()
+        finally:
+            data.release()
+
+    def pack(self):
+        """Move the towers and monsters into shared memory, making the board resident."""
+        lanes = self.lanes
+        lane_towers = [[] for _ in range(lanes)]
+        for (lane, col), tower in self._towers.items():
+            lane_towers[lane].append((col, tower))
+        lane_monsters = [[] for _ in range(lanes)]
+        for monster, lane in self._monsters:
+            lane_monsters[lane].append(monster)
+
+        tower_slots = max(1, max(map(len, lane_towers)))
+        monster_slots = max(MIN_MONSTER_SLOTS, 2 * max(map(len, lane_monsters)))
+        tower_stride = tower_slots * TOWER_FIELDS
+        monster_stride = monster_slots * MONSTER_FIELDS
+        towers_base = lanes * LANE_FIELDS
+        monsters_base = towers_base + lanes * tower_stride
+
+        packed = array("q", bytes((monsters_base + lanes * monster_stride) * ITEM_BYTES))
+        for lane in range(lanes):
+            towers, monsters = lane_towers[lane], lane_monsters[lane]
+            header = lane * LANE_FIELDS
+            packed[header + MONSTERS] = len(monsters)
+            packed[header + TOWERS] = len(towers)
+            packed[header + HASH] = signed(keys_hash(monster.key for monster in monsters))
+            at = towers_base + lane * tower_stride
+            for col, tower in towers:
+                packed[at:at + TOWER_FIELDS] = array("q", (
+                    col, tower.damage, tower.range, TARGETING.index(tower.targeting), tower.splash
+                ))
+                at += TOWER_FIELDS
+            at = monsters_base + lane * monster_stride
+            for monster in monsters:
+                packed[at:at + MONSTER_FIELDS] = self._record(monster)
+                at += MONSTER_FIELDS
+
+        size = len(packed) * ITEM_BYTES
+        if self.block is None or self.block.size < size:
+            if self.block is not None:
+                self._finalizer()
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+            self._finalizer = weakref.finalize(self, _free, self.block)
+        data = self.block.buf.cast("q")
+        try:
+            data[:len(packed)] = packed
+        finally:
+            data.release()
+
+        self.layout = (lanes, tower_slots, monster_slots)
+        self.residents = {monster.uid: monster for monster, _ in self._monsters}
+        self.resident_count = len(self._monsters)
+        self.resident = True
+        # The scheduler is rebuilt from the synced monsters.
+        self.movement.rebuild([], self.movement.now)
+
+    def _record(self, monster):
+        cells, turns = self.movement.ratio(monster.speed)
+        since, cell = monster.moved_from
+        since = Fraction(since)
+        return array("q", (
+            monster.uid, monster.type_id, monster.position, monster.hp, cells, turns,
+            since.numerator, since.denominator, cell, monster.next_move, signed(monster.key)
+        ))
+
+    def sync(self):
+        """Bring the Tower and Monster objects up to date and end residency."""
+        self.resident = False
+        lanes, tower_slots, monster_slots = self.layout
+        monster_stride = monster_slots * MONSTER_FIELDS
+        monsters_base = lanes * (LANE_FIELDS + tower_slots * TOWER_FIELDS)
+
+        data = self.block.buf.cast("q")
+        try:
+            counts = data[MONSTERS:lanes * LANE_FIELDS:LANE_FIELDS].tolist()
+            monsters = []
+            for lane, count in enumerate(counts):
+                at = monsters_base + lane * monster_stride
+                for m in range(at, at + count * MONSTER_FIELDS, MONSTER_FIELDS):
+                    monster = self.residents[data[m + UID]]
+                    monster.position = data[m + POSITION]
+                    monster.hp = data[m + HP]
+                    monster.next_move = data[m + NEXT_MOVE]
+                    monsters.append((monster, lane))
+        finally:
+            data.release()
+
+        # Ids grow in spawn order, which is also the board's list order.
+        monsters.sort(key=lambda entry: entry[0].uid)
+        self._monsters = monsters
+        self.residents = {}
+        self.movement.rebuild([monster for monster, _ in monsters], self.movement.now)
+        self.rehash()
+
+    def resolved(self, now, removed, hash_change, remaining):
+        """Account for a sharded turn: the monsters that left and the hash change."""
+        self.movement.now = now
+        self.hash ^= hash_change
+        self.resident_count = remaining
+        residents = self.residents
+        for uid in removed:
+            self.pool.release(residents.pop(uid))
+
+    def add_monster(self, monster, lane):
+        if not self.resident:
+            return super().add_monster(monster, lane)
+
+        lanes, tower_slots, monster_slots = self.layout
+        header = lane * LANE_FIELDS
+        data = self.block.buf.cast("q")
+        try:
+            count = data[header + MONSTERS]
+            if count == monster_slots:
+                full = True
+            else:
+                full = False
+                monster.uid = self.next_uid
+                self.next_uid += 1
+                monster.lane = lane
+                monster.moved_from = (self.movement.now, monster.position)
+                monster.next_move = self.movement.due(monster)
+                monster.key = monster_key(monster, lane)
+
+                at = lanes * (LANE_FIELDS + tower_slots * TOWER_FIELDS) + lane * monster_slots * MONSTER_FIELDS
+                end = at + count * MONSTER_FIELDS
+                data[end:end + MONSTER_FIELDS] = self._record(monster)
+                keys = data[at + KEY:end + KEY + 1:MONSTER_FIELDS].tolist()
+                old = data[header + HASH] & MASK
+                new = keys_hash(key & MASK for key in keys)
+                data[header + HASH] = signed(new)
+                data[header + MONSTERS] = count + 1
+                self.hash ^= old ^ new
+                self.residents[monster.uid] = monster
+                self.resident_count += 1
+        finally:
+            data.release()
+        if full:
+            # The lane has no free slot: leave shared memory; the next turn packs larger lanes.
+            self.sync()
+            super().add_monster(monster, lane)
+
+    def update_monsters(self, monsters):
+        if self.resident:
+            self.sync()
+        super().update_monsters(monsters)
+
+    def set_speed(self, monster, speed):
+        if self.resident:
+            self.sync()
+        super().set_speed(monster, speed)
+
+    def remove_monster(self, monster):
+        if self.resident:
+            self.sync()
+        super().remove_monster(monster)
+
+
+class LaneShards:
+
+    """
+    Worker processes that resolve the turns of wide boards lane range by lane range.
+
+    Attributes:
+        workers: Number of worker processes.
+        min_lanes: Boards with fewer lanes are resolved serially, since
+            dispatching to the workers costs more than their turns.
+        chunks_per_worker: Lane ranges handed to each worker per turn, so uneven
+            lanes are balanced across workers.
+    """
+
+    def __init__(self, workers=None, min_lanes=256, chunks_per_worker=4):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_lanes = min_lanes
+        self.chunks_per_worker = chunks_per_worker
+        self.executor = ProcessPoolExecutor(self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Stop the workers."""
+        self.executor.shutdown()
+
+    def turn(self, game, record=False):
+        """
+        Resolve the combat phases of the current turn of game across the
+        workers, packing its board into shared memory first if it is not
+        resident. Returns the results of every lane range merged: (kills,
+        escapes, hash change, monsters left, uids of the monsters that left,
+        damage keyed by (lane, col) or None, phase timings summed over the
+        workers).
+        """
+        board = game.board
+        if not board.resident:
+            board.pack()
+        lanes = board.lanes
+
+        step = max(1, -(-lanes // (self.workers * self.chunks_per_worker)))
+        futures = [
+            self.executor.submit(
+                resolve_lanes, board.block.name, board.layout,
+                start, min(start + step, lanes), game.turn, board.width, record
+            )
+            for start in range(0, lanes, step)
+        ]
+
+        kills = escapes = hash_change = remaining = 0
+        removed = []
+        damage = {} if record else None
+        timings = [0, 0, 0]
+        for future in futures:
+            lane_kills, lane_escapes, lane_hash, lane_remaining, lane_removed, lane_damage, lane_timings = future.result()
+            kills += lane_kills
+            escapes += lane_escapes
+            hash_change ^= lane_hash
+            remaining += lane_remaining
+            removed.extend(lane_removed)
+            if record:
+                for lane, col, amount in lane_damage:
+                    damage[(lane, col)] = amount
+            for phase, elapsed in enumerate(lane_timings):
+                timings[phase] += elapsed
+        return kills, escapes, hash_change, remaining, removed, damage, tuple(timings)
+
+
+class ShardedGame(Game):
+
+    """
+    Game whose turns are resolved by a LaneShards pool once the board is wide
+    enough, on a ShardedBoard kept in shared memory between turns. Hits are not
+    logged while the workers resolve the turns.
+
+    Attributes:
+        shards: LaneShards used to resolve turns, or None to always run serially.
+    """
+
+    board_class = ShardedBoard
+
+    def __init__(self, lanes=3, width=6, shards=None, seed=None, log=print):
+        super().__init__(lanes, width, seed, log)
+        self.shards = shards
+
+    def sharded(self):
+        # Whether turns go to the workers.
+        return self.shards is not None and self.board.lanes >= self.shards.min_lanes
+
+    def resolve_turn(self):
+        if not self.sharded():
+            return super().resolve_turn()
+
+        record = self.telemetry is not None
+        kills, escapes, hash_change, remaining, removed, damage, timings = self.shards.turn(self, record)
+        self.gold += GOLD_PER_KILL * kills
+        self.lives -= escapes
+        self.monsters_killed += kills
+        self.monsters_escaped += escapes
+        self.board.resolved(self.turn, removed, hash_change, remaining)
+        if record:
+            self.telemetry.record(self, damage, timings, self.board.lane_counts())
+
+    def wave_cleared(self):
+        return self.board.monster_count() == 0
@@ -0,0 +1,239 @@
+"""
+This file streams per-turn telemetry of long simulations to a compact columnar
+file. Every resolved turn adds a row with the game counters, the monsters left
+in each lane, the damage dealt by each tower and the time spent in each phase.
+Rows are buffered in fixed-width typed arrays and written out as a row group
+once the buffer is full, so memory stays bounded however long the run is, and
+a reader can load a single column without decoding the others.
+"""
+
+import struct
+import sys
+import time
+from array import array
+
+MAGIC = b"TDTM"
+VERSION = 1
+
+# Columns with one value per turn, and their array type codes.
+TURN_COLUMNS = (
+    ("turn", "q"),
+    ("gold", "q"),
+    ("lives", "q"),
+    ("wave", "q"),
+    ("killed", "q"),
+    ("escaped", "q"),
+    ("monsters", "q"),
+    ("attack_ns", "q"),
+    ("move_ns", "q"),
+    ("cleanup_ns", "q"),
+)
+# lane_monsters holds one value per lane per turn. tower_hits holds the number
+# of towers that dealt damage in a turn, and that many tower_lane, tower_col
+# and tower_damage values follow for the turn.
+LIST_COLUMNS = (
+    ("lane_monsters", "i"),
+    ("tower_hits", "i"),
+    ("tower_lane", "i"),
+    ("tower_col", "i"),
+    ("tower_damage", "i"),
+)
+COLUMNS = TURN_COLUMNS + LIST_COLUMNS
+
+# magic, version, lanes
+HEADER = struct.Struct("<4sHI")
+# rows in the group, then the byte length of every column in COLUMNS order
+GROUP = struct.Struct(f"<I{len(COLUMNS)}Q")
+
+
+class TelemetryFormatError(Exception):
+    # Raised when a file is not a telemetry file or was written by a newer version.
+    pass
+
+
+def _little_endian(values):
+    # Files are always little endian; arrays use the machine's byte order.
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+class TelemetryWriter:
+
+    """
+    Writes the telemetry of one game to a columnar file, one row per resolved turn.
+    Set it as game.telemetry to record every turn the game resolves.
+
+    Attributes:
+        lanes: Lanes of the recorded board.
+        rows_per_group: Rows buffered before they are written out.
+        rows: Rows written or buffered so far.
+    """
+
+    def __init__(self, path, lanes, rows_per_group=1024):
+        self.lanes = lanes
+        self.rows_per_group = rows_per_group
+        self.rows = 0
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, lanes))
+        self._reset()
+
+    def _reset(self):
+        self.buffered = 0
+        self.columns = {name: array(code) for name, code in COLUMNS}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def resolve(self, game):
+        """Resolve the combat phases of one turn of game, timing them, and record the turn."""
+        # Hits are collected during the attack and passed to the game's log
+        # after it, so attack_ns does not include writing them out.
+        log = game.log
+        lines = []
+        if log is not None:
+            game.log = lines.append
+        started = time.perf_counter_ns()
+        try:
+            damage = game.towers_attack()
+        finally:
+            game.log = log
+        attacked = time.perf_counter_ns()
+        for line in lines:
+            log(line)
+
+        resumed = time.perf_counter_ns()
+        game.move_monsters()
+        moved = time.perf_counter_ns()
+        game.cleanup_monsters()
+        cleaned = time.perf_counter_ns()
+        self.record(game, damage, (attacked - started, moved - resumed, cleaned - moved))
+
+    def record(self, game, damage, timings, lane_monsters=None):
+        """
+        Add the row of the turn game just resolved.
+
+        damage: Maps (lane, col) to the damage that tower dealt this turn.
+        timings: Nanoseconds spent attacking, moving and cleaning up.
+        lane_monsters: Monsters left in each lane, counted from the board if None.
+        """
+        columns = self.columns
+        if lane_monsters is None:
+            lane_monsters = [0] * self.lanes
+            for _, lane in game.board.monsters:
+                lane_monsters[lane] += 1
+
+        for name, value in zip(
+            ("turn", "gold", "lives", "wave", "killed", "escaped", "monsters"),
+            (game.turn, game.gold, game.lives, game.wave, game.monsters_killed,
+             game.monsters_escaped, sum(lane_monsters))
+        ):
+            columns[name].append(value)
+        attack_ns, move_ns, cleanup_ns = timings
+        columns["attack_ns"].append(attack_ns)
+        columns["move_ns"].append(move_ns)
+        columns["cleanup_ns"].append(cleanup_ns)
+
+        columns["lane_monsters"].extend(lane_monsters)
+        columns["tower_hits"].append(len(damage))
+        for (lane, col), dealt in damage.items():
+            columns["tower_lane"].append(lane)
+            columns["tower_col"].append(col)
+            columns["tower_damage"].append(dealt)
+
+        self.rows += 1
+        self.buffered += 1
+        if self.buffered >= self.rows_per_group:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered rows as a row group."""
+        if not self.buffered:
+            return
+        data = [_little_endian(self.columns[name]).tobytes() for name, _ in COLUMNS]
+        self.file.write(GROUP.pack(self.buffered, *(len(chunk) for chunk in data)))
+        for chunk in data:
+            self.file.write(chunk)
+        self.file.flush()
+        self._reset()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class TelemetryReader:
+
+    """
+    Reads a telemetry file written by TelemetryWriter one row group at a time.
+
+    Attributes:
+        version: Format version of the file.
+        lanes: Lanes of the recorded board.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as source:
+            try:
+                magic, self.version, self.lanes = HEADER.unpack(source.read(HEADER.size))
+            except struct.error as exc:
+                raise TelemetryFormatError("Truncated telemetry file.") from exc
+        if magic != MAGIC:
+            raise TelemetryFormatError("Not a telemetry file.")
+        if self.version > VERSION:
+            raise TelemetryFormatError(f"Telemetry version {self.version} is newer than supported version {VERSION}.")
+
+    def groups(self, names=None):
+        """
+        Yield each row group as {column name: array}. Only the named columns
+        are decoded; the others are skipped on disk.
+        """
+        wanted = set(names or (name for name, _ in COLUMNS))
+        with open(self.path, "rb") as source:
+            source.seek(HEADER.size)
+            while True:
+                head = source.read(GROUP.size)
+                if not head:
+                    return
+                if len(head) < GROUP.size:
+                    raise TelemetryFormatError("Truncated telemetry file.")
+                _, *lengths = GROUP.unpack(head)
+
+                group = {}
+                for (name, code), length in zip(COLUMNS, lengths):
+                    if name not in wanted:
+                        source.seek(length, 1)
+                        continue
+                    values = array(code)
+                    values.frombytes(source.read(length))
+                    group[name] = _little_endian(values)
+                yield group
+
+    def column(self, name):
+        """Return the whole of one column as an array."""
+        values = array(dict(COLUMNS)[name])
+        for group in self.groups([name]):
+            values.extend(group[name])
+        return values
+
+    def rows(self):
+        """Yield every turn as a dictionary, with per-lane and per-tower values as lists."""
+        for group in self.groups():
+            lane = tower = 0
+            for index in range(len(group["turn"])):
+                row = {name: group[name][index] for name, _ in TURN_COLUMNS}
+                row["lane_monsters"] = group["lane_monsters"][lane:lane + self.lanes].tolist()
+                lane += self.lanes
+                hits = group["tower_hits"][index]
+                row["tower_damage"] = {
+                    (group["tower_lane"][i], group["tower_col"][i]): group["tower_damage"][i]
+                    for i in range(tower, tower + hits)
+                }
+                tower += hits
+                yield row
@@ -0,0 +1,165 @@
+"""
+This file computes the 64-bit Zobrist keys used by Board and Game. Every field
+of a tower or monster (lane, cell, type, targeting / hit points, speed, next
+move) indexes its own table of random 64-bit keys, and the board key is the
+XOR of the keys of its towers and monsters, so the board can add or remove a
+single key in O(1) whenever one of them changes.
+
+A piece's key is the XOR of its field keys passed through the splitmix64
+finalizer. Without that step fields would be interchangeable between pieces:
+two monsters swapping their hit points, or two towers their types, would leave
+the board key unchanged. Identical monsters (same lane, cell and state) would
+cancel each other out under XOR, so the board counts pieces per key and gives
+the n-th copy of a key its own occurrence key (see occurrence_key).
+
+Tables are drawn from generators with fixed seeds and grow on demand, entry i
+being the i-th draw, so keys are the same in every process and run and can be
+shared between worker processes. The game counters (gold, lives, wave, turn)
+have no upper bound, so they are keyed byte by byte (see counter_key).
+"""
+
+import random
+from fractions import Fraction
+
+from entities.towers import TARGETING
+from game.movement import MAX_SPEED_DENOMINATOR
+
+MASK = (1 << 64) - 1
+
+# Entries drawn for every table up front; tables grow past this on demand.
+TABLE_SIZE = 256
+
+
+class KeyTable(list):
+
+    """Random 64-bit keys indexed by non-negative integers."""
+
+    def __init__(self, seed):
+        super().__init__()
+        self.rng = random.Random(seed)
+        self.grow(TABLE_SIZE)
+
+    def grow(self, size):
+        """Draw keys until the table has at least size entries."""
+        self.extend(self.rng.getrandbits(64) for _ in range(size - len(self)))
+
+
+TOWER_LANE, TOWER_COL, TOWER_TYPE, TOWER_TARGETING = (KeyTable(seed) for seed in range(1, 5))
+(MONSTER_LANE, MONSTER_POSITION, MONSTER_TYPE, MONSTER_HP,
+ MONSTER_SPEED, MONSTER_MOVE) = (KeyTable(seed) for seed in range(5, 11))
+GAME_GOLD, GAME_LIVES, GAME_WAVE, GAME_TURN = (KeyTable(seed) for seed in range(11, 15))
+
+# Table index of each speed seen so far: its exact (cells, turns) ratio, as the
+# movement scheduler uses it.
+SPEED_INDEX = {}
+
+
+def mix(value):
+    """Scramble a 64-bit integer (the splitmix64 finalizer)."""
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & MASK
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & MASK
+    return value ^ (value >> 31)
+
+
+def signed_index(value):
+    """Map an integer that may be negative to a table index (0, -1, 1, -2, ... to 0, 1, 2, 3, ...)."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def ratio_index(cells, turns):
+    """Return the table index of a speed given as its exact (cells, turns) ratio."""
+    return cells * (MAX_SPEED_DENOMINATOR + 1) + turns
+
+
+def speed_index(speed):
+    index = SPEED_INDEX.get(speed)
+    if index is None:
+        exact = Fraction(speed).limit_denominator(MAX_SPEED_DENOMINATOR)
+        index = SPEED_INDEX[speed] = ratio_index(exact.numerator, exact.denominator)
+    return index
+
+
+def lookup(table, index):
+    """Return table[index], growing the table first if needed."""
+    if index >= len(table):
+        table.grow(max(index + 1, 2 * len(table)))
+    return table[index]
+
+
+def tower_key(lane, col, tower):
+    return mix(
+        lookup(TOWER_LANE, lane) ^ lookup(TOWER_COL, col)
+        ^ TOWER_TYPE[tower.type_id] ^ TOWER_TARGETING[TARGETING.index(tower.targeting)]
+    )
+
+
+def fields_key(lane, position, type_id, hp, speed, next_move):
+    """Return the key of a monster given its fields, speed being its speed_index."""
+    return mix(
+        lookup(MONSTER_LANE, lane) ^ lookup(MONSTER_POSITION, position)
+        ^ lookup(MONSTER_TYPE, type_id) ^ lookup(MONSTER_HP, signed_index(hp))
+        ^ lookup(MONSTER_SPEED, speed)
+        ^ lookup(MONSTER_MOVE, 0 if next_move is None else next_move + 1)
+    )
+
+
+def monster_key(monster, lane):
+    hp = monster.hp
+    next_move = monster.next_move
+    try:
+        return mix(
+            MONSTER_LANE[lane] ^ MONSTER_POSITION[monster.position] ^ MONSTER_TYPE[monster.type_id]
+            ^ MONSTER_HP[hp * 2 if hp >= 0 else -hp * 2 - 1]
+            ^ MONSTER_SPEED[speed_index(monster.speed)]
+            ^ MONSTER_MOVE[0 if next_move is None else next_move + 1]
+        )
+    except IndexError:
+        # A field outgrew its table.
+        return fields_key(lane, monster.position, monster.type_id, hp, speed_index(monster.speed), next_move)
+
+
+def occurrence_key(key, count):
+    """Return the share of the board key of the count-th (from 0) piece with this key."""
+    return key if count == 0 else mix((key + count) & MASK)
+
+
+def keys_hash(keys):
+    """Return the share of the board key of monsters with these keys, in any order."""
+    total = 0
+    counts = {}
+    for key in keys:
+        count = counts.get(key, 0)
+        counts[key] = count + 1
+        total ^= occurrence_key(key, count)
+    return total
+
+
+def counter_key(table, value):
+    """
+    Return the key of an unbounded integer: the XOR of the keys of its bytes,
+    entry 256 * i + b of the table standing for byte value b at byte position i.
+    """
+    value = signed_index(value)
+    key = 0
+    offset = 0
+    while value:
+        key ^= lookup(table, offset + (value & 0xFF))
+        value >>= 8
+        offset += 256
+    return key
+
+
+def counters_key(gold, lives, wave, turn):
+    """Return the key of the game counters combined with the board key by Game.state_hash."""
+    return (
+        counter_key(GAME_GOLD, gold) ^ counter_key(GAME_LIVES, lives)
+        ^ counter_key(GAME_WAVE, wave) ^ counter_key(GAME_TURN, turn)
+    )
+
+
+def board_hash(board):
+    """Compute the key of a board from scratch (what Board.hash tracks incrementally)."""
+    total = keys_hash(monster_key(monster, lane) for monster, lane in board.monsters)
+    for (lane, col), tower in board.towers.items():
+        total ^= tower_key(lane, col, tower)
+    return total
@@ -2,17 +2,21 @@
 Tkinter GUI for the Tower Defense game.
 """
 
+import os
 import tkinter as tk
+import tkinter.font as tkfont
 from game.game import Game
+from game.history import TurnHistory
+from game.savefile import SaveFormatError, load, save
+from entities.rules import TOWER_RULES, MONSTER_RULES, ARROW, CANNON, GOBLIN, OGRE
 from entities.towers import ArrowTower, CannonTower
 
-# Game symbols (emojis copied from Google).
+# Game symbols and cell colors, indexed by type id (emojis copied from Google).
 
-ARROW_TOWER_SYMBOL = "🏹"
-CANNON_TOWER_SYMBOL = "💣"
-
-GOBLIN_SYMBOL = "G"
-OGRE_SYMBOL = "O"
+TOWER_ICONS = tuple(rule.icon for rule in TOWER_RULES)
+TOWER_COLORS = tuple(rule.color for rule in TOWER_RULES)
+MONSTER_ICONS = tuple(rule.icon for rule in MONSTER_RULES)
+MONSTER_COLORS = tuple(rule.color for rule in MONSTER_RULES)
 
 # Visual configuration constants.
 
@@ -21,8 +25,6 @@ OGRE_SYMBOL = "O"
 BG_MAIN = "#1e1e1e"
 BG_BOARD = "#000000"
 BG_CELL = "#2e2e2e"
-BG_TOWER = "#4a7a3c"
-BG_MONSTER = "#7a3c3c"
 BG_HOVER = "#3c5a7a"
 
 # Foreground colors.
@@ -37,15 +39,26 @@ FONT_STATUS = ("Arial", 14)
 FONT_BUTTON = ("Arial", 12)
 FONT_CELL = ("Consolas", 16, "bold")
 
-# Grid cell dimensions.
+# Grid cell dimensions, in characters and lines of the cell font.
 
 CELL_WIDTH = 6
 CELL_HEIGHT = 3
 
+# Sizes the cell font scales between as the window is resized, and how long
+# the window must keep its size before the board is laid out again.
+
+CELL_FONT_MIN = 8
+CELL_FONT_MAX = 40
+RESIZE_DELAY_MS = 120
+
 # Padding for spacing.
 
 PADDING = 12
 
+# Where the game is saved when the window is closed or Save Game is clicked.
+
+SAVE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "savegame.td")
+
 # Title Screen / Main Menu.
 
 class TitleScreen:
@@ -71,14 +84,16 @@ class TitleScreen:
 
         # Game description and instructions.
 
+        arrow, cannon = TOWER_RULES[ARROW], TOWER_RULES[CANNON]
+        goblin, ogre = MONSTER_RULES[GOBLIN], MONSTER_RULES[OGRE]
         description = (
             "Defend your lanes by placing towers.\n"
             "Towers can only attack monsters within two blocks in their lane.\n"
             "Stop enemies before they reach the end.\n\n"
-            "🏹 Arrow Towers: Cost 50 gold, 10hp damage per attack\n"
-            "💣 Cannon Towers: Cost 80 gold, 20hp per attack\n"
-            "Goblin (G): 20hp, moves fast\n"
-            "Ogre (O): 40hp, moves slow\n\n"
+            f"{arrow.icon} Arrow Towers: Cost {arrow.cost} gold, {arrow.damage}hp damage per attack\n"
+            f"{cannon.icon} Cannon Towers: Cost {cannon.cost} gold, {cannon.damage}hp per attack, also hits the next cells\n"
+            f"Goblin ({goblin.icon}): {goblin.hp}hp, moves fast\n"
+            f"Ogre ({ogre.icon}): {ogre.hp}hp, moves slow\n\n"
             "Survive all waves to win!"
         )
 
@@ -102,6 +117,18 @@ class TitleScreen:
             command=self.start_game
         ).pack(pady=(30, 10))
 
+        # Offer to resume a saved game.
+
+        if os.path.exists(SAVE_PATH):
+            tk.Button(
+                self.frame,
+                text="Resume Game",
+                font=FONT_BUTTON,
+                width=22,
+                height=2,
+                command=self.resume_game
+            ).pack(pady=10)
+
         tk.Button(
             self.frame,
             text="Exit",
@@ -115,6 +142,22 @@ class TitleScreen:
         """Fade out the title screen and start the main game."""
         self.fade_out(self.frame, callback=self.start_callback)
 
+    def resume_game(self):
+        """Load the saved game, then fade out the title screen and continue it."""
+        try:
+            game = load(SAVE_PATH)
+        except (OSError, SaveFormatError) as exc:
+            tk.Label(
+                self.frame,
+                text=f"Could not load the saved game: {exc}",
+                font=FONT_STATUS,
+                fg="red",
+                bg=BG_MAIN
+            ).pack(pady=5)
+            return
+
+        self.fade_out(self.frame, callback=lambda: self.start_callback(game))
+
     # Fade effect referenced from:
     # https://python-forum.io/thread-43391.html
 
@@ -146,17 +189,33 @@ class TowerDefenseGUI:
 
     """Graphical interface for the Tower Defense game."""
 
-    def __init__(self, root):
+    def __init__(self, root, game=None, director=None):
         self.root = root
+        self.director = director
         self.root.title("Tower Defense")
         self.root.configure(bg=BG_MAIN)
         self.game_finished = False  # Flag to indicate end of game
 
-        # Initialize game logic.
+        # Save the game when the window is closed mid-game.
 
-        self.game = Game()
+        self.root.protocol("WM_DELETE_WINDOW", self.close_window)
+
+        # Initialize game logic, resuming a loaded game if one is given.
+
+        self.game = game or Game(director=director)
+        self.game.director = director
+        self.history = TurnHistory()
         self.selected_tower = None
 
+        # Every board cell shares one font, so rescaling the board is a single
+        # font change. Cell sizes are measured once per font size.
+
+        self.cell_font = tkfont.Font(root, font=FONT_CELL)
+        self.measure_font = tkfont.Font(root, font=FONT_CELL)
+        self.cell_sizes = {}
+        self.window_size = None
+        self.resize_job = None
+
         # Title.
 
         self.title_label = tk.Label(
@@ -210,18 +269,25 @@ class TowerDefenseGUI:
 
         self.legend_label = tk.Label(
             self.root,
-            text="Legend: 🏹 Arrow Tower | 💣 Cannon Tower | G Goblin | O Ogre",
+            text="Legend: " + " | ".join(
+                f"{rule.icon} {rule.name}" for rule in TOWER_RULES + MONSTER_RULES
+            ) + " | Right-click a tower to change its target",
             font=("Arial", 11),
             fg=FG_MUTED,
             bg=BG_MAIN
         )
         self.legend_label.pack(pady=(5, 10))
 
+        # Lay the board out for the window now and after each resize.
+
+        self.root.bind("<Configure>", self.on_resize)
+        self.resize_job = self.root.after(RESIZE_DELAY_MS, self.layout_board)
+
     def create_controls(self):
         """Create tower selection and control buttons."""
         self.arrow_btn = tk.Button(
             self.controls_frame,
-            text="Arrow Tower (50)",
+            text=f"{TOWER_RULES[ARROW].name} ({TOWER_RULES[ARROW].cost})",
             font=FONT_BUTTON,
             width=18,
             cursor="hand2",
@@ -231,7 +297,7 @@ class TowerDefenseGUI:
 
         self.cannon_btn = tk.Button(
             self.controls_frame,
-            text="Cannon Tower (80)",
+            text=f"{TOWER_RULES[CANNON].name} ({TOWER_RULES[CANNON].cost})",
             font=FONT_BUTTON,
             width=18,
             cursor="hand2",
@@ -249,6 +315,26 @@ class TowerDefenseGUI:
         )
         self.end_turn_btn.pack(side=tk.LEFT, padx=PADDING)
 
+        self.undo_btn = tk.Button(
+            self.controls_frame,
+            text="Undo Turn",
+            font=FONT_BUTTON,
+            width=18,
+            cursor="hand2",
+            command=self.undo_turn
+        )
+        self.undo_btn.pack(side=tk.LEFT, padx=PADDING)
+
+        self.save_btn = tk.Button(
+            self.controls_frame,
+            text="Save Game",
+            font=FONT_BUTTON,
+            width=18,
+            cursor="hand2",
+            command=self.save_game
+        )
+        self.save_btn.pack(side=tk.LEFT, padx=PADDING)
+
     def create_board(self):
         """Create the clickable grid board."""
         self.cells = []
@@ -260,7 +346,7 @@ class TowerDefenseGUI:
                     self.board_frame,
                     width=CELL_WIDTH,
                     height=CELL_HEIGHT,
-                    font=FONT_CELL,
+                    font=self.cell_font,
                     bg=BG_CELL,
                     fg=FG_TEXT,
                     relief=tk.FLAT,
@@ -272,10 +358,64 @@ class TowerDefenseGUI:
 
                 btn.bind("<Enter>", lambda e, l=lane, c=col: self.on_hover(l, c))
                 btn.bind("<Leave>", lambda e: self.update_display())
+                btn.bind("<Button-3>", lambda e, l=lane, c=col: self.on_cell_right_click(l, c))
                 btn.grid(row=lane, column=col)
                 row.append(btn)
             self.cells.append(row)
 
+    def on_resize(self, event):
+        """Lay the board out again once the window stops changing size."""
+
+        # Children report their own <Configure> events through the window;
+        # only the window's size matters here.
+
+        if event.widget is not self.root or (event.width, event.height) == self.window_size:
+            return
+
+        self.window_size = (event.width, event.height)
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(RESIZE_DELAY_MS, self.layout_board)
+
+    def cell_size(self, size):
+        """Return the pixel width and height of a cell's text area at a font size."""
+        if size not in self.cell_sizes:
+            self.measure_font.configure(size=size)
+            self.cell_sizes[size] = (
+                CELL_WIDTH * self.measure_font.measure("0"),
+                CELL_HEIGHT * self.measure_font.metrics("linespace")
+            )
+        return self.cell_sizes[size]
+
+    def layout_board(self):
+        """Scale the cell font to the largest size that fits the board in the window."""
+        self.resize_job = None
+        width, height = self.root.winfo_width(), self.root.winfo_height()
+        if width <= 1:
+            return  # Not shown yet; the first <Configure> event lays it out.
+
+        # Pixels each cell adds around its text, and the rest of the window
+        # adds around the cells, at the current size.
+
+        lanes, cols = self.game.board.lanes, self.game.board.width
+        cell = self.cells[0][0]
+        current = int(self.cell_font.cget("size"))
+        text_width, text_height = self.cell_size(current)
+        pad_width = cell.winfo_reqwidth() - text_width
+        pad_height = cell.winfo_reqheight() - text_height
+        free_width = width - (self.board_frame.winfo_reqwidth() - cols * cell.winfo_reqwidth())
+        free_height = height - (self.root.winfo_reqheight() - lanes * cell.winfo_reqheight())
+
+        size = CELL_FONT_MIN
+        for candidate in range(CELL_FONT_MAX, CELL_FONT_MIN, -1):
+            text_width, text_height = self.cell_size(candidate)
+            if cols * (text_width + pad_width) <= free_width and lanes * (text_height + pad_height) <= free_height:
+                size = candidate
+                break
+
+        if size != current:
+            self.cell_font.configure(size=size)
+
     def select_tower(self, tower):
         """Select a tower type for placement."""
         self.selected_tower = tower
@@ -294,6 +434,18 @@ class TowerDefenseGUI:
             self.title_label.config(text="Tower Defense", fg=FG_TEXT)
             self.update_display()
 
+    def on_cell_right_click(self, lane, col):
+        """Cycle the targeting strategy of the tower on the cell."""
+        tower = self.game.board.towers.get((lane, col))
+        if tower is None or self.game_finished:
+            return
+
+        targeting = self.game.board.set_targeting(lane, col)
+        self.title_label.config(
+            text=f"{tower.name} targets: {targeting}",
+            fg=FG_MUTED
+        )
+
     def on_hover(self, lane, col):
         """Preview placement with hover effect."""
         if self.game_finished:
@@ -307,37 +459,58 @@ class TowerDefenseGUI:
         if self.game.is_game_over():
             return
 
-        self.game.towers_attack()
-        self.game.move_monsters()
-        self.game.cleanup_monsters()
+        # Remember the board as it was before this turn so it can be undone.
 
-        # Check for game over.
+        self.history.record(self.game)
 
-        if self.game.is_game_over():
+        # Resolve the turn; the engine spawns the next wave when one is cleared.
+
+        status = self.game.end_turn()
+
+        # Check for game over or victory.
+
+        if status == "lost":
             self.show_end_screen("GAME OVER", "red")
             return
 
-        # Spawn new wave or show victory.
-
-        if self.game.wave_cleared():
-            if self.game.wave == self.game.max_waves:
-                self.show_end_screen("YOU SURVIVED ALL WAVES!", "lightgreen")
-                return
-            self.game.wave += 1
-            self.game.spawn_wave()
+        if status == "won":
+            self.show_end_screen("YOU SURVIVED ALL WAVES!", "lightgreen")
+            return
 
         self.update_display()
 
+    def undo_turn(self):
+        """Return the board to how it was before the last End Turn."""
+        if self.history.undo(self.game):
+            self.update_display()
+
+    def save_game(self):
+        """Save the game so it can be resumed from the title screen."""
+        save(self.game, SAVE_PATH)
+        self.title_label.config(text="Game saved", fg=FG_MUTED)
+
+    def close_window(self):
+        """Save an unfinished game before the window closes."""
+        if not self.game_finished:
+            save(self.game, SAVE_PATH)
+        self.root.quit()
+
     def show_end_screen(self, text, color):
         """Display end-of-game screen and disable board interaction."""
         self.game_finished = True
 
+        # A finished game cannot be resumed.
+
+        if os.path.exists(SAVE_PATH):
+            os.remove(SAVE_PATH)
+
         # Disable all board cells.
 
         for row in self.cells:
             for btn in row:
                 btn.unbind("<Enter>")
                 btn.unbind("<Leave>")
+                btn.unbind("<Button-3>")
                 btn.config(state=tk.DISABLED)
 
         # Update title text.
@@ -367,9 +540,11 @@ class TowerDefenseGUI:
 
     def restart_game(self):
         """Restart the application cleanly by reinitializing the GUI."""
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
         for widget in self.root.winfo_children():
             widget.destroy()
-        self.__init__(self.root)
+        self.__init__(self.root, director=self.director)
 
     def update_display(self):
         """Redraw the board and update all status labels and buttons."""
@@ -384,28 +559,33 @@ class TowerDefenseGUI:
 
         # Enable/disable tower buttons based on available gold.
 
-        self.arrow_btn.config(state=tk.NORMAL if self.game.gold >= 50 else tk.DISABLED)
-        self.cannon_btn.config(state=tk.NORMAL if self.game.gold >= 80 else tk.DISABLED)
+        self.arrow_btn.config(state=tk.NORMAL if self.game.gold >= TOWER_RULES[ARROW].cost else tk.DISABLED)
+        self.cannon_btn.config(state=tk.NORMAL if self.game.gold >= TOWER_RULES[CANNON].cost else tk.DISABLED)
+        self.undo_btn.config(state=tk.NORMAL if len(self.history) else tk.DISABLED)
+
+        # Update board cells. Each cell shows its first living monster.
 
-        # Update board cells.
+        shown = {}
+        for monster, m_lane in self.game.board.monsters:
+            if monster.is_alive():
+                shown.setdefault((m_lane, monster.position), monster.type_id)
 
+        towers = self.game.board.towers
         for lane in range(self.game.board.lanes):
             for col in range(self.game.board.width):
                 btn = self.cells[lane][col]
-                btn.config(text="", bg=BG_CELL)
 
                 # Display towers.
 
-                if (lane, col) in self.game.board.towers:
-                    tower = self.game.board.towers[(lane, col)]
-                    symbol = ARROW_TOWER_SYMBOL if tower.name.startswith("Arrow") else CANNON_TOWER_SYMBOL
-                    btn.config(text=symbol, bg=BG_TOWER)
+                tower = towers.get((lane, col))
+                if tower is not None:
+                    btn.config(text=TOWER_ICONS[tower.type_id], bg=TOWER_COLORS[tower.type_id])
                     continue
 
                 # Display monsters.
 
-                for monster, m_lane in self.game.board.monsters:
-                    if monster.is_alive() and m_lane == lane and monster.position == col:
-                        symbol = GOBLIN_SYMBOL if monster.name == "Goblin" else OGRE_SYMBOL
-                        btn.config(text=symbol, bg=BG_MONSTER)
-                        break
+                type_id = shown.get((lane, col))
+                if type_id is not None:
+                    btn.config(text=MONSTER_ICONS[type_id], bg=MONSTER_COLORS[type_id])
+                else:
+                    btn.config(text="", bg=BG_CELL)
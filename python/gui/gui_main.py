@@ -1,27 +1,21 @@
+import os
 import tkinter as tk
 from gui import TowerDefenseGUI, TitleScreen
+from game.director import WaveDirector
 
 # Function to start the main Tower Defense GUI game
 
-def start_game():
+def start_game(game=None):
 
     """
     Callback function to initialize and start the Tower Defense GUI.
     Called after the title screen fades out.
-    """
-
-    TowerDefenseGUI(root)
-
-# Initialize the main Tkinter window.
-
-root = tk.Tk()
-root.geometry("900x600")
-root.resizable(True, True)
 
-# Fade in effect for the window on startup reference:
-# https://python-forum.io/thread-43391.html
+    Args:
+        game (Game): Saved game to resume, or None to start a new one.
+    """
 
-root.attributes("-alpha", 0.0)
+    TowerDefenseGUI(root, game, director)
 
 
 def fade_in(alpha=0.0):
@@ -40,14 +34,36 @@ def fade_in(alpha=0.0):
         root.after(20, fade_in, alpha)
 
 
-# Start the fade-in effect.
+# The window is only built when run as a script: the wave director's worker
+# processes import this module too on platforms that spawn them.
+
+if __name__ == "__main__":
+
+    # Wave director shared by every game in this window. Its rollouts run on spare
+    # cores, and each decision is capped at 50 ms so the window never stalls.
+
+    director = WaveDirector(budget=0.05, workers=min(4, (os.cpu_count() or 1) - 1))
+
+    # Initialize the main Tkinter window.
+
+    root = tk.Tk()
+    root.geometry("900x600")
+    root.resizable(True, True)
+
+    # Fade in effect for the window on startup reference:
+    # https://python-forum.io/thread-43391.html
+
+    root.attributes("-alpha", 0.0)
+
+    # Start the fade-in effect.
 
-fade_in()
+    fade_in()
 
-# Initialize the main title screen.
+    # Initialize the main title screen.
 
-TitleScreen(root, start_game)
+    TitleScreen(root, start_game)
 
-# Start the Tkinter main event loop.
+    # Start the Tkinter main event loop.
 
-root.mainloop()
+    root.mainloop()
+    director.close()
@@ -0,0 +1,75 @@
+"""
+test_shard.py
+
+Checks that a ShardedGame resolving its turns in worker processes plays the
+same game as the serial Game, including when the board is read or changed
+between turns, and that its state hash stays equal to one computed from scratch.
+
+Run with: python -m pytest test_shard.py
+"""
+
+import random
+
+import pytest
+
+from entities.towers import TOWER_CLASSES, ArrowTower
+from game.game import Game
+from game.shard import LaneShards, ShardedGame
+from game.zobrist import board_hash
+
+LANES = 40
+WIDTH = 12
+
+
+@pytest.fixture(scope="module")
+def shards():
+    with LaneShards(2, min_lanes=1) as pool:
+        yield pool
+
+
+def build(game, seed):
+    """Place the same random towers on game and give it enough gold and lives to keep playing."""
+    rng = random.Random(seed)
+    for lane in range(LANES):
+        for _ in range(rng.randint(0, 2)):
+            tower = rng.choice(TOWER_CLASSES)()
+            tower.targeting = rng.choice(tower.strategies())
+            game.board.add_tower(lane, rng.randrange(WIDTH), tower)
+    game.gold = game.lives = 10 ** 6
+    game.max_waves = 30
+    return game
+
+
+def snapshot(game):
+    return (
+        game.gold, game.lives, game.turn, game.wave,
+        game.monsters_killed, game.monsters_escaped, game.state_hash(),
+        [(monster.uid, lane, monster.position, monster.hp, monster.next_move)
+         for monster, lane in game.board.monsters],
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_sharded_game_matches_serial(shards, seed):
+    serial = build(Game(LANES, WIDTH, seed=seed, log=None), seed)
+    sharded = build(ShardedGame(LANES, WIDTH, shards, seed=seed, log=None), seed)
+    for _ in range(80):
+        assert serial.end_turn() == sharded.end_turn()
+        assert serial.state_hash() == sharded.state_hash()
+    assert snapshot(serial) == snapshot(sharded)
+    assert sharded.board.hash == board_hash(sharded.board)
+
+
+def test_changes_between_turns(shards):
+    games = [build(Game(LANES, WIDTH, seed=5, log=None), 5),
+             build(ShardedGame(LANES, WIDTH, shards, seed=5, log=None), 5)]
+    for turn in range(60):
+        for game in games:
+            if turn % 7 == 3:
+                monster, _ = game.board.monsters[-1]
+                game.board.set_speed(monster, 1.5)
+            if turn % 11 == 5:
+                game.place_tower_at(ArrowTower(), turn % LANES, WIDTH - 1)
+            game.end_turn()
+        assert snapshot(games[0]) == snapshot(games[1])
+    assert games[1].board.hash == board_hash(games[1].board)
@@ -0,0 +1,296 @@
+"""
+tune.py
+
+This module is a balance-tuning harness for the Tower Defense game. It sweeps a
+grid of tower, monster, wave and economy parameters (or samples them at random),
+scores every configuration by playing Monte Carlo games with a simple automatic
+player on a process pool, and prints the configurations closest to the target
+win rate. Results are cached on disk by a hash of the configuration, so running
+a sweep again only plays the points that were not computed before.
+
+Parameters use dotted names, for example:
+
+    python tune.py --grid arrow.damage=8,10,12 ogre.hp=30,40,50
+    python tune.py --random 40 --ranges arrow.cost=30:70 goblin.speed=1:3 --games 200
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from entities.monsters import MONSTER_CLASSES
+from entities.rules import MONSTER_RULES, TOWER_RULES
+from entities.towers import TOWER_CLASSES
+from game.game import Game, OGRE_WAVE
+
+# Bump when the automatic player or the scoring changes, so stale cached results are ignored.
+HARNESS_VERSION = 1
+
+# Safety limit on the length of a simulated game.
+MAX_TURNS = 1000
+
+TOWERS = {rule.key: TOWER_CLASSES[rule.id] for rule in TOWER_RULES}
+MONSTERS = {rule.key: MONSTER_CLASSES[rule.id] for rule in MONSTER_RULES}
+
+
+def default_config():
+    """Return the game's current stats as a flat {"group.stat": value} dictionary."""
+    config = {}
+    for key, cls in TOWERS.items():
+        tower = cls()
+        config.update({
+            f"{key}.cost": tower.cost,
+            f"{key}.damage": tower.damage,
+            f"{key}.range": tower.range,
+            f"{key}.splash": tower.splash,
+        })
+    for key, cls in MONSTERS.items():
+        monster = cls()
+        config.update({f"{key}.hp": monster.max_hp, f"{key}.speed": monster.base_speed})
+
+    game = Game(lanes=1, width=1)
+    config.update({
+        "game.gold": game.gold,
+        "game.lives": game.lives,
+        "waves.count": game.max_waves,
+        "waves.ogres_from": OGRE_WAVE,
+    })
+    return config
+
+
+def config_hash(config, games, seed):
+    """Return the cache key of a configuration scored with games games from seed."""
+    payload = json.dumps(
+        {"config": config, "games": games, "seed": seed, "version": HARNESS_VERSION},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class TunedGame(Game):
+
+    """
+    Game whose stats and wave schedule come from a tuning configuration.
+
+    Attributes:
+        config: Flat configuration dictionary, see default_config().
+    """
+
+    def __init__(self, config, lanes=3, width=6, seed=None, log=print):
+        # spawn_wave runs inside Game.__init__, so the configuration must exist first.
+        self.config = config
+        super().__init__(lanes, width, seed, log)
+        self.gold = config["game.gold"]
+        self.lives = config["game.lives"]
+        self.max_waves = config["waves.count"]
+
+    def spawn_wave(self):
+        for lane in range(self.board.lanes):
+            if self.wave < self.config["waves.ogres_from"]:
+                key = "goblin"
+            else:
+                key = self.rng.choice(["goblin", "ogre"])
+
+            monster = self.board.pool.acquire(MONSTERS[key])
+            monster.hp = monster.max_hp = self.config[f"{key}.hp"]
+            monster.speed = monster.base_speed = self.config[f"{key}.speed"]
+            self.board.add_monster(monster, lane)
+
+    def make_tower(self, key):
+        tower = TOWERS[key]()
+        tower.cost = self.config[f"{key}.cost"]
+        tower.damage = self.config[f"{key}.damage"]
+        tower.range = self.config[f"{key}.range"]
+        tower.splash = self.config[f"{key}.splash"]
+        if tower.targeting == "splash" and tower.splash <= 0:
+            tower.targeting = "first"
+        return tower
+
+
+def autoplay_turn(game, rng):
+    """
+    Spend gold like a simple player: buy a random affordable tower and put it in
+    the lane with the most monster hit points per tower, as close to the middle
+    of the lane as possible.
+    """
+    board = game.board
+    middle = board.width // 2
+    columns = sorted(range(board.width), key=lambda col: (abs(col - middle), col))
+
+    while True:
+        affordable = [key for key in TOWERS if game.config[f"{key}.cost"] <= game.gold]
+        if not affordable:
+            return
+
+        threat = [0] * board.lanes
+        for monster, lane in board.monsters:
+            threat[lane] += monster.hp
+        towers = [0] * board.lanes
+        for lane, _ in board.towers:
+            towers[lane] += 1
+        lanes = sorted(range(board.lanes), key=lambda lane: (-threat[lane] / (towers[lane] + 1), lane))
+
+        tower = game.make_tower(rng.choice(affordable))
+        for lane in lanes:
+            col = next((col for col in columns if (lane, col) not in board.towers), None)
+            if col is not None and game.place_tower_at(tower, lane, col):
+                break
+        else:
+            return
+
+
+def play(config, seed):
+    """Play one game with the automatic player and return its outcome."""
+    rng = random.Random(seed)
+    game = TunedGame(config, seed=seed, log=None)
+    while game.status() == "playing" and game.turn <= MAX_TURNS:
+        autoplay_turn(game, rng)
+        game.end_turn()
+    return {
+        "won": game.status() == "won",
+        "lives": max(game.lives, 0),
+        "turns": game.turn - 1,
+        "killed": game.monsters_killed,
+    }
+
+
+def evaluate(config, games, seed):
+    """Score a configuration over games Monte Carlo games. Runs in a worker process."""
+    outcomes = [play(config, seed + i) for i in range(games)]
+    return {
+        "games": games,
+        "win_rate": sum(outcome["won"] for outcome in outcomes) / games,
+        "mean_lives": sum(outcome["lives"] for outcome in outcomes) / games,
+        "mean_turns": sum(outcome["turns"] for outcome in outcomes) / games,
+        "mean_killed": sum(outcome["killed"] for outcome in outcomes) / games,
+    }
+
+
+def parse_value(text):
+    """Parse a parameter value as an int or a float."""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def split_spec(base, spec):
+    """
+    Split a "name=values" parameter spec. Raises ValueError if it is malformed
+    or names a parameter that is not in base, since a misspelt name would
+    silently tune nothing and still get its own cache entry.
+    """
+    name, separator, values = spec.partition("=")
+    if not separator:
+        raise ValueError(f"Expected NAME=VALUES, got {spec!r}.")
+    if name not in base:
+        raise ValueError(f"Unknown parameter {name!r}; tunable parameters: {', '.join(sorted(base))}.")
+    return name, values
+
+
+def grid_configs(base, specs):
+    """Return every combination of "name=v1,v2,..." parameter lists applied to base."""
+    names, choices = [], []
+    for spec in specs:
+        name, values = split_spec(base, spec)
+        names.append(name)
+        choices.append([parse_value(value) for value in values.split(",")])
+    return [dict(base, **dict(zip(names, combination))) for combination in itertools.product(*choices)]
+
+
+def random_configs(base, specs, count, rng):
+    """Return count configurations sampling each "name=low:high" range uniformly."""
+    ranges = []
+    for spec in specs:
+        name, bounds = split_spec(base, spec)
+        low, high = (parse_value(bound) for bound in bounds.split(":"))
+        ranges.append((name, low, high))
+
+    configs = []
+    for _ in range(count):
+        config = dict(base)
+        for name, low, high in ranges:
+            if isinstance(low, int) and isinstance(high, int):
+                config[name] = rng.randint(low, high)
+            else:
+                config[name] = round(rng.uniform(low, high), 3)
+        configs.append(config)
+    return configs
+
+
+def run_sweep(configs, games, seed, cache_dir, workers=None):
+    """
+    Score every configuration, reading cached results and computing the rest on
+    a process pool. Returns a list of (config, result) pairs.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    results = {}
+    pending = {}
+    for config in configs:
+        key = config_hash(config, games, seed)
+        path = os.path.join(cache_dir, f"{key}.json")
+        if os.path.exists(path):
+            with open(path) as cached:
+                results[key] = json.load(cached)["result"]
+        else:
+            pending[key] = config
+
+    if pending:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = {key: executor.submit(evaluate, config, games, seed) for key, config in pending.items()}
+            for key, future in futures.items():
+                results[key] = future.result()
+                # Write to a temporary file first so an interrupted sweep leaves no partial entry.
+                path = os.path.join(cache_dir, f"{key}.json")
+                with open(path + ".tmp", "w") as entry:
+                    json.dump({"config": pending[key], "result": results[key]}, entry)
+                os.replace(path + ".tmp", path)
+
+    print(f"{len(configs) - len(pending)} cached, {len(pending)} computed")
+    return [(config, results[config_hash(config, games, seed)]) for config in configs]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tune Tower Defense balance with Monte Carlo games.")
+    sweep = parser.add_mutually_exclusive_group()
+    sweep.add_argument("--grid", nargs="+", default=[], metavar="NAME=V1,V2",
+                       help="Parameter values to sweep in every combination.")
+    sweep.add_argument("--random", type=int, default=0, metavar="COUNT",
+                       help="Sample COUNT configurations from the --ranges.")
+    parser.add_argument("--ranges", nargs="+", default=[], metavar="NAME=LOW:HIGH",
+                        help="Parameter ranges sampled by --random.")
+    parser.add_argument("--games", type=int, default=100, help="Games per configuration (default: 100).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first game (default: 0).")
+    parser.add_argument("--target-win-rate", type=float, default=0.5,
+                        help="Win rate a balanced configuration should reach (default: 0.5).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores).")
+    parser.add_argument("--cache", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "tune_cache"),
+                        help="Directory of cached results.")
+    parser.add_argument("--top", type=int, default=10, help="Configurations to print (default: 10).")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    base = default_config()
+
+    try:
+        if args.random:
+            configs = random_configs(base, args.ranges, args.random, random.Random(args.seed))
+        else:
+            configs = grid_configs(base, args.grid) if args.grid else [base]
+    except ValueError as exc:
+        raise SystemExit(exc)
+
+    scored = run_sweep(configs, args.games, args.seed, args.cache, args.workers)
+    scored.sort(key=lambda pair: (abs(pair[1]["win_rate"] - args.target_win_rate), -pair[1]["mean_lives"]))
+
+    tuned = sorted({name for config in configs for name in config if config[name] != base[name]})
+    print(f"{'win rate':>8} {'lives':>6} {'turns':>6}  configuration")
+    for config, result in scored[:args.top]:
+        changes = " ".join(f"{name}={config[name]}" for name in tuned) or "defaults"
+        print(f"{result['win_rate']:8.2f} {result['mean_lives']:6.2f} {result['mean_turns']:6.1f}  {changes}")
@@ -0,0 +1,55 @@
+"""
+This file loads the tower and monster rule table (rules.json, next to it)
+shared by the console and GUI games, whose entities/rules.py re-export it. Each
+type has a small integer id equal to its index in the table, so the engine and
+the renderers look up names, symbols, colors and stats by indexing a tuple
+instead of comparing strings.
+"""
+
+import json
+import os
+from collections import namedtuple
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+
+TowerRule = namedtuple("TowerRule", "id key name symbol icon color cost damage range targeting splash")
+MonsterRule = namedtuple("MonsterRule", "id key name symbol icon color hp speed")
+
+# Targeting strategies a tower can use, in the order they are cycled through.
+# "splash" is only available to towers with a splash radius.
+TARGETING = ("first", "furthest", "strongest", "weakest", "splash")
+
+
+class RulesError(Exception):
+    # Raised when the rule table is malformed.
+    pass
+
+
+def _table(entries, rule):
+    # Build a tuple indexed by type id, checking that ids are 0..n-1 in order.
+    table = []
+    for index, entry in enumerate(entries):
+        if entry.get("id") != index:
+            raise RulesError(f"{rule.__name__} ids must be 0..n-1 in order, got {entry.get('id')} at {index}.")
+        try:
+            table.append(rule(**entry))
+        except TypeError as exc:
+            raise RulesError(f"Bad {rule.__name__} entry {index}: {exc}") from exc
+    return tuple(table)
+
+
+def load_rules(path=RULES_PATH):
+    """Return (tower rules, monster rules), each a tuple indexed by type id."""
+    with open(path, encoding="utf-8") as source:
+        rules = json.load(source)
+    return _table(rules["towers"], TowerRule), _table(rules["monsters"], MonsterRule)
+
+
+# Loaded once, when a game first imports its entities.
+TOWER_RULES, MONSTER_RULES = load_rules()
+
+# Type ids used by the entity classes.
+ARROW = 0
+CANNON = 1
+GOBLIN = 0
+OGRE = 1
@@ -6,8 +6,23 @@ It manages routing, session handling, and communication between the frontend and
 core game logic defined in the MonsterGame class.
 """
 
-from flask import Flask, render_template, session, jsonify, redirect, url_for
+import atexit
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+from flask import Flask, render_template, session, jsonify, redirect, url_for, request, g
+from flask.sessions import SecureCookieSessionInterface
+from jinja2 import FileSystemBytecodeCache
 from game import MonsterGame
+from idle import IdleEngine
+from leaderboard import Leaderboard
+import metrics
+import page_cache
+import ratelimit
+import session_codec
 
 # Create the Flask application instance
 app = Flask(__name__)
@@ -18,46 +33,255 @@ app = Flask(__name__)
 # https://flask.palletsprojects.com/en/stable/config/
 app.secret_key = "supersecretkey"
 
+# Compiled templates are cached as bytecode on disk, so server processes after
+# the first load them without parsing. All pages are compiled once at startup.
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(os.environ.get("CLICKER_TEMPLATE_CACHE"))
+for template_name in ("menu.html", "index.html", "leaderboard.html"):
+    app.jinja_env.get_template(template_name)
+
+# Slots of the game page that change between players.
+GAME_PAGE_SLOTS = ("xp", "click_value", "upgrade_cost", "xp_per_second", "stage")
+
+# Rendered menu page and its ETag, and the game page split into slots
+# (one version per upgrade button state). Built on first use.
+menu_page = None
+game_pages = {}
+
+# Metrics exposed at /metrics in the Prometheus text format.
+registry = metrics.Registry()
+REQUEST_SECONDS = registry.histogram(
+    "clicker_request_duration_seconds",
+    "Time spent handling a request, by route and method.",
+    ("route", "method")
+)
+REQUESTS = registry.counter(
+    "clicker_requests_total",
+    "Requests handled, by route, method and status code.",
+    ("route", "method", "status")
+)
+RESPONSE_BYTES = registry.histogram(
+    "clicker_response_size_bytes",
+    "Size of response bodies, by route.",
+    ("route",),
+    buckets=metrics.SIZE_BUCKETS
+)
+GAME_STATE_SECONDS = registry.histogram(
+    "clicker_game_state_seconds",
+    "Time spent loading and storing game state in get_game and save_game.",
+    ("function",)
+)
+SESSION_COOKIE_SECONDS = registry.histogram(
+    "clicker_session_cookie_seconds",
+    "Time spent decoding and encoding the signed session cookie.",
+    ("operation",)
+)
+TEMPLATE_SECONDS = registry.histogram(
+    "clicker_template_render_seconds",
+    "Time spent rendering templates, by template.",
+    ("template",)
+)
+
+
+class TimedSessionInterface(SecureCookieSessionInterface):
+    """
+    Flask's default cookie session interface, timed for the metrics endpoint.
+    """
+
+    def open_session(self, app, request):
+        started = time.perf_counter()
+        try:
+            return super().open_session(app, request)
+        finally:
+            SESSION_COOKIE_SECONDS.observe(time.perf_counter() - started, "decode")
+
+    def save_session(self, app, session, response):
+        started = time.perf_counter()
+        try:
+            return super().save_session(app, session, response)
+        finally:
+            SESSION_COOKIE_SECONDS.observe(time.perf_counter() - started, "encode")
+
+
+app.session_interface = TimedSessionInterface()
+
+
+@app.before_request
+def start_request_timer():
+    """
+    Remember when the request started so its latency can be recorded.
+    """
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """
+    Record latency, status and response size for the finished request.
+    Session cookie encoding happens after this hook and is timed separately.
+    """
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, route, request.method)
+    REQUESTS.inc(route, request.method, str(response.status_code))
+    RESPONSE_BYTES.observe(response.content_length or 0, route)
+    return response
+
+
+def render_page(template, **context):
+    """
+    Render a template and record how long rendering took.
+
+    :param template: Template file name.
+    :param context: Variables passed to the template.
+    :return: The rendered page.
+    """
+    started = time.perf_counter()
+    try:
+        return render_template(template, **context)
+    finally:
+        TEMPLATE_SECONDS.observe(time.perf_counter() - started, template)
+
+# Persistent leaderboard shared by every session served by this process. The
+# SQLite file is shared by all workers, but each opens its own connection in
+# start_worker (connections must not cross fork()) and keeps its own top-K list,
+# which picks up other workers' players when it is reloaded (every few seconds).
+LEADERBOARD_PATH = os.environ.get("CLICKER_LEADERBOARD_DB", os.path.join(app.root_path, "leaderboard.db"))
+leaderboard = None
+
+# Seconds between leaderboard writes; saves in between are batched in memory
+# (0 writes every save at once).
+LEADERBOARD_FLUSH_SECONDS = float(os.environ.get("CLICKER_LEADERBOARD_FLUSH", 1.0))
 
+# Longest display name accepted from the menu.
+MAX_NAME_LENGTH = 20
+
+# Token buckets limiting game actions per session and per client address, with
+# separate buckets for each route. The address limit is higher because many
+# players can share one address.
+# Buckets are per process, so with N Gunicorn workers a client can get up to
+# N times these rates if its requests land on different workers.
+SESSION_RATE = float(os.environ.get("CLICKER_SESSION_RATE", 20))
+IP_RATE = float(os.environ.get("CLICKER_IP_RATE", 200))
+session_limiter = ratelimit.TokenBucketLimiter(rate=SESSION_RATE, burst=SESSION_RATE * 2)
+ip_limiter = ratelimit.TokenBucketLimiter(rate=IP_RATE, burst=IP_RATE * 2)
+
+# Largest number of clicks accepted in one /click request.
+MAX_CLICK_BATCH = 50
+
+# Server-side mirror of active sessions, advanced in batches for idle XP.
+# Each worker process mirrors (and ticks) only the sessions it has served.
+idle_engine = IdleEngine()
+
+# Seconds between idle engine ticks (0 disables the background ticker).
+IDLE_TICK_SECONDS = float(os.environ.get("CLICKER_IDLE_TICK", 1.0))
+
+
+# Process whose leaderboard and background threads were set up. Threads and
+# SQLite connections do not survive fork(), and serve.py imports this module in
+# the Gunicorn master before forking the workers, so every worker sets up its
+# own in start_worker.
+worker_pid = None
+worker_lock = threading.Lock()
+
+
+def run_idle_ticker():
+    """
+    Advance every active session once per tick and push idle progress of
+    players who could reach the leaderboard.
+    """
+    while True:
+        time.sleep(IDLE_TICK_SECONDS)
+        now = time.time()
+        idle_engine.tick(now)
+        idle_engine.expire(now)
+        leaderboard.record_many(idle_engine.changed_rows(leaderboard.min_xp()))
+        if LEADERBOARD_FLUSH_SECONDS <= 0:
+            leaderboard.flush()
+
+
+def run_leaderboard_writer():
+    """
+    Write the progress saved since the last write to the leaderboard database.
+    """
+    while True:
+        time.sleep(LEADERBOARD_FLUSH_SECONDS)
+        leaderboard.flush()
+
+
+def start_worker():
+    """
+    Open the leaderboard and start the background threads of the current
+    process, once per process. Called from Gunicorn's post_fork hook (see
+    serve.py) and before every request, so any other server sets them up on
+    its first request.
+    """
+    global leaderboard, worker_pid
+    if worker_pid == os.getpid():
+        return
+    with worker_lock:
+        if worker_pid == os.getpid():
+            return
+        leaderboard = Leaderboard(LEADERBOARD_PATH)
+        # Buffered progress is written when the worker exits normally.
+        atexit.register(leaderboard.flush)
+        if LEADERBOARD_FLUSH_SECONDS > 0:
+            threading.Thread(target=run_leaderboard_writer, daemon=True).start()
+        if IDLE_TICK_SECONDS > 0:
+            threading.Thread(target=run_idle_ticker, daemon=True).start()
+        worker_pid = os.getpid()
+
+
+@app.before_request
+def start_worker_threads():
+    """
+    Make sure the background threads of this worker process are running.
+    """
+    start_worker()
+
+
+@GAME_STATE_SECONDS.time("get_game")
 def get_game():
     """
     Retrieve the current game state from the session or initialize a new game.
+    Idle XP earned since the state was last saved is applied before returning.
 
     :return: An instance of MonsterGame representing the current session state.
     """
-    if "game" not in session:
-        # Initialize a new game state if none exists.
-        session["game"] = {
-            "xp": 0,
-            "click_value": 1,
-            "upgrade_cost": 10,
-            "current_stage": 1
-        }
-
-    data = session["game"]
-
-    # Reconstruct the MonsterGame object from session data.
-    game = MonsterGame(
-        data["xp"],
-        data["click_value"],
-        data["upgrade_cost"],
-        data.get("current_stage", 1)
-    )
+    data = session.get("game")
+
+    # Reconstruct the MonsterGame object from session data, or start a new game.
+    # A new game is only written to the session once the player changes it.
+    game = session_codec.decode(data) if data is not None else MonsterGame()
+    game.catch_up(time.time())
     return game
 
 
+@GAME_STATE_SECONDS.time("save_game")
 def save_game(game):
     """
     Save the current game state back into the session.
+    Unchanged games are skipped, so the response carries no new session cookie.
+    Leaderboard progress is buffered and written by the worker's writer thread.
 
     :param game: MonsterGame instance to persist.
     """
-    session["game"] = {
-        "xp": game.xp,
-        "click_value": game.click_value,
-        "upgrade_cost": game.upgrade_cost,
-        "current_stage": game.current_stage
-    }
+    if not game.dirty:
+        return
+
+    session["game"] = session_codec.encode(game)
+    game.dirty = False
+
+    # Players who started from the menu are tracked on the leaderboard.
+    if "player_id" in session:
+        leaderboard.record(
+            session["player_id"],
+            session["player_name"],
+            game.xp,
+            game.click_value,
+            game.current_stage
+        )
+        idle_engine.track(session["player_id"], session["player_name"], game, time.time())
+        if LEADERBOARD_FLUSH_SECONDS <= 0:
+            leaderboard.flush()
 
 
 @app.route("/")
@@ -65,18 +289,39 @@ def menu():
     """
     Render the main menu page.
     Clears any existing session data to reset the game state.
+    The page never changes, so it is rendered once and revalidated with an ETag.
     """
-    session.clear()
-    session["started"] = False
-    return render_template("menu.html")
+    global menu_page
+
+    # Only touch the session if it is not already reset, so repeat visits
+    # do not send a new cookie.
+    if dict(session) != {"started": False}:
+        session.clear()
+        session["started"] = False
+
+    if menu_page is None or app.debug:
+        html = render_page("menu.html")
+        menu_page = (html, hashlib.sha1(html.encode("utf-8")).hexdigest())
+
+    html, etag = menu_page
+    response = app.make_response(html)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
 
 
 @app.route("/start")
 def start_game():
     """
     Start a new game session and redirect the user to the game page.
+    Each started game gets its own leaderboard entry under the chosen name.
     """
+    player_id = uuid.uuid4().hex
+    name = request.args.get("name", "").strip()[:MAX_NAME_LENGTH]
+
     session["started"] = True
+    session["player_id"] = player_id
+    session["player_name"] = name or f"Player {player_id[:6]}"
     return redirect("/game")
 
 
@@ -99,51 +344,135 @@ def game():
         return redirect(url_for("menu"))
 
     game = get_game()
-    stage = game.get_stage()
+    values = {
+        "xp": game.xp,
+        "click_value": game.click_value,
+        "upgrade_cost": game.upgrade_cost,
+        "xp_per_second": game.xp_per_second(),
+        "stage": game.get_stage(),
+    }
+    can_upgrade = game.can_upgrade()
+
+    if app.debug:
+        return render_page("index.html", can_upgrade=can_upgrade, **values)
+
+    # Fast path: fill the pre-rendered page instead of running the template.
+    page = game_pages.get(can_upgrade)
+    if page is None:
+        html = render_page(
+            "index.html",
+            can_upgrade=can_upgrade,
+            **{name: page_cache.marker(name) for name in GAME_PAGE_SLOTS}
+        )
+        page = game_pages[can_upgrade] = page_cache.SlotTemplate(html, GAME_PAGE_SLOTS)
+
+    started = time.perf_counter()
+    html = page.fill(values)
+    TEMPLATE_SECONDS.observe(time.perf_counter() - started, "index.html (slots)")
+    return html
+
+
+def game_state(game):
+    """
+    Build the JSON-ready game state returned by the action routes.
+
+    :param game: MonsterGame instance.
+    :return: Dictionary of the values shown on the game page.
+    """
+    return {
+        "xp": game.xp.to_json(),
+        "click_value": game.click_value.to_json(),
+        "upgrade_cost": game.upgrade_cost.to_json(),
+        "xp_per_second": game.xp_per_second().to_json(),
+        "can_upgrade": game.can_upgrade(),
+        "stage": game.get_stage()
+    }
+
+
+def throttle(requested):
+    """
+    Grant up to the requested number of actions allowed by the session and
+    client address token buckets. Every route has its own buckets, so
+    spam-clicking cannot use up the tokens needed to buy an upgrade.
 
-    return render_template(
-        "index.html",
-        xp=game.xp,
-        click_value=game.click_value,
-        upgrade_cost=game.upgrade_cost,
-        stage=stage
-    )
+    :param requested: Number of actions the client asked for.
+    :return: Number of actions granted.
+    """
+    route = request.endpoint
+    limits = [(ip_limiter, (route, request.remote_addr))]
+    if "player_id" in session:
+        limits.append((session_limiter, (route, session["player_id"])))
+    return ratelimit.take(limits, requested)
 
 
 @app.route("/click", methods=["POST"])
 def click_monster():
     """
     Handle a monster click action.
-    Increases XP and returns updated game state as JSON.
+    Clients may send a batch of clicks in the "count" field; clicks beyond the
+    rate limit are dropped from the batch. Increases XP and returns updated
+    game state as JSON, with status 429 if no clicks were allowed.
     """
+    try:
+        requested = int(request.values.get("count", 1))
+    except ValueError:
+        requested = 1
+    requested = max(1, min(requested, MAX_CLICK_BATCH))
+
     game = get_game()
-    game.click()
-    save_game(game)
+    clicks = throttle(requested)
+    if clicks:
+        game.click(clicks)
+        save_game(game)
 
-    return jsonify({
-        "xp": game.xp,
-        "click_value": game.click_value,
-        "upgrade_cost": game.upgrade_cost,
-        "stage": game.get_stage()
-    })
+    state = game_state(game)
+    state["clicks"] = clicks
+    return jsonify(state), 200 if clicks else 429
 
 
 @app.route("/upgrade", methods=["POST"])
 def upgrade_monster():
     """
     Handle a monster upgrade action.
-    Applies upgrades and returns updated game state as JSON.
+    Applies upgrades and returns updated game state as JSON, with status 429
+    if the client is over its rate limit.
     """
     game = get_game()
+    if not throttle(1):
+        return jsonify(game_state(game)), 429
+
     game.upgrade()
     save_game(game)
 
-    return jsonify({
-        "xp": game.xp,
-        "click_value": game.click_value,
-        "upgrade_cost": game.upgrade_cost,
-        "stage": game.get_stage()
-    })
+    return jsonify(game_state(game))
+
+
+@app.route("/leaderboard")
+def leaderboard_page():
+    """
+    Render the leaderboard page with the current top players.
+    """
+    return render_page("leaderboard.html", players=leaderboard.top())
+
+
+@app.route("/leaderboard.json")
+def leaderboard_json():
+    """
+    Return the current top players as JSON.
+    """
+    return jsonify([
+        dict(player, xp=player["xp"].to_json(), click_value=player["click_value"].to_json())
+        for player in leaderboard.top()
+    ])
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """
+    Expose request, session and template metrics in the Prometheus text format.
+    """
+    return registry.render(), 200, {"Content-Type": metrics.CONTENT_TYPE}
+
 
 # Run the Flask development server
 if __name__ == "__main__":
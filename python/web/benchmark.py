@@ -0,0 +1,410 @@
+"""
+benchmark.py
+
+This module is a benchmark suite for the routes of the Monster Evolution Clicker
+web app. It measures throughput and tail latency of /click, /upgrade, /game and
+/ at several session sizes and concurrency levels, together with the cost of
+decoding and encoding the signed session cookie at each size, and writes the
+results as JSON so runs before and after a change can be compared. The table
+and comparison are printed to stderr, so without --output stdout holds only the
+JSON.
+
+Two drivers are available: "client" calls the app in process through Flask's
+test client, and "http" sends real requests to a server, either one given with
+--url or a local server started on a free port for the run.
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+"""
+
+import argparse
+import importlib.metadata
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+# The app reads its settings on import. Benchmarks should measure the routes
+# rather than the rate limiter or the idle ticker, and must not write to the
+# real leaderboard.
+os.environ.setdefault("CLICKER_SESSION_RATE", "1000000000")
+os.environ.setdefault("CLICKER_IP_RATE", "1000000000")
+os.environ.setdefault("CLICKER_IDLE_TICK", "0")
+os.environ.setdefault(
+    "CLICKER_LEADERBOARD_DB", os.path.join(tempfile.mkdtemp(prefix="clicker-bench-"), "leaderboard.db")
+)
+
+from werkzeug.serving import make_server  # noqa: E402
+
+import session_codec  # noqa: E402
+from app import app  # noqa: E402
+from game import MonsterGame  # noqa: E402
+import loadtest  # noqa: E402
+from loadtest import Client  # noqa: E402
+
+# Bump when the measurements change meaning, so old result files are not compared.
+FORMAT_VERSION = 1
+
+# HTTP method used for each benchmarked route: the load test's routes plus the menu.
+ROUTE_METHODS = dict(loadtest.ROUTE_METHODS, **{"/": "GET"})
+
+# Routes that reset the session; every request to them reuses the prepared cookie.
+RESETTING_ROUTES = ("/",)
+
+# Result fields compared by --compare, and whether larger values are better.
+COMPARED_FIELDS = {
+    "rps": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "decode_us": False,
+    "encode_us": False,
+}
+
+
+def session_data(padding):
+    """
+    Build the session of a started game, padded with extra data to grow the cookie.
+
+    :param padding: Number of extra bytes stored in the session.
+    :return: Session dictionary.
+    """
+    game = MonsterGame(xp=10 ** 6, click_value=64, upgrade_cost=640, current_stage=3, last_seen=int(time.time()))
+    data = {
+        "started": True,
+        "player_id": os.urandom(16).hex(),
+        "player_name": "Benchmark",
+        "game": session_codec.encode(game),
+    }
+    if padding:
+        # Random text, because the signed cookie is compressed when that helps.
+        data["padding"] = os.urandom(padding // 2 + 1).hex()[:padding]
+    return data
+
+
+def session_cookie(data):
+    """
+    Sign a session dictionary the way the app does.
+
+    :param data: Session dictionary.
+    :return: Cookie header value.
+    """
+    serializer = app.session_interface.get_signing_serializer(app)
+    return f"{app.config['SESSION_COOKIE_NAME']}={serializer.dumps(data)}"
+
+
+def session_costs(padding, repeats=2000):
+    """
+    Time decoding and encoding the signed session cookie.
+
+    :param padding: Extra session bytes, as in session_data.
+    :param repeats: Number of timed round trips.
+    :return: Dictionary with the cookie size and mean decode/encode times in microseconds.
+    """
+    serializer = app.session_interface.get_signing_serializer(app)
+    data = session_data(padding)
+    signed = serializer.dumps(data)
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        serializer.loads(signed)
+    decoded = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        serializer.dumps(data)
+    encoded = time.perf_counter() - started
+
+    return {
+        "cookie_bytes": len(signed),
+        "decode_us": decoded / repeats * 1e6,
+        "encode_us": encoded / repeats * 1e6,
+    }
+
+
+class TestClientDriver:
+    """
+    Sends requests to the app in process through Flask's test client.
+    """
+
+    name = "client"
+
+    def client(self, cookie):
+        """
+        Create a client for one benchmark thread.
+
+        :param cookie: Cookie header value the client starts with.
+        :return: Tuple of a callable (method, path, reset) returning the response
+            status, and a callable releasing the client.
+        """
+        client = app.test_client()
+        cookie_name = app.config["SESSION_COOKIE_NAME"]
+        value = cookie.split("=", 1)[1]
+
+        def request(method, path, reset):
+            if reset:
+                client.set_cookie(cookie_name, value)
+            return client.open(path, method=method).status_code
+
+        request(ROUTE_METHODS["/game"], "/game", True)
+        return request, lambda: None
+
+    def close(self):
+        pass
+
+
+class HttpDriver:
+    """
+    Sends requests over HTTP, to --url or to a local server started for the run.
+    """
+
+    name = "http"
+
+    def __init__(self, url=None):
+        """
+        Connect to a server, starting a local one if no URL is given.
+
+        :param url: Base URL of a running server, or None.
+        """
+        self.server = None
+        if url is None:
+            # Keep the server's per-request log lines out of the report.
+            logging.getLogger("werkzeug").setLevel(logging.ERROR)
+            self.server = make_server("127.0.0.1", 0, app, threaded=True)
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            self.host, self.port = "127.0.0.1", self.server.server_port
+        else:
+            parsed = urlparse(url)
+            self.host, self.port = parsed.hostname or "127.0.0.1", parsed.port or 80
+
+    def client(self, cookie):
+        """
+        Create a keep-alive client for one benchmark thread.
+
+        :param cookie: Cookie header value the client starts with.
+        :return: Tuple of a callable (method, path, reset) returning the response
+            status, and a callable closing the connection.
+        """
+        client = Client(self.host, self.port)
+
+        def request(method, path, reset):
+            if reset:
+                client.cookie = cookie
+            return client.request(method, path)
+
+        request(ROUTE_METHODS["/game"], "/game", True)
+        return request, client.close
+
+    def close(self):
+        """
+        Stop the local server, if one was started.
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def run_level(driver, route, padding, concurrency, requests_per_client):
+    """
+    Hit one route with a fixed number of concurrent clients, each with its own session.
+
+    :param driver: TestClientDriver or HttpDriver.
+    :param route: Route to benchmark.
+    :param padding: Extra session bytes, as in session_data.
+    :param concurrency: Number of concurrent clients.
+    :param requests_per_client: Requests each client sends.
+    :return: Dictionary with the route, session padding and concurrency, and the
+        results of loadtest.run_clients.
+    """
+    method = ROUTE_METHODS[route]
+    reset = route in RESETTING_ROUTES
+
+    def connect():
+        request, close = driver.client(session_cookie(session_data(padding)))
+        return lambda: request(method, route, reset), close
+
+    return dict(
+        route=route, concurrency=concurrency, session_padding=padding,
+        **loadtest.run_clients(concurrency, connect, requests_per_client)
+    )
+
+
+def run_suite(driver, routes, paddings, levels, requests_per_client):
+    """
+    Run every route at every session size and concurrency level.
+
+    :param driver: TestClientDriver or HttpDriver.
+    :param routes: Routes to benchmark.
+    :param paddings: Extra session sizes in bytes.
+    :param levels: Concurrency levels.
+    :param requests_per_client: Requests each client sends per level.
+    :return: List of result dictionaries.
+    """
+    results = []
+    for padding in paddings:
+        costs = session_costs(padding)
+        for route in routes:
+            for level in levels:
+                result = run_level(driver, route, padding, level, requests_per_client)
+                result.update(costs)
+                result["driver"] = driver.name
+                results.append(result)
+                print(
+                    f"{driver.name:<6} {route:<9} {padding:>6} {level:>5} {result['failed']:>6} "
+                    f"{result['requests']:>7} {result['errors']:>6} {result['rps']:>9.1f} {result['p50_ms']:>8.2f} "
+                    f"{result['p99_ms']:>8.2f} {result['cookie_bytes']:>7} "
+                    f"{result['decode_us']:>8.1f} {result['encode_us']:>8.1f}",
+                    file=sys.stderr
+                )
+    return results
+
+
+def result_key(result):
+    """
+    Identify a measurement across result files.
+
+    :param result: Result dictionary.
+    :return: Tuple of driver, route, session padding and concurrency.
+    """
+    return (result["driver"], result["route"], result["session_padding"], result["concurrency"])
+
+
+def compare(baseline, results):
+    """
+    Print the change of every compared field against a baseline run.
+
+    :param baseline: Parsed JSON of an earlier run.
+    :param results: Results of this run.
+    """
+    if baseline.get("format") != FORMAT_VERSION:
+        print("Baseline was written by a different benchmark version; not comparing.", file=sys.stderr)
+        return
+
+    before = {result_key(result): result for result in baseline["results"]}
+    header = "  ".join(f"{field:>10}" for field in COMPARED_FIELDS)
+    print(f"\n{'driver':<6} {'route':<9} {'pad':>6} {'conc':>5}  {header}", file=sys.stderr)
+    for result in results:
+        old = before.get(result_key(result))
+        if old is None:
+            continue
+        changes = []
+        for field, higher_is_better in COMPARED_FIELDS.items():
+            change = (result[field] - old[field]) / old[field] * 100 if old[field] else 0.0
+            # Positive numbers are always improvements.
+            changes.append(f"{change if higher_is_better else -change:>+9.1f}%")
+        driver, route, padding, level = result_key(result)
+        print(f"{driver:<6} {route:<9} {padding:>6} {level:>5}  " + "  ".join(changes), file=sys.stderr)
+
+
+def parse_list(text, cast=str):
+    """
+    Split a comma separated option.
+
+    :param text: Option value.
+    :param cast: Conversion applied to each item.
+    :return: List of items.
+    """
+    return [cast(item.strip()) for item in text.split(",") if item.strip()]
+
+
+def parse_args():
+    """
+    Parse command line options.
+
+    :return: Parsed argparse namespace.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the clicker game routes.")
+    parser.add_argument(
+        "--driver",
+        default="client,http",
+        help="Comma separated drivers: client (Flask test client) and/or http (default: both)."
+    )
+    parser.add_argument(
+        "--url",
+        default=None,
+        help="Base URL of a running server for the http driver (default: start a local one)."
+    )
+    parser.add_argument(
+        "--routes",
+        default="/click,/upgrade,/game,/",
+        help="Comma separated routes to test (default: /click,/upgrade,/game,/)."
+    )
+    parser.add_argument(
+        "--session-sizes",
+        default="0,1024,3072",
+        help="Comma separated extra session bytes (default: 0,1024,3072)."
+    )
+    parser.add_argument(
+        "--concurrency",
+        default="1,8",
+        help="Comma separated concurrency levels (default: 1,8)."
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=200,
+        help="Requests sent by each client per level (default: 200)."
+    )
+    parser.add_argument(
+        "--output",
+        help="Write the results as JSON to this file (default: stdout; the table goes to stderr)."
+    )
+    parser.add_argument("--compare", metavar="BASELINE", help="Print changes against an earlier JSON result file.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    routes = parse_list(args.routes)
+    for route in routes:
+        if route not in ROUTE_METHODS:
+            raise SystemExit(f"Unsupported route: {route}")
+
+    drivers = []
+    for name in parse_list(args.driver):
+        if name == "client":
+            drivers.append(TestClientDriver())
+        elif name == "http":
+            drivers.append(HttpDriver(args.url))
+        else:
+            raise SystemExit(f"Unsupported driver: {name}")
+
+    print(
+        f"{'driver':<6} {'route':<9} {'pad':>6} {'conc':>5} {'failed':>6} {'reqs':>7} {'errors':>6} {'req/s':>9} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'cookie':>7} {'dec us':>8} {'enc us':>8}",
+        file=sys.stderr
+    )
+    results = []
+    try:
+        for driver in drivers:
+            results.extend(run_suite(
+                driver, routes, parse_list(args.session_sizes, int),
+                parse_list(args.concurrency, int), args.requests
+            ))
+    finally:
+        for driver in drivers:
+            driver.close()
+
+    report = {
+        "format": FORMAT_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "flask": importlib.metadata.version("flask"),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(json.load(baseline), results)
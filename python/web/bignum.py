@@ -0,0 +1,203 @@
+"""
+bignum.py
+
+This module defines BigNum, the fixed-size number type used for XP, click value
+and upgrade cost in the Monster Evolution Clicker game. Values are stored as an
+integer mantissa of at most 53 bits and a binary exponent (mantissa * 2 ** exponent),
+the same trick idle games use to keep numbers from growing without bound.
+
+Values below 2 ** 53 are stored exactly with an exponent of 0, so early game
+numbers behave like plain integers. Larger values keep their 53 most significant
+bits, which makes arithmetic, comparisons and serialization cost the same no
+matter how far a player gets.
+"""
+
+import functools
+import math
+
+# Number of significant bits kept in the mantissa.
+MANTISSA_BITS = 53
+LIMIT = 1 << MANTISSA_BITS
+HALF = LIMIT >> 1
+
+LOG10_2 = math.log10(2)
+
+# Short scale suffixes used for human readable numbers (kept in sync with main.js).
+SUFFIXES = ("", "K", "M", "B", "T", "Qa", "Qi", "Sx", "Sp", "Oc", "No", "Dc")
+
+
+def normalize(mantissa, exponent):
+    """
+    Bring a mantissa and exponent into canonical form.
+
+    Canonical values either have an exponent of 0 and a mantissa below 2 ** 53,
+    or a positive exponent and a mantissa in [2 ** 52, 2 ** 53). Comparing two
+    canonical values is then a comparison of (exponent, mantissa) tuples.
+
+    :param mantissa: Non-negative integer mantissa.
+    :param exponent: Non-negative binary exponent.
+    :return: Canonical (mantissa, exponent) tuple.
+    """
+    if mantissa < 0:
+        raise ValueError("BigNum values cannot be negative")
+
+    if mantissa >= LIMIT:
+        shift = mantissa.bit_length() - MANTISSA_BITS
+        return mantissa >> shift, exponent + shift
+
+    if exponent > 0 and mantissa < HALF:
+        if mantissa == 0:
+            return 0, 0
+        shift = min(exponent, MANTISSA_BITS - mantissa.bit_length())
+        return mantissa << shift, exponent - shift
+
+    return mantissa, exponent
+
+
+@functools.total_ordering
+class BigNum:
+    """
+    A non-negative number stored as mantissa * 2 ** exponent.
+
+    Attributes:
+        mantissa: Integer mantissa (at most 53 bits).
+        exponent: Binary exponent (0 for exactly stored values).
+    """
+
+    __slots__ = ("mantissa", "exponent")
+
+    def __init__(self, mantissa=0, exponent=0):
+        """
+        :param mantissa: Integer mantissa; larger values are rounded down to 53 bits.
+        :param exponent: Binary exponent.
+        """
+        self.mantissa, self.exponent = normalize(mantissa, exponent)
+
+    @classmethod
+    def of(cls, value):
+        """
+        Convert an int, float or BigNum into a BigNum.
+
+        :param value: Value to convert.
+        :return: BigNum instance (the same object if it already is one).
+        """
+        if isinstance(value, BigNum):
+            return value
+        if isinstance(value, float):
+            if value < LIMIT:
+                return cls(int(value))
+            fraction, exponent = math.frexp(value)
+            return cls(int(math.ldexp(fraction, MANTISSA_BITS)), exponent - MANTISSA_BITS)
+        return cls(value)
+
+    def __add__(self, other):
+        other = BigNum.of(other)
+        high, low = (self, other) if self.exponent >= other.exponent else (other, self)
+        shift = high.exponent - low.exponent
+        if shift > MANTISSA_BITS:
+            return high
+        # Add exactly at the smaller exponent, then round back down to 53 bits.
+        return BigNum((high.mantissa << shift) + low.mantissa, low.exponent)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other = BigNum.of(other)
+        if other > self:
+            raise ValueError("BigNum values cannot be negative")
+        shift = self.exponent - other.exponent
+        if shift > MANTISSA_BITS:
+            return self
+        return BigNum((self.mantissa << shift) - other.mantissa, other.exponent)
+
+    def __mul__(self, other):
+        other = BigNum.of(other)
+        return BigNum(self.mantissa * other.mantissa, self.exponent + other.exponent)
+
+    __rmul__ = __mul__
+
+    def __floordiv__(self, divisor):
+        """
+        Divide by a positive integer, rounding down.
+        """
+        if self.exponent == 0:
+            return BigNum(self.mantissa // divisor)
+        # Borrow extra bits from the exponent so precision is not lost.
+        extra = min(self.exponent, MANTISSA_BITS)
+        return BigNum((self.mantissa << extra) // divisor, self.exponent - extra)
+
+    def __eq__(self, other):
+        if isinstance(other, (int, float)):
+            other = BigNum.of(other)
+        if not isinstance(other, BigNum):
+            return NotImplemented
+        return self.exponent == other.exponent and self.mantissa == other.mantissa
+
+    def __lt__(self, other):
+        if isinstance(other, (int, float)):
+            other = BigNum.of(other)
+        if not isinstance(other, BigNum):
+            return NotImplemented
+        return (self.exponent, self.mantissa) < (other.exponent, other.mantissa)
+
+    def __hash__(self):
+        return hash((self.mantissa, self.exponent))
+
+    def __bool__(self):
+        return self.mantissa != 0
+
+    def __int__(self):
+        return self.mantissa << self.exponent
+
+    def __float__(self):
+        try:
+            return math.ldexp(self.mantissa, self.exponent)
+        except OverflowError:
+            return float("inf")
+
+    def __repr__(self):
+        return f"BigNum({self.mantissa}, {self.exponent})"
+
+    def log10(self):
+        """
+        Return the base 10 logarithm of the value (negative infinity for zero).
+        """
+        if self.mantissa == 0:
+            return float("-inf")
+        return math.log10(self.mantissa) + self.exponent * LOG10_2
+
+    def scientific(self):
+        """
+        Format the value exactly when small, otherwise in scientific notation.
+
+        :return: String such as "1234" or "1.235e42".
+        """
+        if self.exponent == 0:
+            return str(self.mantissa)
+        log = self.log10()
+        digits = math.floor(log)
+        lead = 10 ** (log - digits)
+        if round(lead, 3) >= 10:
+            lead /= 10
+            digits += 1
+        return f"{lead:.3f}e{digits}"
+
+    def to_json(self):
+        """
+        Return a JSON friendly value: an exact integer while the value is stored
+        exactly (always below 2 ** 53, so it is safe in JavaScript), otherwise a
+        scientific notation string.
+        """
+        return self.mantissa if self.exponent == 0 else self.scientific()
+
+    def __str__(self):
+        """
+        Format the value for players, e.g. "950", "12.50M" or "3.142e45".
+        """
+        if self.exponent == 0 and self.mantissa < 1000000:
+            return str(self.mantissa)
+        log = self.log10()
+        group = math.floor(log) // 3
+        if group < len(SUFFIXES):
+            return f"{10 ** (log - group * 3):.2f}{SUFFIXES[group]}"
+        return self.scientific()
@@ -5,34 +5,78 @@ This module contains the core game logic for the Monster Evolution Clicker web g
 It defines the MonsterGame class, which manages experience points (XP), upgrades,
 click values, and monster evolution stages. The logic in this file is independent
 of the web framework and is intended to be used by the Flask application.
+
+XP, click value and upgrade cost are BigNum values, so their size stays fixed
+however far a player progresses.
 """
 
+from bignum import BigNum
+
+# Idle XP earned per second is the click value divided by this number, so a
+# player earns nothing while idle until their first upgrade.
+IDLE_RATE_DIVISOR = 2
+
 class MonsterGame:
     """
     Represents the core game logic for the Monster Evolution Clicker game.
     Handles XP accumulation, upgrades, and monster evolution stages.
     """
 
-    def __init__(self, xp=0, click_value=1, upgrade_cost=10, current_stage=1):
+    def __init__(self, xp=0, click_value=1, upgrade_cost=10, current_stage=1, last_seen=None):
         """
         Initialize a new game state or restore an existing one.
 
-        :param xp: Current experience points accumulated by the player.
-        :param click_value: Amount of XP gained per click.
-        :param upgrade_cost: XP required to purchase the next upgrade.
+        :param xp: Current experience points accumulated by the player (int or BigNum).
+        :param click_value: Amount of XP gained per click (int or BigNum).
+        :param upgrade_cost: XP required to purchase the next upgrade (int or BigNum).
         :param current_stage: Current evolution stage of the monster.
+        :param last_seen: Unix time in whole seconds up to which idle XP has been applied.
         """
-        self.xp = xp
-        self.click_value = click_value
-        self.upgrade_cost = upgrade_cost
+        self.xp = BigNum.of(xp)
+        self.click_value = BigNum.of(click_value)
+        self.upgrade_cost = BigNum.of(upgrade_cost)
         self.current_stage = current_stage
+        self.last_seen = last_seen
+
+        # Set when a player action changes the state and it needs to be saved.
+        self.dirty = False
 
-    def click(self):
+    def click(self, times=1):
         """
-        Handle a monster click.
+        Handle one or more monster clicks.
         Increases XP based on the current click value.
+
+        :param times: Number of clicks to apply at once.
+        """
+        self.xp += self.click_value * times
+        self.dirty = True
+
+    def xp_per_second(self):
         """
-        self.xp += self.click_value
+        Determine how much XP the monster earns each second while idle.
+
+        :return: Idle XP gained per second.
+        """
+        return self.click_value // IDLE_RATE_DIVISOR
+
+    def catch_up(self, now):
+        """
+        Apply idle XP for the whole seconds elapsed since the state was last seen.
+        Idle gain is linear in time, so it is computed in one step no matter
+        how long the player was away. Catching up does not mark the state dirty,
+        because applying it again from the saved timestamp gives the same result.
+
+        :param now: Current Unix time in seconds.
+        """
+        now = int(now)
+        if self.last_seen is None:
+            self.last_seen = now
+            return
+
+        elapsed = now - self.last_seen
+        if elapsed > 0:
+            self.xp += self.xp_per_second() * elapsed
+            self.last_seen = now
 
     def can_upgrade(self):
         """
@@ -80,6 +124,7 @@ class MonsterGame:
             self.xp -= self.upgrade_cost
             self.click_value *= 2
             self.upgrade_cost *= 5
+            self.dirty = True
 
             # Update monster stage only if a new stage has been reached
             if eligible_stage > self.current_stage:
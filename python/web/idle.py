@@ -0,0 +1,193 @@
+"""
+idle.py
+
+This module contains the server-side tick engine for idle XP progression in the
+Monster Evolution Clicker game. The IdleEngine mirrors every recently active
+session in NumPy arrays (one slot per player) and advances all of them with a
+single vectorized tick, instead of keeping a timer or running a Python loop per
+session. Individual sessions never depend on the engine: each one is caught up
+lazily in closed form by MonsterGame.catch_up when it is loaded.
+"""
+
+import threading
+
+import numpy as np
+
+from bignum import BigNum, MANTISSA_BITS
+from game import IDLE_RATE_DIVISOR
+
+# Per-slot arrays. BigNum amounts are split into a mantissa and an exponent array.
+FIELDS = (
+    "xp_mantissa", "xp_exponent",
+    "click_mantissa", "click_exponent",
+    "cost_mantissa", "cost_exponent",
+    "stage", "last_seen", "touched", "changed",
+)
+
+
+class IdleEngine:
+    """
+    Vectorized idle progression for all active sessions.
+
+    Attributes:
+        expire_after: Seconds without a save before a session is dropped.
+        count: Number of occupied slots (slots 0..count-1 are always dense).
+    """
+
+    def __init__(self, capacity=1024, expire_after=1800.0):
+        """
+        Create an empty engine.
+
+        :param capacity: Initial number of slots to allocate.
+        :param expire_after: Seconds without a save before a session is dropped.
+        """
+        self.lock = threading.Lock()
+        self.expire_after = expire_after
+        self.count = 0
+
+        # Slot bookkeeping: player id -> slot, and slot -> player id / name.
+        self.slots = {}
+        self.keys = []
+        self.names = []
+
+        # XP mantissas are floats so the tick can add and renormalize them in bulk.
+        self.xp_mantissa = np.zeros(capacity, dtype=np.float64)
+        self.xp_exponent = np.zeros(capacity, dtype=np.int64)
+        self.click_mantissa = np.zeros(capacity, dtype=np.int64)
+        self.click_exponent = np.zeros(capacity, dtype=np.int64)
+        self.cost_mantissa = np.zeros(capacity, dtype=np.int64)
+        self.cost_exponent = np.zeros(capacity, dtype=np.int64)
+        self.stage = np.zeros(capacity, dtype=np.int64)
+        self.last_seen = np.zeros(capacity, dtype=np.int64)
+        self.touched = np.zeros(capacity, dtype=np.float64)
+        self.changed = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        capacity = len(self.stage) * 2
+        for field in FIELDS:
+            old = getattr(self, field)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, field, new)
+
+    def track(self, player_id, name, game, now):
+        """
+        Insert or refresh a session after its state was saved.
+
+        :param player_id: Unique id of the player's session.
+        :param name: Display name of the player.
+        :param game: MonsterGame instance that was just saved.
+        :param now: Current Unix time in seconds.
+        """
+        with self.lock:
+            slot = self.slots.get(player_id)
+            if slot is None:
+                if self.count == len(self.stage):
+                    self._grow()
+                slot = self.count
+                self.count += 1
+                self.slots[player_id] = slot
+                self.keys.append(player_id)
+                self.names.append(name)
+
+            self.xp_mantissa[slot] = game.xp.mantissa
+            self.xp_exponent[slot] = game.xp.exponent
+            self.click_mantissa[slot] = game.click_value.mantissa
+            self.click_exponent[slot] = game.click_value.exponent
+            self.cost_mantissa[slot] = game.upgrade_cost.mantissa
+            self.cost_exponent[slot] = game.upgrade_cost.exponent
+            self.stage[slot] = game.current_stage
+            self.last_seen[slot] = game.last_seen if game.last_seen is not None else int(now)
+            self.touched[slot] = now
+            self.changed[slot] = False
+
+    def tick(self, now):
+        """
+        Advance every tracked session to the given time in one vectorized step.
+
+        :param now: Current Unix time in seconds.
+        """
+        with self.lock:
+            n = self.count
+            elapsed = np.maximum(int(now) - self.last_seen[:n], 0)
+
+            # Idle XP gained, as a mantissa at the click value's exponent.
+            click_mantissa = self.click_mantissa[:n]
+            click_exponent = self.click_exponent[:n]
+            rate = np.where(
+                click_exponent > 0,
+                click_mantissa / IDLE_RATE_DIVISOR,
+                click_mantissa // IDLE_RATE_DIVISOR
+            )
+            gained = rate * elapsed
+
+            # Add at the larger exponent, then return to canonical BigNum form:
+            # exact values below 2 ** 53, otherwise a 53 bit mantissa.
+            xp_exponent = self.xp_exponent[:n]
+            exponent = np.maximum(xp_exponent, click_exponent)
+            total = (
+                np.ldexp(self.xp_mantissa[:n], xp_exponent - exponent)
+                + np.ldexp(gained, click_exponent - exponent)
+            )
+            fraction, bits = np.frexp(total)
+            target = exponent + bits - MANTISSA_BITS
+            large = (target > 0) & (total > 0)
+
+            self.xp_mantissa[:n] = np.floor(np.where(
+                large,
+                np.ldexp(fraction, MANTISSA_BITS),
+                np.ldexp(total, np.where(large, 0, exponent))
+            ))
+            self.xp_exponent[:n] = np.where(large, target, 0)
+            self.last_seen[:n] += elapsed
+            self.changed[:n] = gained > 0
+
+    def expire(self, now):
+        """
+        Drop sessions that have not been saved for expire_after seconds.
+        Remaining slots are compacted so ticks keep working on a dense prefix.
+
+        :param now: Current Unix time in seconds.
+        """
+        with self.lock:
+            n = self.count
+            keep = self.touched[:n] >= now - self.expire_after
+            if keep.all():
+                return
+
+            kept = np.flatnonzero(keep)
+            for field in FIELDS:
+                array = getattr(self, field)
+                array[:len(kept)] = array[kept]
+
+            self.keys = [self.keys[i] for i in kept]
+            self.names = [self.names[i] for i in kept]
+            self.slots = {player_id: slot for slot, player_id in enumerate(self.keys)}
+            self.count = len(kept)
+
+    def changed_rows(self, min_xp=BigNum(0)):
+        """
+        Return sessions whose XP changed on the last tick and is at least min_xp.
+        Used to push idle progress of potential leaders to the leaderboard.
+
+        :param min_xp: Smallest XP worth reporting, as a BigNum.
+        :return: List of (player_id, name, xp, click_value, stage) tuples.
+        """
+        with self.lock:
+            n = self.count
+            xp_exponent = self.xp_exponent[:n]
+            # Canonical BigNums compare by exponent first, then mantissa.
+            at_least = (xp_exponent > min_xp.exponent) | (
+                (xp_exponent == min_xp.exponent) & (self.xp_mantissa[:n] >= min_xp.mantissa)
+            )
+            selected = np.flatnonzero(self.changed[:n] & at_least)
+            return [
+                (
+                    self.keys[i],
+                    self.names[i],
+                    BigNum(int(self.xp_mantissa[i]), int(self.xp_exponent[i])),
+                    BigNum(int(self.click_mantissa[i]), int(self.click_exponent[i])),
+                    int(self.stage[i])
+                )
+                for i in selected
+            ]
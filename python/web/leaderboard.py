@@ -0,0 +1,290 @@
+"""
+leaderboard.py
+
+This module keeps a persistent leaderboard for the Monster Evolution Clicker game.
+Every player's progress is stored in an indexed SQLite table, while the best
+players are mirrored in a small in-memory top-K list. The list is updated
+incrementally each time a game is saved, so reading the leaderboard never sorts
+or scans the player table. Saved progress is buffered in memory and written to
+SQLite in one transaction by flush(), so saving a game does not wait for a
+commit.
+
+A Leaderboard owns an SQLite connection, which must not be used across fork():
+create it in the process that uses it (each server worker has its own).
+
+XP is stored as a BigNum mantissa and exponent, ranked by the (exponent, mantissa)
+index, so ordering stays exact for arbitrarily large scores.
+"""
+
+import bisect
+import sqlite3
+import threading
+import time
+
+from bignum import BigNum
+
+
+class Leaderboard:
+    """
+    Persistent player leaderboard with an incrementally maintained top-K index.
+
+    Attributes:
+        size: Number of players kept in the in-memory top-K list.
+        refresh_interval: Seconds before the top-K list is reloaded from SQLite,
+            so changes written by other server processes are picked up.
+        pending: Player id -> latest (name, xp, click_value, stage, updated_at)
+            not yet written to SQLite.
+    """
+
+    def __init__(self, path, size=10, refresh_interval=5.0):
+        """
+        Open (or create) the leaderboard database and load the current top players.
+
+        :param path: Path of the SQLite database file.
+        :param size: Number of top players to keep in memory.
+        :param refresh_interval: Seconds between reloads of the top-K list.
+        """
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        # Serializes use of the connection; taken after self.lock when both are needed.
+        self.db_lock = threading.Lock()
+        self.pending = {}
+
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rankings (
+                player_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                xp_mantissa INTEGER NOT NULL,
+                xp_exponent INTEGER NOT NULL,
+                click_mantissa INTEGER NOT NULL,
+                click_exponent INTEGER NOT NULL,
+                stage INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        # Matches the leaderboard ordering so the top-K reload is an index walk.
+        self.connection.execute(
+            """
+            CREATE INDEX IF NOT EXISTS rankings_rank
+            ON rankings (xp_exponent DESC, xp_mantissa DESC, player_id)
+            """
+        )
+        self.migrate_players_table()
+        self.connection.commit()
+
+        # Sorted ranking keys and the row for each top player.
+        self.keys = []
+        self.rows = {}
+        self.loaded_at = 0.0
+        self.reload()
+
+    def migrate_players_table(self):
+        """
+        Copy rows from the original integer "players" table, if present, into
+        the rankings table and drop it.
+        """
+        exists = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'players'"
+        ).fetchone()
+        if not exists:
+            return
+
+        rows = self.connection.execute(
+            "SELECT player_id, name, xp, click_value, stage, updated_at FROM players"
+        ).fetchall()
+        self.connection.executemany(
+            """
+            INSERT OR IGNORE INTO rankings
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (player_id, name, *self.split(xp), *self.split(click_value), stage, updated_at)
+                for player_id, name, xp, click_value, stage, updated_at in rows
+            ]
+        )
+        self.connection.execute("DROP TABLE players")
+
+    @staticmethod
+    def split(value):
+        """
+        Split a number into its BigNum mantissa and exponent.
+
+        :param value: int or BigNum.
+        :return: (mantissa, exponent) tuple.
+        """
+        value = BigNum.of(value)
+        return value.mantissa, value.exponent
+
+    @staticmethod
+    def rank_key(xp, player_id):
+        """
+        Build the sort key of a player: highest XP first, ties by player id.
+
+        :param xp: Player's XP as a BigNum.
+        :param player_id: Unique id of the player.
+        :return: Tuple that sorts in leaderboard order.
+        """
+        return (-xp.exponent, -xp.mantissa, player_id)
+
+    def reload(self):
+        """
+        Rebuild the in-memory top-K list from the database index.
+        """
+        with self.lock:
+            self._reload()
+
+    def _reload(self):
+        # Write buffered progress first, or the reload would drop it from the list.
+        pending, self.pending = self.pending, {}
+        with self.db_lock:
+            self._write(pending)
+            self._read_top()
+
+    def _read_top(self):
+        cursor = self.connection.execute(
+            """
+            SELECT player_id, name, xp_mantissa, xp_exponent, click_mantissa, click_exponent, stage
+            FROM rankings
+            ORDER BY xp_exponent DESC, xp_mantissa DESC, player_id
+            LIMIT ?
+            """,
+            (self.size,)
+        )
+        self.keys = []
+        self.rows = {}
+        for player_id, name, xp_mantissa, xp_exponent, click_mantissa, click_exponent, stage in cursor:
+            xp = BigNum(xp_mantissa, xp_exponent)
+            self.keys.append(self.rank_key(xp, player_id))
+            self.rows[player_id] = {
+                "name": name,
+                "xp": xp,
+                "click_value": BigNum(click_mantissa, click_exponent),
+                "stage": stage,
+            }
+        self.loaded_at = time.monotonic()
+
+    def record(self, player_id, name, xp, click_value, stage):
+        """
+        Store a player's latest progress and update the top-K list in place.
+
+        :param player_id: Unique id of the player's session.
+        :param name: Display name of the player.
+        :param xp: Current experience points (int or BigNum).
+        :param click_value: Current XP gained per click (int or BigNum).
+        :param stage: Current evolution stage.
+        """
+        self.record_many([(player_id, name, xp, click_value, stage)])
+
+    def record_many(self, players):
+        """
+        Store progress for several players: the top-K list is updated at once,
+        and the rows are written to SQLite by the next flush().
+
+        :param players: Iterable of (player_id, name, xp, click_value, stage) tuples.
+        """
+        players = [
+            (player_id, name, BigNum.of(xp), BigNum.of(click_value), stage)
+            for player_id, name, xp, click_value, stage in players
+        ]
+        if not players:
+            return
+
+        now = time.time()
+        with self.lock:
+            for player_id, name, xp, click_value, stage in players:
+                self.pending[player_id] = (name, xp, click_value, stage, now)
+                row = {"name": name, "xp": xp, "click_value": click_value, "stage": stage}
+                self._update_top(player_id, self.rank_key(xp, player_id), row)
+
+    def flush(self):
+        """
+        Write all buffered progress to SQLite in a single transaction.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        with self.db_lock:
+            self._write(pending)
+
+    def _write(self, pending):
+        if not pending:
+            return
+        self.connection.executemany(
+            """
+            INSERT INTO rankings (
+                player_id, name, xp_mantissa, xp_exponent,
+                click_mantissa, click_exponent, stage, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (player_id) DO UPDATE SET
+                name = excluded.name,
+                xp_mantissa = excluded.xp_mantissa,
+                xp_exponent = excluded.xp_exponent,
+                click_mantissa = excluded.click_mantissa,
+                click_exponent = excluded.click_exponent,
+                stage = excluded.stage,
+                updated_at = excluded.updated_at
+            """,
+            [
+                (
+                    player_id, name, xp.mantissa, xp.exponent,
+                    click_value.mantissa, click_value.exponent, stage, updated_at
+                )
+                for player_id, (name, xp, click_value, stage, updated_at) in pending.items()
+            ]
+        )
+        self.connection.commit()
+
+    def min_xp(self):
+        """
+        Return the smallest XP that can currently enter the top-K list.
+
+        :return: XP of the last listed player as a BigNum, or 0 while the list is not full.
+        """
+        with self.lock:
+            if len(self.keys) < self.size:
+                return BigNum(0)
+            return self.rows[self.keys[-1][-1]]["xp"]
+
+    def _update_top(self, player_id, key, row):
+        was_full = len(self.keys) >= self.size
+
+        if player_id in self.rows:
+            # Every player outside the list ranks below the current last entry.
+            boundary = self.keys[-1]
+            old_key = self.rank_key(self.rows[player_id]["xp"], player_id)
+            del self.keys[bisect.bisect_left(self.keys, old_key)]
+            del self.rows[player_id]
+
+            if was_full and key > boundary:
+                # The player dropped below the boundary, so the new last place
+                # may belong to someone outside the list; ask the index.
+                self._reload()
+                return
+        elif was_full:
+            if key > self.keys[-1]:
+                return
+            evicted = self.keys.pop()
+            del self.rows[evicted[-1]]
+
+        bisect.insort(self.keys, key)
+        self.rows[player_id] = row
+
+    def top(self):
+        """
+        Return the current top players in rank order.
+
+        :return: List of dictionaries with rank, name, xp, click_value and stage.
+        """
+        with self.lock:
+            if time.monotonic() - self.loaded_at > self.refresh_interval:
+                self._reload()
+            return [
+                dict(self.rows[player_id], rank=rank)
+                for rank, (*_, player_id) in enumerate(self.keys, start=1)
+            ]
@@ -0,0 +1,259 @@
+"""
+loadtest.py
+
+This module is a local load generator for the Monster Evolution Clicker game.
+It opens a number of concurrent clients against a running server, each with its
+own game session, and reports requests per second along with p50 and p99 latency
+for the /click, /upgrade and /game routes at each requested concurrency level.
+Clients that cannot start a game or lose their connection are counted as failed
+instead of stopping the run.
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlparse
+
+# HTTP method used for each benchmarked route.
+ROUTE_METHODS = {
+    "/click": "POST",
+    "/upgrade": "POST",
+    "/game": "GET",
+}
+
+
+class Client:
+    """
+    A single keep-alive HTTP client that carries its own session cookie.
+    """
+
+    def __init__(self, host, port):
+        """
+        Open a connection to the server.
+
+        :param host: Server hostname.
+        :param port: Server port.
+        """
+        self.connection = http.client.HTTPConnection(host, port, timeout=30)
+        self.cookie = None
+
+    def request(self, method, path):
+        """
+        Send one request and read the full response body.
+
+        :param method: HTTP method to use.
+        :param path: Route to request.
+        :return: HTTP status code of the response.
+        """
+        headers = {"Cookie": self.cookie} if self.cookie else {}
+        self.connection.request(method, path, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+
+        # Keep the newest session cookie so the game state carries over.
+        set_cookie = response.getheader("Set-Cookie")
+        if set_cookie:
+            self.cookie = set_cookie.split(";", 1)[0]
+        return response.status
+
+    def start_game(self):
+        """
+        Start a fresh game session, the same way the menu's Start button does.
+        """
+        self.request("GET", "/")
+        self.request("GET", "/start")
+
+    def close(self):
+        """
+        Close the underlying connection.
+        """
+        self.connection.close()
+
+
+def percentile(sorted_values, fraction):
+    """
+    Return the nearest-rank percentile of an already sorted list.
+
+    :param sorted_values: Latencies sorted in ascending order.
+    :param fraction: Percentile as a fraction between 0 and 1.
+    :return: The value at that percentile, or 0.0 for an empty list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_clients(concurrency, connect, requests_per_client):
+    """
+    Run concurrent clients that each connect, wait until all are connected and
+    then send a fixed number of requests. The clock starts once every client is
+    connected. Clients that cannot connect or lose their connection are counted
+    as failed and the others go on; any other error in a client stops the run.
+
+    :param concurrency: Number of concurrent clients.
+    :param connect: Called once in each client thread. Returns a (send, close)
+        pair: send() makes one request and returns its HTTP status code, and
+        close() releases the client.
+    :param requests_per_client: Requests each client sends.
+    :return: Dictionary with throughput, latency percentiles, error, throttled and
+        failed client counts.
+    """
+    latencies = []
+    errors = []
+    throttled = []
+    failed = []
+    lock = threading.Lock()
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker():
+        close = None
+        local_latencies = []
+        local_errors = 0
+        local_throttled = 0
+        local_failed = False
+        try:
+            try:
+                send, close = connect()
+            except (OSError, http.client.HTTPException):
+                # Still meet the other clients at the barrier, but send nothing.
+                local_failed = True
+            ready.wait()
+            while not local_failed and len(local_latencies) < requests_per_client:
+                started = time.perf_counter()
+                status = send()
+                local_latencies.append(time.perf_counter() - started)
+                if status == 429:
+                    local_throttled += 1
+                elif status >= 400:
+                    local_errors += 1
+        except (OSError, http.client.HTTPException):
+            # The connection broke off during the run.
+            local_failed = True
+        except threading.BrokenBarrierError:
+            # Another client crashed; run_clients reports it.
+            local_failed = True
+        except BaseException:
+            # Never leave run_clients waiting on the barrier for this client.
+            ready.abort()
+            raise
+        finally:
+            if close is not None:
+                close()
+            with lock:
+                latencies.extend(local_latencies)
+                errors.append(local_errors)
+                throttled.append(local_throttled)
+                failed.append(local_failed)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        for thread in threads:
+            thread.join()
+        raise RuntimeError("A client crashed; see its traceback above.") from None
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "throttled": sum(throttled),
+        "failed": sum(failed),
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def run_level(host, port, route, concurrency, requests_per_client):
+    """
+    Hit one route with a fixed number of concurrent clients, each of which
+    starts its own game first.
+
+    :param host: Server hostname.
+    :param port: Server port.
+    :param route: Route to benchmark.
+    :param concurrency: Number of concurrent clients.
+    :param requests_per_client: Requests each client sends.
+    :return: Dictionary with the route and concurrency, and the results of run_clients.
+    """
+    method = ROUTE_METHODS[route]
+
+    def connect():
+        client = Client(host, port)
+        try:
+            client.start_game()
+        except BaseException:
+            client.close()
+            raise
+        return lambda: client.request(method, route), client.close
+
+    return dict(route=route, concurrency=concurrency, **run_clients(concurrency, connect, requests_per_client))
+
+
+def parse_args():
+    """
+    Parse command line options.
+
+    :return: Parsed argparse namespace.
+    """
+    parser = argparse.ArgumentParser(description="Load test the clicker game routes.")
+    parser.add_argument(
+        "--url",
+        default="http://127.0.0.1:8000",
+        help="Base URL of the running server (default: http://127.0.0.1:8000)."
+    )
+    parser.add_argument(
+        "--routes",
+        default="/click,/upgrade,/game",
+        help="Comma separated routes to test (default: /click,/upgrade,/game)."
+    )
+    parser.add_argument(
+        "--concurrency",
+        default="1,8,32",
+        help="Comma separated concurrency levels (default: 1,8,32)."
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=200,
+        help="Requests sent by each client per level (default: 200)."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    url = urlparse(args.url)
+    host = url.hostname or "127.0.0.1"
+    port = url.port or 80
+
+    routes = [route.strip() for route in args.routes.split(",") if route.strip()]
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+
+    for route in routes:
+        if route not in ROUTE_METHODS:
+            raise SystemExit(f"Unsupported route: {route}")
+
+    print(
+        f"{'route':<10} {'conc':>5} {'failed':>6} {'reqs':>7} {'errors':>7} {'429s':>7} "
+        f"{'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}"
+    )
+    for route in routes:
+        for level in levels:
+            result = run_level(host, port, route, level, args.requests)
+            print(
+                f"{result['route']:<10} {result['concurrency']:>5} {result['failed']:>6} {result['requests']:>7} "
+                f"{result['errors']:>7} {result['throttled']:>7} {result['rps']:>10.1f} "
+                f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+            )
@@ -0,0 +1,206 @@
+"""
+metrics.py
+
+This module provides lightweight, in-process metrics for the Monster Evolution
+Clicker web application. Counters and histograms are kept in plain Python
+structures guarded by a lock, and are rendered on demand in the Prometheus text
+exposition format. Recording a value is a dictionary lookup, a bisect and two
+additions, so the instrumentation is cheap enough to leave on in production.
+"""
+
+import bisect
+import functools
+import threading
+import time
+
+# Content type of the Prometheus text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default latency buckets in seconds (100 microseconds up to 2.5 seconds).
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5
+)
+
+# Default size buckets in bytes.
+SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536)
+
+
+def format_labels(names, values, extra=""):
+    """
+    Format label names and values as a Prometheus label set.
+
+    :param names: Tuple of label names.
+    :param values: Tuple of label values in the same order.
+    :param extra: Already formatted label appended at the end (e.g. le="0.1").
+    :return: Label set string such as {route="/click"}, or "" without labels.
+    """
+    parts = [
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def format_value(value):
+    """
+    Format a number the way Prometheus expects.
+
+    :param value: Integer or float sample value.
+    :return: String representation of the value.
+    """
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A monotonically increasing count, optionally split by labels.
+    """
+
+    def __init__(self, name, documentation, labels=()):
+        """
+        :param name: Metric name.
+        :param documentation: Help text shown in the exposition output.
+        :param labels: Tuple of label names.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        """
+        Increase the counter for the given label values.
+
+        :param label_values: One value per label name.
+        :param amount: Amount to add.
+        """
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self):
+        """
+        Render the counter in the text exposition format.
+
+        :return: List of output lines.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, label_values)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    A distribution of observed values in fixed buckets, optionally split by labels.
+    """
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        """
+        :param name: Metric name.
+        :param documentation: Help text shown in the exposition output.
+        :param labels: Tuple of label names.
+        :param buckets: Sorted upper bounds of the buckets.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Label values -> [per-bucket counts (last one is +Inf), sum, count].
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """
+        Record one observation.
+
+        :param value: Observed value (seconds, bytes, ...).
+        :param label_values: One value per label name.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *label_values):
+        """
+        Decorator that records how long each call of the wrapped function takes.
+
+        :param label_values: One value per label name.
+        :return: Decorator function.
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, *label_values)
+            return wrapper
+        return decorator
+
+    def render(self):
+        """
+        Render the histogram in the text exposition format.
+
+        :return: List of output lines.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    labels = format_labels(self.labels, label_values, f'le="{format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """
+    A collection of metrics rendered together by the /metrics endpoint.
+    """
+
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, documentation, labels=()):
+        """
+        Create and register a Counter.
+        """
+        metric = Counter(name, documentation, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        """
+        Create and register a Histogram.
+        """
+        metric = Histogram(name, documentation, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """
+        Render every registered metric in the text exposition format.
+
+        :return: The full exposition text.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
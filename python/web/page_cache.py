@@ -0,0 +1,67 @@
+"""
+page_cache.py
+
+This module contains the rendering fast path for the Monster Evolution Clicker
+game pages. A SlotTemplate renders a Jinja template once with placeholder markers
+in place of the per-player values, splits the result around those markers, and
+afterwards builds each page by joining the fixed pieces with the escaped values.
+No template code runs per request.
+"""
+
+import re
+
+from markupsafe import escape
+
+
+def marker(name):
+    """
+    Return the placeholder rendered in place of a slot value.
+
+    :param name: Slot name.
+    :return: Marker string made only of characters that no template escapes.
+    """
+    return f"__slot_{name}__"
+
+
+class SlotTemplate:
+    """
+    A pre-rendered page with named slots for a few dynamic values.
+
+    Attributes:
+        parts: Fixed page pieces; slot values go between consecutive pieces.
+        order: Slot name filling the gap after each piece.
+        tail: Fixed page piece after the last slot.
+    """
+
+    def __init__(self, html, slots):
+        """
+        Split a page rendered with marker() values into fixed pieces.
+
+        :param html: Page rendered with marker(name) passed for every slot.
+        :param slots: Names of the slots.
+        """
+        pattern = re.compile("|".join(re.escape(marker(name)) for name in slots))
+        names = {marker(name): name for name in slots}
+
+        self.parts = []
+        self.order = []
+        position = 0
+        for match in pattern.finditer(html):
+            self.parts.append(html[position:match.start()])
+            self.order.append(names[match.group()])
+            position = match.end()
+        self.tail = html[position:]
+
+    def fill(self, values):
+        """
+        Build the page for one set of slot values.
+
+        :param values: Dictionary mapping slot name to value.
+        :return: The complete page.
+        """
+        pieces = []
+        for part, name in zip(self.parts, self.order):
+            pieces.append(part)
+            pieces.append(str(escape(values[name])))
+        pieces.append(self.tail)
+        return "".join(pieces)
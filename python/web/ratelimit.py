@@ -0,0 +1,117 @@
+"""
+ratelimit.py
+
+This module contains an in-memory token-bucket rate limiter for the Monster
+Evolution Clicker game. Each key (a session or a client address) owns a bucket
+that refills at a fixed rate up to a burst size. Checking a key is O(1), and
+buckets that have been idle long enough to refill completely are dropped, since
+a full bucket behaves exactly like a missing one. This keeps memory bounded no
+matter how many clients have ever connected.
+
+Buckets live in the memory of one process: with several Gunicorn workers every
+worker keeps its own buckets, so a client spreading its requests over the
+workers gets up to the configured rate once per worker.
+"""
+
+import contextlib
+import threading
+import time
+from collections import OrderedDict
+
+# Idle buckets removed per call, which keeps cleanup O(1) per request.
+EXPIRE_PER_CALL = 2
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets kept in least-recently-used order.
+
+    Attributes:
+        rate: Tokens added to each bucket per second.
+        burst: Maximum tokens a bucket can hold.
+        max_entries: Hard cap on tracked keys; the least recently used are dropped first.
+    """
+
+    def __init__(self, rate, burst, max_entries=1000000):
+        """
+        :param rate: Tokens added to each bucket per second.
+        :param burst: Maximum tokens a bucket can hold.
+        :param max_entries: Maximum number of keys tracked at once.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_entries = max_entries
+        self.idle_limit = burst / rate
+        self.lock = threading.Lock()
+        # Key -> [tokens, last update time], oldest first.
+        self.buckets = OrderedDict()
+
+    def _bucket(self, key, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [float(self.burst), now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self.buckets.move_to_end(key)
+
+        # Drop a few of the least recently used buckets if they are full again.
+        for _ in range(EXPIRE_PER_CALL):
+            oldest_key, oldest = next(iter(self.buckets.items()))
+            if oldest_key != key and (
+                now - oldest[1] >= self.idle_limit or len(self.buckets) > self.max_entries
+            ):
+                del self.buckets[oldest_key]
+            else:
+                break
+        return bucket
+
+    def available(self, key, now=None):
+        """
+        Return how many whole tokens a key can spend right now.
+
+        :param key: Bucket key.
+        :param now: Current monotonic time (defaults to time.monotonic()).
+        :return: Number of available tokens.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            return int(self._bucket(key, now)[0])
+
+    def consume(self, key, tokens, now=None):
+        """
+        Spend tokens from a key's bucket, never going below zero.
+
+        :param key: Bucket key.
+        :param tokens: Number of tokens to spend.
+        :param now: Current monotonic time (defaults to time.monotonic()).
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            bucket = self._bucket(key, now)
+            bucket[0] = max(0.0, bucket[0] - tokens)
+
+
+def take(limits, requested):
+    """
+    Grant as many of the requested tokens as every bucket allows, and spend them.
+
+    The locks of all the limiters are held from the check to the spending, in a
+    fixed order, so concurrent requests sharing a bucket cannot both be granted
+    the same tokens.
+
+    :param limits: List of (TokenBucketLimiter, key) pairs that must all agree.
+    :param requested: Number of tokens wanted.
+    :return: Number of tokens granted (0 when any bucket is empty).
+    """
+    now = time.monotonic()
+    locks = [lock for _, lock in sorted({id(limiter): limiter.lock for limiter, _ in limits}.items())]
+    with contextlib.ExitStack() as stack:
+        for lock in locks:
+            stack.enter_context(lock)
+        buckets = [limiter._bucket(key, now) for limiter, key in limits]
+        granted = min([requested] + [int(bucket[0]) for bucket in buckets])
+        if granted > 0:
+            for bucket in buckets:
+                bucket[0] = max(0.0, bucket[0] - granted)
+    return granted
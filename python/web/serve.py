@@ -0,0 +1,117 @@
+"""
+serve.py
+
+This module is the production entry point for the Monster Evolution Clicker game.
+It serves the same Flask application defined in app.py through Gunicorn, a
+multi-worker WSGI server, instead of Flask's single-threaded development server.
+The number of worker processes and threads per worker can be set on the command
+line or through environment variables.
+"""
+
+import argparse
+import multiprocessing
+import os
+
+from gunicorn.app.base import BaseApplication
+
+from app import app, start_worker
+
+
+class ClickerServer(BaseApplication):
+    """
+    Gunicorn application wrapper that serves the Flask app with the given options.
+    """
+
+    def __init__(self, wsgi_app, options):
+        """
+        Store the WSGI application and server options.
+
+        :param wsgi_app: The Flask application to serve.
+        :param options: Dictionary of Gunicorn settings (bind, workers, threads, ...).
+        """
+        self.wsgi_app = wsgi_app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        """
+        Apply the provided options to Gunicorn's configuration.
+        """
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        """
+        Return the WSGI application Gunicorn should serve.
+        """
+        return self.wsgi_app
+
+
+def post_fork(server, worker):
+    """
+    Start the app's background threads in a freshly forked worker. The app is
+    imported in the master, and threads started there do not survive the fork.
+
+    :param server: Gunicorn arbiter.
+    :param worker: The new worker.
+    """
+    start_worker()
+
+
+def default_workers():
+    """
+    Compute Gunicorn's recommended worker count for this machine.
+
+    :return: Two workers per CPU core plus one.
+    """
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def parse_args():
+    """
+    Parse command line options, falling back to environment variables.
+
+    :return: Parsed argparse namespace.
+    """
+    parser = argparse.ArgumentParser(description="Run the clicker game with a production server.")
+    parser.add_argument(
+        "--bind",
+        default=os.environ.get("CLICKER_BIND", "127.0.0.1:8000"),
+        help="Address and port to listen on (default: 127.0.0.1:8000)."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("CLICKER_WORKERS", default_workers())),
+        help="Number of worker processes (default: 2 x CPU cores + 1)."
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=int(os.environ.get("CLICKER_THREADS", 4)),
+        help="Number of threads per worker process (default: 4)."
+    )
+    parser.add_argument(
+        "--timeout",
+        type=int,
+        default=int(os.environ.get("CLICKER_TIMEOUT", 30)),
+        help="Seconds before a silent worker is restarted (default: 30)."
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    options = {
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        # Threaded workers are only needed when more than one thread is requested.
+        "worker_class": "gthread" if args.threads > 1 else "sync",
+        "timeout": args.timeout,
+        "accesslog": "-",
+        "post_fork": post_fork,
+    }
+
+    ClickerServer(app, options).run()
@@ -0,0 +1,169 @@
+"""
+session_codec.py
+
+This module converts MonsterGame state to and from the compact binary form stored
+in the session cookie. Every encoded state starts with a one byte schema version,
+so states written by older versions of the game can be recognized and migrated
+field by field instead of being thrown away.
+
+Version 1 layout: the version byte followed by unsigned LEB128 varints for xp,
+click_value, upgrade_cost, current_stage and last_seen (0 when not yet seen).
+Small values take a single byte and large ones grow only as needed.
+
+Version 2 layout: like version 1, but xp, click_value and upgrade_cost are each
+written as two varints (BigNum mantissa, then exponent), so an encoded state
+never exceeds a fixed size.
+"""
+
+from bignum import BigNum
+from game import MonsterGame
+
+# Schema version written by encode().
+VERSION = 2
+
+
+class SessionFormatError(ValueError):
+    # Raised when a stored game state cannot be decoded.
+    pass
+
+
+def write_varint(value, out):
+    """
+    Append a non-negative integer to a bytearray as an unsigned LEB128 varint.
+
+    :param value: Integer to write.
+    :param out: bytearray receiving the encoded bytes.
+    """
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varints(data, offset, count):
+    """
+    Read a number of unsigned LEB128 varints.
+
+    :param data: Encoded bytes.
+    :param offset: Position of the first varint.
+    :param count: Number of varints to read.
+    :return: List of decoded integers.
+    """
+    values = []
+    for _ in range(count):
+        value = 0
+        shift = 0
+        while True:
+            if offset >= len(data):
+                raise SessionFormatError("truncated game state")
+            byte = data[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append(value)
+    return values
+
+
+def decode_v0(data):
+    """
+    Read the original session format: a dictionary with one key per field.
+    """
+    return [
+        data["xp"],
+        data["click_value"],
+        data["upgrade_cost"],
+        data.get("current_stage", 1),
+        data.get("last_seen") or 0,
+    ]
+
+
+def decode_v1(data):
+    """
+    Read the version 1 binary format.
+    """
+    return read_varints(data, 1, 5)
+
+
+def decode_v2(data):
+    """
+    Read the version 2 binary format.
+    """
+    values = read_varints(data, 1, 8)
+    return [
+        BigNum(values[0], values[1]),
+        BigNum(values[2], values[3]),
+        BigNum(values[4], values[5]),
+        values[6],
+        values[7],
+    ]
+
+
+def migrate_v1(fields):
+    """
+    Turn version 1 integer amounts into BigNum values.
+    """
+    xp, click_value, upgrade_cost, current_stage, last_seen = fields
+    return [BigNum(xp), BigNum(click_value), BigNum(upgrade_cost), current_stage, last_seen]
+
+
+# Decoder for each schema version, returning the fields of that version.
+DECODERS = {
+    1: decode_v1,
+    2: decode_v2,
+}
+
+# Migrations that turn the fields of version N into the fields of version N + 1.
+# Version 0 (the dictionary format) already has the same fields as version 1.
+MIGRATIONS = {
+    0: lambda fields: fields,
+    1: migrate_v1,
+}
+
+
+def encode(game):
+    """
+    Encode a game state in the current binary format.
+
+    :param game: MonsterGame instance to encode.
+    :return: Encoded bytes.
+    """
+    out = bytearray([VERSION])
+    for value in (
+        game.xp.mantissa,
+        game.xp.exponent,
+        game.click_value.mantissa,
+        game.click_value.exponent,
+        game.upgrade_cost.mantissa,
+        game.upgrade_cost.exponent,
+        game.current_stage,
+        game.last_seen or 0,
+    ):
+        write_varint(value, out)
+    return bytes(out)
+
+
+def decode(data):
+    """
+    Decode a stored game state written by any known schema version.
+
+    :param data: Bytes written by encode(), or a legacy session dictionary.
+    :return: MonsterGame instance.
+    """
+    if isinstance(data, dict):
+        version = 0
+        fields = decode_v0(data)
+    else:
+        if not data or data[0] not in DECODERS:
+            raise SessionFormatError("unknown game state version")
+        version = data[0]
+        fields = DECODERS[version](data)
+
+    # Bring older states up to the current schema one version at a time.
+    while version < VERSION:
+        fields = MIGRATIONS[version](fields)
+        version += 1
+
+    xp, click_value, upgrade_cost, current_stage, last_seen = fields
+    return MonsterGame(xp, click_value, upgrade_cost, current_stage, last_seen or None)
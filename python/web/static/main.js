@@ -12,14 +12,76 @@ const upgradeBtn = document.getElementById('upgradeBtn');
 const xpSpan = document.getElementById('xp');
 const clickValueSpan = document.getElementById('click_value');
 const upgradeCostSpan = document.getElementById('upgrade_cost');
+const xpPerSecondSpan = document.getElementById('xp_per_second');
 const monsterImg = document.getElementById('monster');
 
+// Short scale suffixes for large numbers (kept in sync with bignum.py)
+const SUFFIXES = ['', 'K', 'M', 'B', 'T', 'Qa', 'Qi', 'Sx', 'Sp', 'Oc', 'No', 'Dc'];
+
+/**
+ * Format a server number for display.
+ * Small values are sent as plain numbers; huge ones arrive as scientific
+ * notation strings such as "1.235e42", which may exceed JavaScript's range.
+ *
+ * @param {number|string} value - Value returned from the server
+ * @returns {string} Human readable value such as "950", "12.50M" or "3.142e45"
+ */
+function formatNumber(value) {
+    let mantissa;
+    let exponent;
+
+    if (typeof value === 'number') {
+        if (value < 1e6) {
+            return String(value);
+        }
+        exponent = Math.floor(Math.log10(value));
+        mantissa = value / Math.pow(10, exponent);
+    } else {
+        const parts = value.split('e');
+        mantissa = parseFloat(parts[0]);
+        exponent = parseInt(parts[1] || '0', 10);
+    }
+
+    const group = Math.floor(exponent / 3);
+    if (group < SUFFIXES.length) {
+        return (mantissa * Math.pow(10, exponent - group * 3)).toFixed(2) + SUFFIXES[group];
+    }
+    return mantissa.toFixed(3) + 'e' + exponent;
+}
+
+// Clicks made while a request is in flight are counted here and sent
+// together in the next request, so fast clicking never queues up requests
+let pendingClicks = 0;
+let clickInFlight = false;
+
+/**
+ * Send all pending clicks to the server in a single request.
+ * The server may apply fewer clicks than requested if the player is over
+ * the rate limit; the returned state is always shown.
+ */
+function flushClicks() {
+    if (clickInFlight || pendingClicks === 0) {
+        return;
+    }
+
+    const body = new URLSearchParams({ count: pendingClicks });
+    pendingClicks = 0;
+    clickInFlight = true;
+
+    fetch('/click', { method: 'POST', body: body })
+        .then(response => response.json())
+        .then(data => updateUI(data))
+        .finally(() => {
+            clickInFlight = false;
+            flushClicks();
+        });
+}
+
 // Event listener for clicking the monster
 // Sends a POST request to the server to increment XP
 clickBtn.addEventListener('click', () => {
-    fetch('/click', { method: 'POST' })
-        .then(response => response.json())
-        .then(data => updateUI(data));
+    pendingClicks += 1;
+    flushClicks();
 });
 
 // Event listener for upgrading the monster
@@ -34,19 +96,22 @@ upgradeBtn.addEventListener('click', () => {
  * Update the user interface with the latest game state.
  *
  * @param {Object} data - Game state returned from the server
- * @param {number} data.xp - Current XP value
- * @param {number} data.click_value - XP gained per click
- * @param {number} data.upgrade_cost - XP required for the next upgrade
+ * @param {number|string} data.xp - Current XP value
+ * @param {number|string} data.click_value - XP gained per click
+ * @param {number|string} data.upgrade_cost - XP required for the next upgrade
+ * @param {number|string} data.xp_per_second - XP earned each second while idle
+ * @param {boolean} data.can_upgrade - Whether the player can afford an upgrade
  * @param {number} data.stage - Current monster evolution stage
  */
 function updateUI(data) {
-    // Update displayed XP, click value, and upgrade cost
-    xpSpan.textContent = data.xp;
-    clickValueSpan.textContent = data.click_value;
-    upgradeCostSpan.textContent = data.upgrade_cost;
+    // Update displayed XP, click value, upgrade cost, and idle rate
+    xpSpan.textContent = formatNumber(data.xp);
+    clickValueSpan.textContent = formatNumber(data.click_value);
+    upgradeCostSpan.textContent = formatNumber(data.upgrade_cost);
+    xpPerSecondSpan.textContent = formatNumber(data.xp_per_second);
 
     // Enable or disable the upgrade button based on available XP
-    upgradeBtn.disabled = data.xp < data.upgrade_cost;
+    upgradeBtn.disabled = !data.can_upgrade;
 
     // Update monster image to reflect the current evolution stage
     // Timestamp is appended to prevent browser image caching
@@ -0,0 +1,46 @@
+"""
+test_app.py
+
+Tests of the Flask routes through Flask's test client.
+
+Run with: python -m pytest test_app.py
+"""
+
+import os
+import tempfile
+
+# The app reads its settings on import: default rate limits, no idle ticker and
+# a throwaway leaderboard.
+os.environ["CLICKER_SESSION_RATE"] = "20"
+os.environ["CLICKER_IP_RATE"] = "200"
+os.environ["CLICKER_IDLE_TICK"] = "0"
+os.environ["CLICKER_LEADERBOARD_DB"] = os.path.join(tempfile.mkdtemp(prefix="clicker-test-"), "leaderboard.db")
+
+import pytest  # noqa: E402
+
+from app import app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    """
+    Return a test client whose game was started from the menu.
+    """
+    client = app.test_client()
+    client.get("/")
+    client.get("/start?name=Tester")
+    return client
+
+
+def test_upgrade_after_clicks_are_exhausted(client):
+    """
+    Clicking until the click bucket is empty leaves upgrades available.
+    """
+    # The session allows a burst of 40 actions, which empties its click bucket.
+    burst = client.post("/click", data={"count": 50})
+    assert burst.status_code == 200
+    assert burst.get_json()["clicks"] == 40
+
+    upgrade = client.post("/upgrade")
+    assert upgrade.status_code == 200
+    assert upgrade.get_json()["click_value"] == 2
@@ -0,0 +1,106 @@
+"""
+test_serve.py
+
+End-to-end tests of the production entry point: serve.py is started as a real
+Gunicorn server with several sync workers, and the game is played over HTTP.
+
+Run with: python -m pytest test_serve.py
+"""
+
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+
+import pytest
+
+from loadtest import Client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    """
+    Return a TCP port that is free on the loopback interface right now.
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def server(tmp_path):
+    """
+    Run serve.py with two sync workers and a fast idle tick.
+
+    :return: (host, port, leaderboard database path) of the running server.
+    """
+    port = free_port()
+    database = str(tmp_path / "leaderboard.db")
+    env = dict(
+        os.environ,
+        CLICKER_IDLE_TICK="0.2",
+        CLICKER_LEADERBOARD_DB=database,
+        CLICKER_TEMPLATE_CACHE=str(tmp_path),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--bind", f"127.0.0.1:{port}", "--workers", "2", "--threads", "1"],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("serve.py did not start")
+                time.sleep(0.1)
+        yield "127.0.0.1", port, database
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def stored_xp(database, player_name):
+    """
+    Read a player's XP mantissa from the leaderboard database, or None if absent.
+    """
+    connection = sqlite3.connect(database)
+    try:
+        row = connection.execute(
+            "SELECT xp_mantissa FROM rankings WHERE name = ?", (player_name,)
+        ).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        connection.close()
+    return row[0] if row else None
+
+
+def test_idle_ticker_runs_in_workers(server):
+    """
+    Idle XP of a player who stopped sending requests reaches the leaderboard,
+    which only happens if the worker that served the player runs a ticker.
+    """
+    host, port, database = server
+    client = Client(host, port)
+    try:
+        client.request("GET", "/")
+        client.request("GET", "/start?name=Idler")
+        # 10 XP buys the first upgrade, after which the monster earns idle XP.
+        assert client.request("POST", "/click?count=10") == 200
+        assert client.request("POST", "/upgrade") == 200
+    finally:
+        client.close()
+
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        xp = stored_xp(database, "Idler")
+        if xp:
+            return
+        time.sleep(0.2)
+    pytest.fail(f"idle XP never reached the leaderboard (stored XP: {xp})")